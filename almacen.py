@@ -0,0 +1,126 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+
+# zstandard es opcional: sin él los reportes se comprimen con gzip
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+EXTENSIONES = {'gzip': '.gz', 'zstd': '.zst'}
+
+# Abre un reporte en modo binario, descomprimiéndolo en streaming si está en el almacén
+def abrir_Reporte(pathReporte):
+    if pathReporte.endswith('.gz'):
+        return gzip.open(pathReporte, 'rb')
+    if pathReporte.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError(f"Se necesita el paquete zstandard para leer {pathReporte}")
+        return zstandard.ZstdDecompressor().stream_reader(open(pathReporte, 'rb'), closefd=True)
+    return open(pathReporte, 'rb')
+
+def es_Comprimido(pathReporte):
+    return pathReporte.endswith(tuple(EXTENSIONES.values()))
+
+# Formato del reporte (html o json) según su nombre, con o sin compresión
+def formato_Reporte(pathReporte):
+    for extension in EXTENSIONES.values():
+        if pathReporte.endswith(extension):
+            pathReporte = pathReporte[:-len(extension)]
+    return os.path.splitext(pathReporte)[1].lstrip('.')
+
+# Lee un archivo y va calculando el sha256 de lo leído, para hashear el reporte en la misma
+# pasada en que se comprime
+class _LectorHash:
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.hash = hashlib.sha256()
+
+    def read(self, tamano=-1):
+        datos = self.archivo.read(tamano)
+        self.hash.update(datos)
+        return datos
+
+# Almacén de reportes comprimidos: cada reporte se guarda con el hash de su contenido como
+# nombre (blobs/ab/abcd....html.gz) y un índice SQLite relaciona (url, mode, fecha) con el blob.
+# El hash identifica el contenido, no deduplica auditorías: cada ejecución de Lighthouse cambia
+# fetchTime, los tiempos y las métricas medidas, así que dos auditorías de la misma página casi
+# nunca producen el mismo reporte. Solo se reutiliza un blob si se guarda un archivo idéntico.
+class AlmacenReportes:
+    def __init__(self, carpeta='reportes', compresion='gzip'):
+        if compresion == 'zstd' and zstandard is None:
+            print("zstandard no está instalado, se usa gzip")
+            compresion = 'gzip'
+        self.carpeta = carpeta
+        self.compresion = compresion
+        os.makedirs(os.path.join(carpeta, 'blobs'), exist_ok=True)
+        self.bloqueo = threading.Lock()
+        self.conexion = sqlite3.connect(os.path.join(carpeta, 'indice.sqlite'), check_same_thread=False)
+        self.conexion.execute('''
+            CREATE TABLE IF NOT EXISTS reportes (
+                url TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                fecha TEXT NOT NULL,
+                formato TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                blob TEXT NOT NULL
+            )
+        ''')
+        self.conexion.execute('CREATE INDEX IF NOT EXISTS idx_reportes_url ON reportes (url, mode, fecha)')
+        self.conexion.commit()
+
+    # Comprime el reporte en el almacén, lo registra en el índice y elimina el original.
+    # Devuelve la ruta del blob.
+    def guardar(self, url, mode, pathReporte, fecha=None):
+        formato = formato_Reporte(pathReporte)
+        # Se comprime a un temporal mientras se calcula el hash y después se renombra: una sola
+        # lectura del reporte y un blob nunca queda a medio escribir
+        descriptor, pathTemporal = tempfile.mkstemp(dir=os.path.join(self.carpeta, 'blobs'), suffix='.tmp')
+        with os.fdopen(descriptor, 'wb') as destino, open(pathReporte, 'rb') as archivo:
+            origen = _LectorHash(archivo)
+            self._comprimir(origen, destino)
+        digest = origen.hash.hexdigest()
+
+        carpetaBlob = os.path.join(self.carpeta, 'blobs', digest[:2])
+        pathBlob = os.path.join(carpetaBlob, f'{digest}.{formato}{EXTENSIONES[self.compresion]}')
+        if os.path.exists(pathBlob):
+            os.remove(pathTemporal)
+        else:
+            os.makedirs(carpetaBlob, exist_ok=True)
+            os.replace(pathTemporal, pathBlob)
+
+        with self.bloqueo:
+            self.conexion.execute(
+                'INSERT INTO reportes VALUES (?, ?, ?, ?, ?, ?)',
+                (url, mode, fecha or datetime.now().isoformat(timespec='seconds'), formato, digest, pathBlob)
+            )
+            self.conexion.commit()
+        os.remove(pathReporte)
+        return pathBlob
+
+    def _comprimir(self, origen, destino):
+        if self.compresion == 'zstd':
+            zstandard.ZstdCompressor(level=10).copy_stream(origen, destino)
+        else:
+            with gzip.GzipFile(fileobj=destino, mode='wb', compresslevel=6) as comprimido:
+                for bloque in iter(lambda: origen.read(1024 * 1024), b''):
+                    comprimido.write(bloque)
+
+    # Reportes de una URL en un modo, del más reciente al más antiguo: [(fecha, formato, blob)]
+    def historial(self, url, mode, formato=None):
+        consulta = 'SELECT fecha, formato, blob FROM reportes WHERE url = ? AND mode = ?'
+        parametros = [url, mode]
+        if formato:
+            consulta += ' AND formato = ?'
+            parametros.append(formato)
+        with self.bloqueo:
+            return self.conexion.execute(consulta + ' ORDER BY fecha DESC', parametros).fetchall()
+
+    def cerrar(self):
+        with self.bloqueo:
+            self.conexion.close()
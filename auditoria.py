@@ -0,0 +1,884 @@
+import asyncio
+import atexit
+from datetime import datetime
+import json
+import os
+import re
+import signal
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from openpyxl import Workbook, load_workbook
+from bitacora import Bitacora
+from almacen import AlmacenReportes
+from cache import CacheAuditorias
+from canonico import agrupar_Alias, canonizar
+from carga import ControladorConcurrencia
+from cola import abrir_Cola, id_Trabajo
+from historial import HistorialResultados
+from instrumentacion import Instrumentacion
+from metricas import AlmacenMetricas
+from muestreo import muestrear, muestrear_Async
+from navegadores import PoolChrome
+from orquestador import ClienteValidacion, ejecutar_Supervisado_Async, validar_Url_Async
+from perfiles import PERFIL_POR_DEFECTO, PERFILES, banderas_Perfil
+from planificador import PlanificadorAuditorias
+from reportes import extraer_Puntuaciones, leer_Benchmark_Index, path_Json, path_PDF, path_Salida
+from resultados import ENCABEZADOS, ResultadosExcel, fila_Resultado
+from supervisor import clasificar_Fallo, ejecutar_Supervisado, espera_Reintento, limpiar_Chrome, limpiar_Chrome_Huerfanos, terminar_Procesos
+from validacion import validar_Urls
+
+# Crear carpetas si no existen y asegurarse de que tienen los permisos adecuados
+def crear_carpetas():
+    for carpeta in ['HTMLMobile', 'HTMLDesktop']:
+        if not os.path.exists(carpeta):
+            os.makedirs(carpeta)
+        os.chmod(carpeta, 0o777)
+
+# Banderas de Chrome para simular un entorno más similar al de DevTools
+# (también se usan para lanzar los Chrome persistentes de --chrome-persistente)
+CHROME_FLAGS = (
+    '--disable-gpu --no-sandbox --disable-dev-shm-usage '
+    '--disable-setuid-sandbox --disable-software-rasterizer '
+    '--disable-extensions --user-agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36"'
+)
+
+# Rutas de Node.js y Lighthouse; las variables de entorno LIGHTHOUSE_NODE y LIGHTHOUSE_CLI las reemplazan
+# (por ejemplo con el Lighthouse falso de lighthouse_falso.py en los benchmarks)
+
+# Ruta completa al ejecutable de Node.js
+PATH_NODE = os.environ.get('LIGHTHOUSE_NODE', '/usr/bin/node')
+
+# Ruta completa al archivo de Lighthouse
+LIGHTHOUSE_PATH = os.environ.get('LIGHTHOUSE_CLI', '/usr/lib/node_modules/lighthouse/cli/index.js')
+
+# Versión de Lighthouse instalada (del package.json junto a cli/index.js); None si no se puede leer
+def version_Lighthouse():
+    pathPackage = os.path.join(os.path.dirname(os.path.dirname(LIGHTHOUSE_PATH)), 'package.json')
+    try:
+        with open(pathPackage, 'r', encoding='utf-8') as archivo:
+            return json.load(archivo).get('version')
+    except (OSError, ValueError):
+        return None
+
+# Una ejecución de auditar de lighthouse.py: guarda las opciones y el estado de la ejecución
+# (etapas, bitácora, historial, resultados), así dos ejecuciones en el mismo proceso no comparten
+# nada. Las etapas se crean en ejecutar().
+class EjecucionAuditoria:
+    def __init__(self, opciones):
+        self.args = opciones
+        self.formatosReporte = opciones.formato_reporte.split(',') if opciones.formato_reporte else PERFILES[opciones.perfil].formatos
+        self.tiempos = None
+        self.controladorCarga = self.poolChrome = self.planificador = self.coordinadorMuestras = self.convertidorPDF = None
+        self.almacenReportes = self.almacenMetricas = self.cacheAuditorias = None
+        self.bitacora = self.estadoPrevio = self.pathArchivo = self.historial = self.ejecucion = self.sumidero = None
+        self.bloqueoResultados = threading.Lock()
+        # Con --canonizar: {url auditada: [URLs que llegan a la misma página]}
+        self.aliasUrls = {}
+        # {url: posición en urls.txt}: el Excel sigue el orden de entrada, no el de término
+        self.ordenUrls = {}
+        # Motor asyncio: trabajadores libres, límite y hilos de la validación y, con --canonizar,
+        # {clave canónica: (url que audita, futuro con sus puntuaciones y reportes)}
+        self.trabajadoresLibres = self.semValidacion = self.clienteValidacion = None
+        self.destinosAsync = {}
+        # Motor de hilos: pids de los Lighthouse en curso y aviso de Ctrl+C para no lanzar ni reintentar más
+        self.procesosEnCurso = set()
+        self.interrumpido = threading.Event()
+
+    # Banderas de Lighthouse que dependen del modo (Mobile - Desktop) y del --perfil; también forman parte de la clave del cache
+    def banderas_Lighthouse(self, mode):
+        if mode == 'desktop':
+            # Configuración para el modo Desktop
+            banderas = ['--preset=desktop', '--screenEmulation.disabled=true', '--formFactor=desktop', '--throttling-method=devtools']
+        else:
+            # Configuración explícita para el modo Mobile
+            banderas = [
+                '--formFactor=mobile',
+                '--screenEmulation.mobile',
+                '--throttling-method=devtools'
+            ]
+        return banderas + banderas_Perfil(self.args.perfil)
+
+    # --output-path de una URL en un modo (con sufijo _m<n> para cada muestra del modo muestreo)
+    def path_Reporte(self, url, mode, muestra=None):
+        nombreLimpio = re.sub(r'[^\w.-]', '_', url)
+        if muestra:
+            nombreLimpio += f'_m{muestra}'
+        if mode == 'mobile':
+            finalHTML = os.path.join('HTMLMobile', f'{mode}_{nombreLimpio}.html')
+        else:
+            finalHTML = os.path.join('HTMLDesktop', f'{mode}_{nombreLimpio}.html')
+        if self.formatosReporte == ['json']:
+            finalHTML = os.path.splitext(finalHTML)[0] + '.json'
+        return finalHTML
+
+    # Reporte principal que deja Lighthouse para un --output-path: el HTML si se pidió, si no el JSON
+    def reporte_Generado(self, finalHTML):
+        return path_Salida(finalHTML, 'html' if 'html' in self.formatosReporte else 'json', self.formatosReporte)
+
+    # Comando para ejecutar Lighthouse con la configuración necesaria
+    def comando_Lighthouse(self, url, mode, finalHTML, trabajador=None):
+        chrome_flags = CHROME_FLAGS
+        if trabajador:
+            # Perfil propio del trabajador para no compartir user-data-dir con auditorías concurrentes
+            chrome_flags += f' --user-data-dir={trabajador.perfil}'
+
+        command = [
+            PATH_NODE,
+            LIGHTHOUSE_PATH,
+            url,
+            *[f'--output={formato}' for formato in self.formatosReporte],
+            f'--output-path={finalHTML}',
+            f'--chrome-flags={chrome_flags}'
+        ]
+
+        if trabajador and self.poolChrome and self.poolChrome.propio(trabajador):
+            # Lighthouse se conecta al Chrome persistente del trabajador. Sin él no se pasa --port:
+            # chrome-launcher elige un puerto libre en vez de conectarse a cualquier Chrome que ya
+            # escuche en un puerto fijo (el navegador de depuración de alguien, otra herramienta)
+            command.append(f'--port={trabajador.puerto}')
+
+        command.extend(self.banderas_Lighthouse(mode))
+        return command
+
+    # Decide qué hacer después de un intento fallido: devuelve los segundos de espera antes de
+    # reintentar, o None si la auditoría se da por fallida
+    def espera_Intento(self, url, mode, resultado, intento, limite):
+        fallo = clasificar_Fallo(resultado)
+        if fallo == 'vencido':
+            print(f"Lighthouse superó el plazo de {self.args.plazo_auditoria} segundos en {url} ({mode})")
+            return None
+        print(f"Error al ejecutar Lighthouse desde {url} ({mode}), intento {intento} ({fallo}):\n{resultado.stderr}")
+        if fallo != 'transitorio' or intento > self.args.reintentos:
+            return None
+        espera = espera_Reintento(intento, self.args.espera_reintento)
+        if limite and time.time() + espera >= limite:
+            return None
+        print(f"Reintentando {url} ({mode}) en {espera:.1f} segundos")
+        return espera
+
+    def auditoria_Lighthouse(self, url, mode, trabajador=None, muestra=None):
+        finalHTML = self.path_Reporte(url, mode, muestra)
+        command = self.comando_Lighthouse(url, mode, finalHTML, trabajador)
+
+        # El plazo cubre todos los intentos: una URL colgada nunca cuesta más que --plazo-auditoria
+        limite = time.time() + self.args.plazo_auditoria if self.args.plazo_auditoria else None
+        intento = 0
+        while True:
+            if self.interrumpido.is_set():
+                return None
+            intento += 1
+            plazo = limite - time.time() if limite else None
+            try:
+                # Ejecuta la auditoría de Lighthouse midiendo el CPU y la memoria de Lighthouse y Chrome
+                with self.tiempos.tramo('auditoria', url=url, mode=mode) as tramo:
+                    resultado = ejecutar_Supervisado(command, plazo, self.procesosEnCurso)
+                    tramo.proceso(resultado.uso)
+                    tramo.datos.update(ok=resultado.codigo == 0, intento=intento, vencido=resultado.vencido)
+            except FileNotFoundError:
+                print(f"Lighthouse no se encontró en la ruta especificada. Asegúrate de que está instalado y accesible en {LIGHTHOUSE_PATH}.")
+                return None
+
+            # Chrome corre en su propio grupo: si Lighthouse murió o lo dejó abierto, se termina por su perfil.
+            # Cuando Lighthouse termina bien ya cerró su Chrome y no hace falta recorrer /proc.
+            # El Chrome persistente solo se termina si la auditoría se colgó (el pool lo relanza)
+            if trabajador and (resultado.vencido or (not self.poolChrome and resultado.codigo != 0)):
+                limpiar_Chrome(trabajador.perfil)
+
+            if resultado.codigo == 0 and not resultado.vencido:
+                break
+            if self.interrumpido.is_set():
+                return None
+            espera = self.espera_Intento(url, mode, resultado, intento, limite)
+            # Con Ctrl+C la espera del reintento se corta y la auditoría se da por interrumpida
+            if espera is None or self.interrumpido.wait(espera):
+                return None
+    
+        reporte = self.reporte_Generado(finalHTML)
+        print(f"Se genera informe {reporte}")
+        return reporte
+
+    # Función que guarda el reporte de un modo (almacén, métricas, PDF) y extrae sus puntuaciones
+    def procesar_Reporte(self, url, mode, reporte):
+        if reporte:
+            reporteJSON = path_Json(reporte) if os.path.exists(path_Json(reporte)) else None
+            pathPDF = path_PDF(reporte) if reporte.endswith('.html') else None
+            if self.almacenReportes:
+                # Los reportes pasan al almacén comprimido; desde aquí se trabaja con los blobs
+                if reporteJSON:
+                    reporteJSON = self.almacenReportes.guardar(url, mode, reporteJSON)
+                reporte = self.almacenReportes.guardar(url, mode, reporte) if pathPDF else reporteJSON
+
+            if self.almacenMetricas:
+                self.almacenMetricas.registrar(reporteJSON or reporte, url)
+
+            # Etapa PDF en paralelo: el reporte se convierte mientras siguen las demás auditorías
+            if self.convertidorPDF and pathPDF:
+                self.convertidorPDF.enviar(reporte, pathPDF)
+            with self.tiempos.tramo('extraccion', url=url, mode=mode):
+                puntuaciones = extraer_Puntuaciones(reporteJSON or reporte)
+            # El perfil queda con cada resultado (bitácora, cache, historial y Excel)
+            puntuaciones['perfil'] = self.args.perfil
+            return reporte, puntuaciones
+        return None, {'performance': None, 'accessibility': None, 'seo': None}
+
+    # Motivo por el que el host estuvo sobrecargado durante una auditoría (según el controlador de
+    # carga y el benchmarkIndex del reporte), o None
+    def sobrecarga_Auditoria(self, reporte, inicio):
+        if not self.controladorCarga or not reporte:
+            return None
+        benchmarkIndex = leer_Benchmark_Index(reporte)
+        motivo = self.controladorCarga.sobrecarga(inicio, time.time(), benchmarkIndex)
+        self.controladorCarga.registrar_Benchmark(benchmarkIndex)
+        return motivo
+
+    # Marca en las puntuaciones una auditoría que se hizo con el host sobrecargado
+    def marcar_Sobrecarga(self, url, mode, puntuaciones, motivo):
+        if motivo:
+            print(f"Resultado de {url} ({mode}) medido con el host sobrecargado: {motivo}")
+            puntuaciones['sobrecarga'] = motivo
+        return puntuaciones
+
+    # Función que ejecuta la auditoría de un modo y extrae sus puntuaciones (trabajo del planificador).
+    # Con --concurrencia-adaptativa, una auditoría hecha con el host sobrecargado se repite cuando
+    # el host se recupera (--reintentos-carga) y, si vuelve a pasar, el resultado queda marcado
+    def auditar_Modo(self, url, mode, trabajador=None, muestra=None):
+        intento = 0
+        while True:
+            inicio = time.time()
+            reporte = self.auditoria_Lighthouse(url, mode, trabajador, muestra)
+            motivo = self.sobrecarga_Auditoria(reporte, inicio)
+            if motivo is None or intento >= self.args.reintentos_carga:
+                break
+            intento += 1
+            print(f"Host sobrecargado durante {url} ({mode}) ({motivo}), se repite la auditoría")
+            self.controladorCarga.esperar_Holgura()
+        reporte, puntuaciones = self.procesar_Reporte(url, mode, reporte)
+        return reporte, self.marcar_Sobrecarga(url, mode, puntuaciones, motivo)
+
+    # Banderas que identifican la configuración de la auditoría en el cache
+    def banderas_Cache(self, mode):
+        return [CHROME_FLAGS] + self.banderas_Lighthouse(mode)
+
+    # Encola la auditoría de un modo; en modo muestreo, un coordinador lanza las muestras en el
+    # planificador y devuelve la mediana
+    def enviar_Auditoria(self, url, mode):
+        if self.args.muestras_max > 1:
+            enviarMuestra = lambda muestra: self.planificador.enviar(url, mode, muestra)
+            return self.coordinadorMuestras.submit(muestrear, enviarMuestra, self.args.muestras_min, self.args.muestras_max, self.args.umbral_desviacion)
+        return self.planificador.enviar(url, mode)
+
+    # Función que ejecuta Lighthouse para una URL ya validada.
+    # Si la página no cambió desde una auditoría en cache, reutiliza sus puntuaciones sin lanzar Lighthouse;
+    # los modos ya completados en una ejecución anterior (--resume) llegan en previas y no se repiten.
+    def urls_Lighthouse(self, url, codigo, descripcionCodigo, firma=None, previas=None):
+        inicio = time.time()
+
+        # Ejecutar Lighthouse (Mobile - Desktop) como trabajos independientes del planificador
+        print(f"Ejecutando auditoria Lighthouse ...")
+        puntuaciones = {}
+        reportes = {}
+        futuros = {}
+        for mode in ['mobile', 'desktop']:
+            if previas and mode in previas:
+                puntuaciones[mode] = previas[mode]
+                continue
+            enCache = None
+            if self.cacheAuditorias and not self.args.refrescar_cache:
+                enCache = self.cacheAuditorias.obtener(url, mode, self.banderas_Cache(mode), firma)
+            if enCache:
+                puntuaciones[mode] = enCache[0]
+                reportes[mode] = enCache[1]
+                self.bitacora.registrar_Auditoria(url, mode, enCache[1], enCache[0])
+                print(f"Puntuaciones en cache para {url} ({mode}): {enCache[1]}")
+            else:
+                futuros[mode] = self.enviar_Auditoria(url, mode)
+
+        for mode, futuro in futuros.items():
+            reporte, puntuaciones[mode] = futuro.result()
+            # Una auditoría cortada por Ctrl+C no es un fallo de la URL: no se registra y --resume la repite
+            if reporte is None and self.interrumpido.is_set():
+                raise InterruptedError(f"auditoría de {url} ({mode}) interrumpida")
+            reportes[mode] = reporte
+            self.bitacora.registrar_Auditoria(url, mode, reporte, puntuaciones[mode])
+            if self.cacheAuditorias and reporte and not puntuaciones[mode].get('sobrecarga'):
+                self.cacheAuditorias.guardar(url, mode, self.banderas_Cache(mode), firma, puntuaciones[mode], reporte)
+        puntuacionesMOBILE = puntuaciones['mobile']
+        puntuacionesDESKTOP = puntuaciones['desktop']
+
+        # Actualizar el archivo Excel después de completar ambas auditorías
+        self.registrar_Resultado(url, puntuacionesMOBILE, puntuacionesDESKTOP, codigo, descripcionCodigo)
+        self.registrar_Alias(url, self.aliasUrls.get(url, []), puntuaciones, reportes, codigo)
+    
+        termino = time.time()
+        totalTest = round(termino - inicio, 2)
+    
+        return {
+            'url': url,
+            'totalTest': totalTest
+        }
+
+    # Función para registrar los resultados de una URL en el historial y en el Excel
+    # (en memoria o directo al archivo según --excel-por-url)
+    def registrar_Resultado(self, url, puntuacionesMOBILE, puntuacionesDESKTOP, codigo, descripcionCodigo):
+        # Las URLs terminan en paralelo: un solo hilo escribe resultados a la vez
+        with self.bloqueoResultados, self.tiempos.tramo('escritura', url=url):
+            if self.historial:
+                self.historial.registrar(self.ejecucion, url, puntuacionesMOBILE, puntuacionesDESKTOP, codigo, descripcionCodigo)
+            if self.args.sin_excel:
+                return
+            if self.sumidero is None:
+                self.actualizar_Excel(url, puntuacionesMOBILE, puntuacionesDESKTOP, codigo, descripcionCodigo)
+            else:
+                self.sumidero.registrar(url, puntuacionesMOBILE, puntuacionesDESKTOP, codigo, descripcionCodigo)
+
+    # Con --canonizar, las URLs que llegan a la misma página que url reciben su resultado sin auditarse.
+    # Se registran también en la bitácora (con el reporte de url) para que --resume no las repita.
+    def registrar_Alias(self, url, alias, puntuaciones, reportes, codigo):
+        descripcion = f"OK - misma página que {url}"
+        for otra in alias:
+            self.bitacora.registrar_Validacion(otra, codigo, descripcion)
+            for mode in ['mobile', 'desktop']:
+                self.bitacora.registrar_Auditoria(otra, mode, reportes.get(mode), puntuaciones[mode])
+            self.registrar_Resultado(otra, puntuaciones['mobile'], puntuaciones['desktop'], codigo, descripcion)
+
+    # Función para crear y actualizar el archivo Excel con los resultados (abre y guarda el archivo por cada URL)
+    def actualizar_Excel(self, url, puntuacionesMOBILE, puntuacionesDESKTOP, codigo, descripcionCodigo):
+        fecha_hora_actual = datetime.now().strftime('%Y%m%d_%H%M%S')
+    
+        # Nombre del archivo con la fecha y hora de ejecución (solo se crea una vez)
+        if not self.pathArchivo:
+            self.pathArchivo = f'resultados_{fecha_hora_actual}.xlsx'
+    
+        try:
+            cargarExcel = load_workbook(self.pathArchivo)
+            hoja = cargarExcel.active
+        except FileNotFoundError:
+            cargarExcel = Workbook()
+            hoja = cargarExcel.active
+            hoja.append(ENCABEZADOS)
+
+        actualizado = False
+        # Primera fila de una URL que va después de esta en urls.txt: la fila nueva se inserta ahí
+        siguiente = None
+        posicion = self.ordenUrls.get(url)
+        for row in hoja.iter_rows(min_row=2, values_only=False):
+            otra = self.ordenUrls.get(row[0].value)
+            if siguiente is None and posicion is not None and otra is not None and otra > posicion:
+                siguiente = row[0].row
+            if row[0].value == url:
+                row[1].value = puntuacionesMOBILE['performance']
+                row[2].value = puntuacionesDESKTOP['performance']
+                row[3].value = puntuacionesMOBILE['accessibility']
+                row[4].value = puntuacionesDESKTOP['accessibility']
+                row[5].value = puntuacionesMOBILE['seo']
+                row[6].value = puntuacionesDESKTOP['seo']
+                row[7].value = codigo
+                row[8].value = descripcionCodigo
+                actualizado = True
+                break
+
+        if not actualizado:
+            fila = fila_Resultado(url, puntuacionesMOBILE, puntuacionesDESKTOP, codigo, descripcionCodigo)
+            if siguiente is None:
+                hoja.append(fila)
+            else:
+                hoja.insert_rows(siguiente)
+                for columna, valor in enumerate(fila, start=1):
+                    hoja.cell(row=siguiente, column=columna, value=valor)
+
+        # Ajustar el ancho de las columnas
+        for col in hoja.columns:
+            largo = 0
+            columna = col[0].column_letter
+            for cell in col:
+                try:
+                    if len(str(cell.value)) > largo:
+                        largo = len(cell.value)
+                except:
+                    pass
+            ancho = (largo + 2)
+            hoja.column_dimensions[columna].width = ancho
+
+        cargarExcel.save(self.pathArchivo)
+
+    # Modo coordinador de --cola: los trabajos (url, mode) que faltan van a la cola y los resultados de
+    # todos los trabajadores se reúnen aquí en la bitácora, el historial y el Excel
+    def coordinar_Cola(self, cola, urlsValidas, validaciones, previas):
+        puntuaciones = {url: dict(previas.get(url) or {}) for url in urlsValidas}
+        reportes = {url: {} for url in urlsValidas}
+        trabajos = []
+        for url in urlsValidas:
+            for mode in ['mobile', 'desktop']:
+                if mode in puntuaciones[url]:
+                    continue
+                enCache = None
+                if self.cacheAuditorias and not self.args.refrescar_cache:
+                    enCache = self.cacheAuditorias.obtener(url, mode, self.banderas_Cache(mode), validaciones[url][2])
+                if enCache:
+                    puntuaciones[url][mode] = enCache[0]
+                    reportes[url][mode] = enCache[1]
+                    self.bitacora.registrar_Auditoria(url, mode, enCache[1], enCache[0])
+                else:
+                    trabajos.append((url, mode))
+
+        cola.agregar(trabajos)
+        cola.cerrar_Envio()
+        print(f"{len(trabajos)} trabajos en la cola {self.args.cola}, esperando a los trabajadores ...")
+
+        for url in urlsValidas:
+            if len(puntuaciones[url]) == 2:
+                self.registrar_Resultado(url, puntuaciones[url]['mobile'], puntuaciones[url]['desktop'], *validaciones[url][:2])
+                self.registrar_Alias(url, self.aliasUrls.get(url, []), puntuaciones[url], reportes[url], validaciones[url][0])
+
+        pendientes = {id_Trabajo(url, mode) for url, mode in trabajos}
+        ultimoAviso = time.time()
+        while pendientes:
+            vencidos = cola.reencolar_Vencidos()
+            if vencidos:
+                print(f"{vencidos} trabajos con el lease vencido volvieron a la cola")
+            for resultado in cola.resultados_Nuevos():
+                if resultado.id not in pendientes:
+                    continue
+                pendientes.discard(resultado.id)
+                url, mode = resultado.url, resultado.mode
+                print(f"Resultado de {url} ({mode}) desde {resultado.trabajador}: {resultado.reporte}")
+                self.bitacora.registrar_Auditoria(url, mode, resultado.reporte, resultado.puntuaciones)
+                if self.cacheAuditorias and resultado.reporte and not resultado.puntuaciones.get('sobrecarga'):
+                    self.cacheAuditorias.guardar(url, mode, self.banderas_Cache(mode), validaciones[url][2], resultado.puntuaciones, resultado.reporte)
+                puntuaciones[url][mode] = resultado.puntuaciones
+                reportes[url][mode] = resultado.reporte
+                if len(puntuaciones[url]) == 2:
+                    self.registrar_Resultado(url, puntuaciones[url]['mobile'], puntuaciones[url]['desktop'], *validaciones[url][:2])
+                    self.registrar_Alias(url, self.aliasUrls.get(url, []), puntuaciones[url], reportes[url], validaciones[url][0])
+            if pendientes:
+                if time.time() - ultimoAviso > 60:
+                    estado = cola.estado()
+                    print(f"Cola: {estado['pendiente']} pendientes, {estado['en_curso']} en curso, {len(pendientes)} resultados por recibir")
+                    ultimoAviso = time.time()
+                time.sleep(2)
+
+    # Modo trabajador de --cola: toma trabajos mientras tenga trabajadores libres, renueva sus leases
+    # con latidos mientras audita y devuelve puntuaciones y reportes. Termina cuando el coordinador
+    # cerró el envío y no quedan trabajos pendientes ni en curso.
+    def trabajar_Cola(self, cola, idTrabajador):
+        enCurso = {}
+        bloqueoCurso = threading.Lock()
+        parar = threading.Event()
+
+        def latir():
+            while not parar.wait(self.args.lease / 3):
+                with bloqueoCurso:
+                    trabajos = list(enCurso.values())
+                for trabajo in trabajos:
+                    if not cola.latido(trabajo.id, idTrabajador, self.args.lease):
+                        print(f"Se perdió el lease de {trabajo.url} ({trabajo.mode}); otro trabajador puede repetirlo")
+        threading.Thread(target=latir, daemon=True, name='latidos').start()
+
+        completados = 0
+        while True:
+            while len(enCurso) < self.args.trabajadores:
+                trabajo = cola.tomar(idTrabajador, self.args.lease)
+                if trabajo is None:
+                    break
+                with bloqueoCurso:
+                    enCurso[self.enviar_Auditoria(trabajo.url, trabajo.mode)] = trabajo
+            if not enCurso:
+                if cola.terminada():
+                    break
+                time.sleep(2)
+                continue
+
+            hechos, _ = wait(list(enCurso), timeout=2, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                with bloqueoCurso:
+                    trabajo = enCurso.pop(futuro)
+                try:
+                    reporte, puntuaciones = futuro.result()
+                except Exception as e:
+                    print(f"Error de procesamiento en {trabajo.url} ({trabajo.mode}): {e}")
+                    reporte, puntuaciones = None, {'performance': None, 'accessibility': None, 'seo': None}
+                cola.completar(trabajo.id, idTrabajador, os.path.abspath(reporte) if reporte else None, puntuaciones)
+                completados += 1
+        parar.set()
+        print(f"Cola terminada: {completados} trabajos auditados por {idTrabajador}")
+
+    # Motor asyncio (--motor asyncio): validación, procesos de Lighthouse y escrituras como tareas de un
+    # solo bucle de eventos. La validación se limita con su propio semáforo (red) y las auditorías con
+    # la cola de trabajadores libres (CPU); lo que bloquea (extracción, Excel, SQLite) va a hilos.
+    async def auditoria_Lighthouse_Async(self, url, mode, trabajador, muestra=None):
+        finalHTML = self.path_Reporte(url, mode, muestra)
+        command = self.comando_Lighthouse(url, mode, finalHTML, trabajador)
+
+        limite = time.time() + self.args.plazo_auditoria if self.args.plazo_auditoria else None
+        intento = 0
+        while True:
+            intento += 1
+            plazo = limite - time.time() if limite else None
+            try:
+                with self.tiempos.tramo('auditoria', url=url, mode=mode) as tramo:
+                    resultado = await ejecutar_Supervisado_Async(command, plazo)
+                    tramo.proceso(resultado.uso)
+                    tramo.datos.update(ok=resultado.codigo == 0, intento=intento, vencido=resultado.vencido)
+            except FileNotFoundError:
+                print(f"Lighthouse no se encontró en la ruta especificada. Asegúrate de que está instalado y accesible en {LIGHTHOUSE_PATH}.")
+                return None
+            except asyncio.CancelledError:
+                # Lighthouse ya se terminó; su Chrome corre en otro grupo
+                limpiar_Chrome(trabajador.perfil)
+                raise
+
+            if resultado.vencido or (not self.poolChrome and resultado.codigo != 0):
+                await asyncio.to_thread(limpiar_Chrome, trabajador.perfil)
+
+            if resultado.codigo == 0 and not resultado.vencido:
+                break
+            espera = self.espera_Intento(url, mode, resultado, intento, limite)
+            if espera is None:
+                return None
+            await asyncio.sleep(espera)
+
+        reporte = self.reporte_Generado(finalHTML)
+        print(f"Se genera informe {reporte}")
+        return reporte
+
+    async def auditar_Modo_Async(self, url, mode, muestra=None):
+        if self.controladorCarga:
+            while not self.controladorCarga.intentar_Adquirir():
+                await asyncio.sleep(0.5)
+        trabajador = await self.trabajadoresLibres.get()
+        try:
+            if self.poolChrome:
+                try:
+                    await asyncio.to_thread(self.poolChrome.preparar, trabajador)
+                except RuntimeError as e:
+                    print(f"Error al preparar Chrome del trabajador {trabajador.id}: {e}")
+            intento = 0
+            while True:
+                inicio = time.time()
+                reporte = await self.auditoria_Lighthouse_Async(url, mode, trabajador, muestra)
+                motivo = await asyncio.to_thread(self.sobrecarga_Auditoria, reporte, inicio)
+                if motivo is None or intento >= self.args.reintentos_carga:
+                    break
+                intento += 1
+                print(f"Host sobrecargado durante {url} ({mode}) ({motivo}), se repite la auditoría")
+                await asyncio.to_thread(self.controladorCarga.esperar_Holgura)
+        finally:
+            if self.poolChrome:
+                self.poolChrome.liberar(trabajador)
+            self.trabajadoresLibres.put_nowait(trabajador)
+            if self.controladorCarga:
+                self.controladorCarga.liberar()
+        # El trabajador ya quedó libre para otra auditoría mientras se procesa el reporte
+        reporte, puntuaciones = await asyncio.to_thread(self.procesar_Reporte, url, mode, reporte)
+        return reporte, self.marcar_Sobrecarga(url, mode, puntuaciones, motivo)
+
+    # Versión asyncio de urls_Lighthouse que además valida la URL. Con --canonizar, la primera URL
+    # validada de cada destino lo audita y las demás esperan su resultado en destinosAsync.
+    async def urls_Lighthouse_Async(self, url, previas=None):
+        async with self.semValidacion:
+            with self.tiempos.tramo('validacion', url=url) as tramo:
+                codigo, descripcionCodigo, firma, urlFinal = await validar_Url_Async(url, self.args.cache, self.clienteValidacion)
+                tramo.datos['codigo'] = codigo
+        self.bitacora.registrar_Validacion(url, codigo, descripcionCodigo)
+        if codigo is None or codigo != 200:
+            await asyncio.to_thread(self.registrar_Resultado, url, {'performance': None, 'accessibility': None, 'seo': None}, {'performance': None, 'accessibility': None, 'seo': None}, "Error", descripcionCodigo)
+            return None
+
+        destino = None
+        if self.args.canonizar:
+            clave = canonizar(urlFinal or url, self.args.reglas_canonicas)
+            if clave in self.destinosAsync:
+                representante, auditado = self.destinosAsync[clave]
+                resultado = await auditado
+                # Si la auditoría del representante falló, esta URL se audita por su cuenta
+                if resultado is not None:
+                    await asyncio.to_thread(self.registrar_Alias, representante, [url], *resultado, codigo)
+                    return 0
+            else:
+                destino = asyncio.get_running_loop().create_future()
+                self.destinosAsync[clave] = (url, destino)
+
+        try:
+            return await self.auditar_Url_Async(url, codigo, descripcionCodigo, firma, previas, destino)
+        finally:
+            if destino is not None and not destino.done():
+                destino.set_result(None)
+
+    async def auditar_Url_Async(self, url, codigo, descripcionCodigo, firma, previas, destino):
+        inicio = time.time()
+        puntuaciones = {}
+        reportes = {}
+        auditorias = {}
+        for mode in ['mobile', 'desktop']:
+            if previas and mode in previas:
+                puntuaciones[mode] = previas[mode]
+                continue
+            enCache = None
+            if self.cacheAuditorias and not self.args.refrescar_cache:
+                enCache = self.cacheAuditorias.obtener(url, mode, self.banderas_Cache(mode), firma)
+            if enCache:
+                puntuaciones[mode] = enCache[0]
+                reportes[mode] = enCache[1]
+                self.bitacora.registrar_Auditoria(url, mode, enCache[1], enCache[0])
+                print(f"Puntuaciones en cache para {url} ({mode}): {enCache[1]}")
+            elif self.args.muestras_max > 1:
+                enviarMuestra = lambda muestra, mode=mode: self.auditar_Modo_Async(url, mode, muestra)
+                auditorias[mode] = muestrear_Async(enviarMuestra, self.args.muestras_min, self.args.muestras_max, self.args.umbral_desviacion)
+            else:
+                auditorias[mode] = self.auditar_Modo_Async(url, mode)
+
+        resultados = dict(zip(auditorias, await asyncio.gather(*auditorias.values())))
+
+        def guardar():
+            for mode, (reporte, puntuacionesModo) in resultados.items():
+                puntuaciones[mode] = puntuacionesModo
+                reportes[mode] = reporte
+                self.bitacora.registrar_Auditoria(url, mode, reporte, puntuacionesModo)
+                if self.cacheAuditorias and reporte and not puntuacionesModo.get('sobrecarga'):
+                    self.cacheAuditorias.guardar(url, mode, self.banderas_Cache(mode), firma, puntuacionesModo, reporte)
+            self.registrar_Resultado(url, puntuaciones['mobile'], puntuaciones['desktop'], codigo, descripcionCodigo)
+        await asyncio.to_thread(guardar)
+        if destino is not None:
+            destino.set_result((puntuaciones, reportes))
+        return round(time.time() - inicio, 2)
+
+    async def ejecutar_Motor_Async(self, urlsPendientes, previas):
+        self.trabajadoresLibres = asyncio.Queue()
+        for trabajador in self.planificador.trabajadores:
+            self.trabajadoresLibres.put_nowait(trabajador)
+        self.semValidacion = asyncio.Semaphore(self.args.concurrencia_validacion)
+        # Las validaciones corren en el mismo bucle con conexiones keep-alive compartidas, sin hilos
+        self.clienteValidacion = ClienteValidacion()
+        # SIGTERM cancela todo como Ctrl+C: los Lighthouse en curso se terminan y la bitácora queda para --resume
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+
+        tareas = [self.urls_Lighthouse_Async(url, previas.get(url)) for url in urlsPendientes]
+        try:
+            for url, resultado in zip(urlsPendientes, await asyncio.gather(*tareas, return_exceptions=True)):
+                if isinstance(resultado, Exception):
+                    print(f"Error de procesamiento en {url}: {resultado}")
+                elif resultado:
+                    print(f"Duración total de la auditoría para {url}: {resultado} segundos")
+        finally:
+            self.clienteValidacion.cerrar()
+
+    # Motor de hilos (--motor hilos): valida todas las URLs y después las audita con el planificador
+    # (o las reparte en la cola con --cola)
+    def ejecutar_Motor_Hilos(self, urlsPendientes, previas):
+        colaTrabajos = None
+        if self.args.cola:
+            # La cola se prepara antes de validar: un trabajador que arranca durante la validación no
+            # debe ver el envío cerrado de la ejecución anterior y terminar sin trabajos. Al retomar,
+            # la cola conserva lo que los trabajadores ya terminaron.
+            colaTrabajos = abrir_Cola(self.args.cola)
+            if self.estadoPrevio:
+                colaTrabajos.abrir_Envio()
+            else:
+                colaTrabajos.reiniciar()
+
+        # Validar todas las URLs antes de auditar; solo las válidas pasan a los trabajadores
+        validaciones = validar_Urls(urlsPendientes, self.args.concurrencia_validacion, firmar=self.args.cache, tiempos=self.tiempos)
+        urlsValidas = []
+        for url, (codigo, descripcionCodigo, firma, urlFinal) in validaciones.items():
+            self.bitacora.registrar_Validacion(url, codigo, descripcionCodigo)
+            if codigo is None or codigo != 200:
+                # Si la URL no es válida, registrar el error en el Excel
+                self.registrar_Resultado(url, {'performance': None, 'accessibility': None, 'seo': None}, {'performance': None, 'accessibility': None, 'seo': None}, "Error", descripcionCodigo)
+            else:
+                urlsValidas.append(url)
+
+        # Las URLs que llegan a la misma página se auditan una sola vez
+        if self.args.canonizar:
+            urlsValidas, self.aliasUrls = agrupar_Alias(urlsValidas, {url: validaciones[url][3] for url in urlsValidas}, self.args.reglas_canonicas)
+            repetidas = sum(len(alias) for alias in self.aliasUrls.values())
+            if repetidas:
+                print(f"{repetidas} URLs llegan a la misma página que otra: {2 * repetidas} auditorías menos")
+
+        if colaTrabajos:
+            # Coordinador: las auditorías las hacen los trabajadores de la cola
+            self.coordinar_Cola(colaTrabajos, urlsValidas, validaciones, previas)
+            colaTrabajos.cerrar()
+        else:
+            # Las URLs en curso solo esperan a sus dos trabajos; se mantienen tantas como trabajadores para no dejarlos ociosos
+            ejec = ThreadPoolExecutor(max_workers=self.args.trabajadores)
+            future_to_url = {ejec.submit(self.urls_Lighthouse, url, *validaciones[url][:3], previas.get(url)): url for url in urlsValidas}
+            try:
+                for future in as_completed(future_to_url):
+                    url = future_to_url[future]
+                    try:
+                        result = future.result()
+                        if result['totalTest'] is not None:
+                            print(f"Duración total de la auditoría para {url}: {result['totalTest']} segundos")
+                    except Exception as e:
+                        print(f"Error de procesamiento en {url}: {e}")
+            except KeyboardInterrupt:
+                # Las URLs que no empezaron se descartan; las que están en curso terminan cuando
+                # interrumpir() corta sus auditorías
+                ejec.shutdown(wait=False, cancel_futures=True)
+                raise
+            ejec.shutdown()
+
+    # Ctrl+C en el motor de hilos: descarta los trabajos que no empezaron y termina los Lighthouse en
+    # curso. Después ejecutar() cierra las etapas y guarda lo terminado (Excel, historial, bitácora)
+    def interrumpir(self):
+        self.interrumpido.set()
+        if self.coordinadorMuestras:
+            self.coordinadorMuestras.shutdown(wait=False, cancel_futures=True)
+        self.planificador.cancelar()
+        terminar_Procesos(self.procesosEnCurso)
+
+    # Cierra las etapas que comparten el modo normal y el trabajador de la cola
+    def cerrar_Etapas(self):
+        if self.coordinadorMuestras:
+            self.coordinadorMuestras.shutdown()
+        self.planificador.cerrar()
+        if self.controladorCarga:
+            self.controladorCarga.cerrar()
+        if self.convertidorPDF:
+            print("Esperando la conversión de los reportes a PDF ...")
+            self.convertidorPDF.cerrar()
+        if self.almacenReportes:
+            self.almacenReportes.cerrar()
+        if self.almacenMetricas:
+            self.almacenMetricas.cerrar()
+
+    # Ejecuta las auditorías con las opciones de la ejecución
+    def ejecutar(self):
+        # Crear carpetas si no existen y asegurarse de que tienen los permisos adecuados
+        crear_carpetas()
+
+        # Tiempos por etapa; solo se escriben a disco con --tiempos/--prometheus
+        self.tiempos = Instrumentacion(self.args.tiempos, self.args.prometheus)
+
+        # Chrome que quedaron vivos de ejecuciones anteriores interrumpidas compiten por CPU con las auditorías
+        limpiar_Chrome_Huerfanos()
+
+        # Con --concurrencia-adaptativa, --trabajadores es el máximo y el controlador ajusta cuántos auditan a la vez
+        self.controladorCarga = None
+        if self.args.concurrencia_adaptativa:
+            self.controladorCarga = ControladorConcurrencia(self.args.trabajadores_min, self.args.trabajadores, self.args.cpu_objetivo / 100, self.args.memoria_min, self.args.factor_benchmark)
+
+        # Cada trabajo (url, mode) corre en un trabajador con su propio puerto y perfil de Chrome
+        self.poolChrome = PoolChrome(CHROME_FLAGS, self.args.auditorias_por_chrome, self.args.memoria_max_chrome) if self.args.chrome_persistente else None
+        self.planificador = PlanificadorAuditorias(self.auditar_Modo, self.args.trabajadores, self.args.puerto_base, self.poolChrome, self.controladorCarga)
+        # Los coordinadores del muestreo solo esperan a sus muestras: dos por URL en curso
+        self.coordinadorMuestras = ThreadPoolExecutor(max_workers=2 * self.args.trabajadores, thread_name_prefix='muestreo') if self.args.muestras_max > 1 else None
+        # No dejar Chrome huérfanos si el proceso termina con una excepción
+        if self.poolChrome:
+            atexit.register(self.poolChrome.cerrar)
+
+        # Selenium solo se importa si se pide la etapa PDF
+        if self.args.pdf:
+            from pdf import ConvertidorPDF
+            self.convertidorPDF = ConvertidorPDF(self.args.trabajadores_pdf)
+        else:
+            self.convertidorPDF = None
+
+        self.almacenReportes = AlmacenReportes('reportes', self.args.compresion) if self.args.almacen_reportes else None
+        self.almacenMetricas = AlmacenMetricas('metricas.sqlite') if self.args.metricas else None
+
+        # Un trabajador de la cola solo audita lo que le entregan: no lee urls.txt ni escribe bitácora, historial ni Excel
+        if self.args.cola and self.args.rol == 'trabajador':
+            colaTrabajos = abrir_Cola(self.args.cola)
+            print(f"Trabajador {self.args.id_trabajador} esperando trabajos de {self.args.cola}")
+            try:
+                self.trabajar_Cola(colaTrabajos, self.args.id_trabajador)
+            except KeyboardInterrupt:
+                # Los trabajos tomados vuelven a la cola cuando vencen sus leases
+                self.interrumpir()
+            colaTrabajos.cerrar()
+            self.cerrar_Etapas()
+            self.tiempos.cerrar()
+            return
+
+        # Leer las URLs desde un archivo de texto, o descubrirlas desde el sitemap del sitio
+        if self.args.descubrir:
+            from descubrimiento import descubrir_Urls
+            # La validación de abajo ya detecta las páginas de error, no hace falta visitarlas dos veces
+            urls = descubrir_Urls(self.args.descubrir, sitemaps=self.args.sitemap, rastrear=self.args.rastrear, verificar=False, maxPaginas=self.args.max_paginas)
+            print(f"{len(urls)} URLs descubiertas en {self.args.descubrir}")
+        else:
+            with open('urls.txt', 'r') as archivo:
+                urls = archivo.read().splitlines()
+        self.ordenUrls = {url: posicion for posicion, url in enumerate(dict.fromkeys(urls))}
+
+        # Bitácora de trabajos completados; con --resume se retoma la ejecución anterior y su Excel
+        self.bitacora = Bitacora('bitacora.jsonl')
+        self.estadoPrevio = self.bitacora.retomar() if self.args.resume else None
+        if self.args.resume and self.estadoPrevio is None:
+            print("No hay bitácora para retomar, se inicia una ejecución nueva")
+
+        # Variable global para almacenar la ruta del archivo Excel
+        if self.estadoPrevio and self.estadoPrevio['excel']:
+            self.pathArchivo = self.estadoPrevio['excel']
+        else:
+            self.pathArchivo = f"resultados_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+
+        # Historial de resultados; al retomar se sigue escribiendo en la misma ejecución
+        self.historial = None if self.args.sin_historial else HistorialResultados('historial.sqlite')
+        self.ejecucion = self.estadoPrevio['ejecucion'] if self.estadoPrevio else None
+        if self.historial and self.ejecucion is None:
+            self.ejecucion = self.historial.iniciar_Ejecucion(None if self.args.sin_excel else self.pathArchivo)
+        if self.estadoPrevio is None:
+            self.bitacora.iniciar(self.pathArchivo, self.ejecucion)
+
+        # Resultados en memoria; se escriben al Excel en bloque al terminar (o cada --flush-cada resultados)
+        if self.args.excel_por_url:
+            self.sumidero = None
+        else:
+            self.sumidero = ResultadosExcel(self.pathArchivo, self.args.flush_cada, self.args.muestras_max > 1, self.controladorCarga is not None, self.args.perfil != PERFIL_POR_DEFECTO, self.ordenUrls)
+
+        self.cacheAuditorias = CacheAuditorias('cache_auditorias.sqlite', self.args.cache_ttl, self.args.cache_max, version_Lighthouse()) if self.args.cache else None
+
+        # Reconstruir desde la bitácora las URLs ya terminadas; solo el resto se valida y audita
+        previas = {}
+        urlsPendientes = []
+        for url in dict.fromkeys(urls):
+            if self.estadoPrevio and url in self.estadoPrevio['validaciones']:
+                codigo, descripcionCodigo = self.estadoPrevio['validaciones'][url]
+                previas[url] = {mode: self.estadoPrevio['auditorias'][(url, mode)] for mode in ['mobile', 'desktop'] if (url, mode) in self.estadoPrevio['auditorias']}
+                if codigo is None or codigo != 200:
+                    self.registrar_Resultado(url, {'performance': None, 'accessibility': None, 'seo': None}, {'performance': None, 'accessibility': None, 'seo': None}, "Error", descripcionCodigo)
+                    continue
+                if len(previas[url]) == 2:
+                    self.registrar_Resultado(url, previas[url]['mobile'], previas[url]['desktop'], codigo, descripcionCodigo)
+                    continue
+            urlsPendientes.append(url)
+        if self.estadoPrevio:
+            print(f"Retomando {self.pathArchivo}: {len(dict.fromkeys(urls)) - len(urlsPendientes)} URLs completas, {len(urlsPendientes)} pendientes")
+
+        if self.args.motor == 'asyncio':
+            # Cada URL se valida y audita apenas hay lugar, sin esperar a que termine la validación de todas
+            try:
+                asyncio.run(self.ejecutar_Motor_Async(urlsPendientes, previas))
+            except (KeyboardInterrupt, asyncio.CancelledError):
+                print("Ejecución interrumpida; lo que falta se puede auditar con --resume")
+        else:
+            try:
+                self.ejecutar_Motor_Hilos(urlsPendientes, previas)
+            except KeyboardInterrupt:
+                self.interrumpir()
+                print("Ejecución interrumpida; lo que falta se puede auditar con --resume")
+
+        self.cerrar_Etapas()
+        if self.cacheAuditorias:
+            self.cacheAuditorias.cerrar()
+        self.bitacora.cerrar()
+
+        if self.historial:
+            self.historial.cerrar()
+            print(f"Resultados agregados a historial.sqlite (ejecución {self.ejecucion})")
+
+        if self.sumidero is not None and not self.args.sin_excel:
+            with self.tiempos.tramo('escritura_excel'):
+                self.sumidero.cerrar()
+            print(f"Resultados guardados en {self.pathArchivo}")
+
+        self.tiempos.cerrar()
+        if self.args.tiempos or self.args.prometheus:
+            self.tiempos.imprimir_Resumen()
+
+# Ejecuta las auditorías (subcomando auditar de lighthouse.py) con las opciones ya leídas
+def ejecutar(opciones):
+    EjecucionAuditoria(opciones).ejecutar()
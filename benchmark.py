@@ -0,0 +1,247 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from estadistica import percentil
+
+# Benchmark del lado Python de lighthouse.py (validación, extracción de puntuaciones, Excel y
+# planificación) sin navegador: las auditorías las hace lighthouse_falso.py y el sitio es un
+# servidor HTTP local. Cada escenario corre lighthouse.py completo en una carpeta temporal.
+#   python benchmark.py --escenarios 10,1000 -- --trabajadores 4 --metricas
+# Los argumentos después de "--" se pasan tal cual a lighthouse.py. Con --perfiles cada escenario
+# se repite con cada perfil de auditoría para comparar su costo:
+#   python benchmark.py --escenarios 200 --perfiles completo,estandar,triage -- --trabajadores 4
+# Con el Lighthouse falso esa comparación es sintética: la demora de cada perfil sale de COSTOS en
+# lighthouse_falso.py, no de una medición. Para medir el ahorro real se pasa --lighthouse con el
+# cli/index.js de un Lighthouse instalado (con Chrome); el sitio local sigue siendo el mismo.
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+PAGINA = '<!doctype html><html><head><meta charset="utf-8"><title>Página {0} | Entel</title></head><body>{1}</body></html>'
+PAGINA_ERROR = '<!doctype html><html><head><meta charset="utf-8"><title>Página de Error | Entel</title></head><body></body></html>'
+
+# Sitio falso: /pagina/<n> responde 200; cada 50 URLs una da 404 y otra la página de error de Entel
+class _Sitio(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith('/no-existe/'):
+            self.send_error(404)
+            return
+        cuerpo = (PAGINA_ERROR if self.path.startswith('/error/') else PAGINA.format(self.path, 'x' * 30000)).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+def iniciar_Sitio():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Sitio)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+def urls_Escenario(puerto, cantidad):
+    urls = []
+    for i in range(cantidad):
+        if i % 50 == 25:
+            urls.append(f'http://127.0.0.1:{puerto}/no-existe/{i}')
+        elif i % 50 == 49:
+            urls.append(f'http://127.0.0.1:{puerto}/error/{i}')
+        else:
+            urls.append(f'http://127.0.0.1:{puerto}/pagina/{i}')
+    return urls
+
+def _resumen(valores):
+    valores = sorted(valores)
+    if not valores:
+        return None
+    return {'n': len(valores), 'p50': round(percentil(valores, 50), 4), 'p95': round(percentil(valores, 95), 4), 'max': round(valores[-1], 4)}
+
+# Etapas de lighthouse.py que se miden con sus tramos de --tiempos
+ETAPAS = ['validacion', 'auditoria', 'extraccion', 'escritura', 'escritura_excel']
+
+# Tamaño de los reportes que dejó una ejecución (HTMLMobile, HTMLDesktop y el almacén)
+def tamano_Reportes(carpeta):
+    total = 0
+    for subcarpeta in ['HTMLMobile', 'HTMLDesktop', 'reportes']:
+        for raiz, _, archivos in os.walk(os.path.join(carpeta, subcarpeta)):
+            total += sum(os.path.getsize(os.path.join(raiz, archivo)) for archivo in archivos)
+    return total
+
+def leer_Tramos(pathTiempos):
+    if not os.path.exists(pathTiempos):
+        return []
+    with open(pathTiempos, 'r', encoding='utf-8') as archivo:
+        return [json.loads(linea) for linea in archivo if linea.strip()]
+
+# Duración de cada auditoría exitosa según los tramos de --tiempos de lighthouse.py (incluye lanzar
+# Lighthouse y Chrome); sirve con el Lighthouse real, que no deja el log del falso
+def auditorias_Tiempos(pathTiempos):
+    return [tramo['duracion_s'] for tramo in leer_Tramos(pathTiempos) if tramo['etapa'] == 'auditoria' and tramo.get('ok')]
+
+# p50/p95 de cada etapa según los tramos que lighthouse.py escribió con --tiempos
+def etapas(pathTiempos):
+    duraciones = {etapa: [] for etapa in ETAPAS}
+    for tramo in leer_Tramos(pathTiempos):
+        if tramo['etapa'] in duraciones:
+            duraciones[tramo['etapa']].append(tramo['duracion_s'])
+    return {etapa: _resumen(valores) for etapa, valores in duraciones.items()}
+
+def ejecutar_Escenario(sitio, cantidad, argumentosExtra, demora, kb, conservar, lighthouse=None):
+    carpeta = tempfile.mkdtemp(prefix=f'benchmark_{cantidad}_')
+    with open(os.path.join(carpeta, 'urls.txt'), 'w') as archivo:
+        archivo.write('\n'.join(urls_Escenario(sitio.server_address[1], cantidad)) + '\n')
+    pathLog = os.path.join(carpeta, 'lighthouse_falso.jsonl')
+    if lighthouse:
+        entorno = dict(os.environ, LIGHTHOUSE_NODE=os.environ.get('LIGHTHOUSE_NODE', 'node'), LIGHTHOUSE_CLI=lighthouse)
+    else:
+        entorno = dict(os.environ, LIGHTHOUSE_NODE=sys.executable, LIGHTHOUSE_CLI=os.path.join(DIRECTORIO, 'lighthouse_falso.py'),
+                       LH_FALSO_DEMORA=str(demora), LH_FALSO_KB=str(kb), LH_FALSO_LOG=pathLog)
+
+    # Los tiempos por etapa salen de la instrumentación de lighthouse.py
+    if '--tiempos' in argumentosExtra:
+        pathTiempos = os.path.join(carpeta, argumentosExtra[argumentosExtra.index('--tiempos') + 1])
+    else:
+        argumentosExtra = [*argumentosExtra, '--tiempos', 'tiempos.jsonl']
+        pathTiempos = os.path.join(carpeta, 'tiempos.jsonl')
+    inicio = time.time()
+    with open(os.path.join(carpeta, 'salida.log'), 'w') as salida:
+        proceso = subprocess.Popen([sys.executable, os.path.join(DIRECTORIO, 'lighthouse.py'), *argumentosExtra],
+                                   cwd=carpeta, env=entorno, stdout=salida, stderr=subprocess.STDOUT)
+        # wait4 da el uso de recursos de lighthouse.py y de los procesos que esperó (Lighthouse falso)
+        _, estado, uso = os.wait4(proceso.pid, 0)
+        proceso.returncode = os.waitstatus_to_exitcode(estado)
+    fin = time.time()
+
+    auditorias = []
+    if os.path.exists(pathLog):
+        with open(pathLog, 'r', encoding='utf-8') as archivo:
+            auditorias = [json.loads(linea) for linea in archivo if linea.strip()]
+
+    duracion = fin - inicio
+    resultado = {
+        'urls': cantidad,
+        'codigo_salida': proceso.returncode,
+        'duracion_s': round(duracion, 3),
+        'urls_por_s': round(cantidad / duracion, 2),
+        'auditorias': len(auditorias),
+        'auditorias_por_s': round(len(auditorias) / duracion, 2),
+        # ru_maxrss está en KB en Linux
+        'rss_max_mb': round(uso.ru_maxrss / 1024, 1),
+        'cpu_s': round(uso.ru_utime + uso.ru_stime, 2),
+        'reportes_mb': round(tamano_Reportes(carpeta) / (1024 * 1024), 1),
+        'auditoria_lighthouse': _resumen(auditorias_Tiempos(pathTiempos)),
+        'etapas': etapas(pathTiempos),
+        'carpeta': carpeta if conservar else None
+    }
+    if not conservar:
+        shutil.rmtree(carpeta, ignore_errors=True)
+    elif proceso.returncode != 0:
+        print(f"lighthouse.py terminó con código {proceso.returncode}, ver {carpeta}/salida.log")
+    return resultado
+
+def imprimir(resultado):
+    etapasEscenario = resultado['etapas']
+    print(f"\n{resultado['urls']} URLs: {resultado['duracion_s']} s, {resultado['urls_por_s']} URLs/s, "
+          f"{resultado['auditorias_por_s']} auditorías/s, RSS máximo {resultado['rss_max_mb']} MB, CPU {resultado['cpu_s']} s")
+    for etapa in ETAPAS:
+        valores = etapasEscenario[etapa]
+        if valores:
+            print(f"  {etapa:<20} p50 {valores['p50'] * 1000:.1f} ms  p95 {valores['p95'] * 1000:.1f} ms  max {valores['max'] * 1000:.1f} ms  (n={valores['n']})")
+    if resultado['codigo_salida'] != 0:
+        print(f"  lighthouse.py terminó con código {resultado['codigo_salida']}")
+
+# Repite un escenario con cada perfil de auditoría (--perfil de lighthouse.py) y compara el tiempo
+# por auditoría (p50 de los tramos de --tiempos), la duración total y el tamaño de los reportes.
+# El ahorro se calcula contra el primer perfil de la lista. Sin --lighthouse el resultado es
+# sintético: solo refleja COSTOS de lighthouse_falso.py.
+def comparar_Perfiles(sitio, cantidad, perfiles, argumentosExtra, demora, kb, conservar, lighthouse=None):
+    resultados = {}
+    for perfil in perfiles:
+        resultados[perfil] = ejecutar_Escenario(sitio, cantidad, [*argumentosExtra, '--perfil', perfil],
+                                                demora, kb, conservar, lighthouse)
+
+    referencia = resultados[perfiles[0]]
+    origen = lighthouse if lighthouse else 'SINTÉTICO, Lighthouse falso: el ahorro reproduce COSTOS de lighthouse_falso.py'
+    print(f"\n{cantidad} URLs por perfil (ahorro frente a {perfiles[0]}; {origen}):")
+    for perfil, resultado in resultados.items():
+        resultado['sintetico'] = not lighthouse
+        auditoria = resultado['auditoria_lighthouse']
+        p50 = auditoria['p50'] if auditoria else None
+        p50Referencia = referencia['auditoria_lighthouse']['p50'] if referencia['auditoria_lighthouse'] else None
+        ahorro = 1 - p50 / p50Referencia if p50 and p50Referencia else None
+        resultado['ahorro_auditoria'] = round(ahorro, 3) if ahorro is not None else None
+        print(f"  {perfil:<10} auditoría p50 {p50 * 1000 if p50 else 0:>8.1f} ms ({ahorro if ahorro is not None else 0:>6.1%})  "
+              f"total {resultado['duracion_s']:>8.2f} s  reportes {resultado['reportes_mb']:>8.1f} MB")
+        if resultado['codigo_salida'] != 0:
+            print(f"  lighthouse.py terminó con código {resultado['codigo_salida']}")
+    return resultados
+
+# Arranque en frío de lighthouse.py: mediana de varias ejecuciones de cada comando, que solo
+# importan lo suyo (el pipeline de auditoría se mide aparte con "import auditoria")
+COMANDOS_ARRANQUE = [
+    ('python -c pass', ['-c', 'pass']),
+    ('lighthouse.py --help', ['lighthouse.py', '--help']),
+    ('lighthouse.py validar --help', ['lighthouse.py', 'validar', '--help']),
+    ('import lighthouse', ['-c', 'import lighthouse']),
+    ('import validacion', ['-c', 'import validacion']),
+    ('import auditoria', ['-c', 'import auditoria'])
+]
+
+def medir_Arranque(repeticiones=7):
+    resultado = {}
+    for nombre, argumentos in COMANDOS_ARRANQUE:
+        duraciones = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            subprocess.run([sys.executable, *argumentos], cwd=DIRECTORIO, stdout=subprocess.DEVNULL, check=True)
+            duraciones.append(time.perf_counter() - inicio)
+        resultado[nombre] = round(percentil(sorted(duraciones), 50) * 1000, 1)
+        print(f"  {nombre:<30} {resultado[nombre]:>7.1f} ms")
+    return resultado
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark de lighthouse.py sin navegador (Lighthouse falso y sitio local)')
+    parser.add_argument('--escenarios', default='10,1000,10000', help='Cantidades de URLs separadas por coma')
+    parser.add_argument('--demora', type=int, default=50, help='Milisegundos que tarda cada auditoría falsa')
+    parser.add_argument('--kb', type=int, default=500, help='Tamaño aproximado de cada reporte JSON falso en KB')
+    parser.add_argument('--salida', help='Guardar los resultados en este archivo JSON')
+    parser.add_argument('--conservar', action='store_true', help='No borrar la carpeta temporal de cada escenario')
+    parser.add_argument('--arranque', action='store_true', help='Medir solo el arranque en frío de lighthouse.py y sus subcomandos')
+    parser.add_argument('--perfiles', help='Perfiles de auditoría separados por coma para comparar en cada escenario (por ejemplo completo,estandar,triage)')
+    parser.add_argument('--lighthouse', metavar='CLI', help='cli/index.js de un Lighthouse real para medir en vez del falso (node desde LIGHTHOUSE_NODE o el PATH)')
+    args, argumentosExtra = parser.parse_known_args()
+    if argumentosExtra[:1] == ['--']:
+        argumentosExtra = argumentosExtra[1:]
+
+    if args.arranque:
+        print("Arranque en frío (mediana):")
+        arranque = medir_Arranque()
+        if args.salida:
+            with open(args.salida, 'w', encoding='utf-8') as archivo:
+                json.dump({'arranque_ms': arranque}, archivo, indent=2)
+        sys.exit(0)
+
+    sitio = iniciar_Sitio()
+    resultados = []
+    for cantidad in [int(valor) for valor in args.escenarios.split(',')]:
+        if args.perfiles:
+            resultados.append(comparar_Perfiles(sitio, cantidad, args.perfiles.split(','), argumentosExtra, args.demora, args.kb, args.conservar, args.lighthouse))
+            continue
+        resultado = ejecutar_Escenario(sitio, cantidad, argumentosExtra, args.demora, args.kb, args.conservar, args.lighthouse)
+        imprimir(resultado)
+        resultados.append(resultado)
+    sitio.shutdown()
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump({'argumentos': argumentosExtra, 'demora_ms': args.demora, 'kb': args.kb, 'escenarios': resultados}, archivo, indent=2)
+        print(f"\nResultados guardados en {args.salida}")
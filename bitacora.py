@@ -0,0 +1,64 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+# Bitácora de la ejecución: archivo JSONL de solo escritura al final. Cada validación y cada
+# trabajo (url, mode) terminado se escribe y sincroniza a disco apenas se completa, así una
+# ejecución interrumpida puede retomarse con --resume sin repetir el trabajo hecho.
+class Bitacora:
+    def __init__(self, pathBitacora):
+        self.pathBitacora = pathBitacora
+        self.bloqueo = threading.Lock()
+        self.archivo = None
+
+    # Empieza una bitácora nueva para una ejecución que escribe en pathExcel (y en el historial con el id ejecucion)
+    def iniciar(self, pathExcel, ejecucion=None):
+        self.archivo = open(self.pathBitacora, 'w', encoding='utf-8')
+        self._escribir({'tipo': 'inicio', 'excel': pathExcel, 'ejecucion': ejecucion})
+
+    # Lee la bitácora existente y la deja abierta para seguir agregando.
+    # Devuelve None si no hay bitácora que retomar.
+    def retomar(self):
+        if not os.path.exists(self.pathBitacora):
+            return None
+
+        estado = {'excel': None, 'ejecucion': None, 'validaciones': {}, 'auditorias': {}}
+        with open(self.pathBitacora, 'r', encoding='utf-8') as archivo:
+            for linea in archivo:
+                try:
+                    registro = json.loads(linea)
+                except ValueError:
+                    # Última línea incompleta si el proceso murió mientras escribía
+                    continue
+                if registro['tipo'] == 'inicio':
+                    estado['excel'] = registro['excel']
+                    estado['ejecucion'] = registro.get('ejecucion')
+                elif registro['tipo'] == 'validacion':
+                    estado['validaciones'][registro['url']] = (registro['codigo'], registro['descripcion'])
+                elif registro['tipo'] == 'auditoria' and registro['reporte']:
+                    estado['auditorias'][(registro['url'], registro['mode'])] = registro['puntuaciones']
+
+        self.archivo = open(self.pathBitacora, 'a', encoding='utf-8')
+        # Si el proceso murió a mitad de línea, la siguiente entrada empieza en una línea nueva
+        self.archivo.write('\n')
+        return estado
+
+    def registrar_Validacion(self, url, codigo, descripcion):
+        self._escribir({'tipo': 'validacion', 'url': url, 'codigo': codigo, 'descripcion': descripcion})
+
+    def registrar_Auditoria(self, url, mode, reporte, puntuaciones):
+        self._escribir({'tipo': 'auditoria', 'url': url, 'mode': mode, 'reporte': reporte, 'puntuaciones': puntuaciones})
+
+    def _escribir(self, registro):
+        registro['fecha'] = datetime.now().isoformat(timespec='seconds')
+        with self.bloqueo:
+            self.archivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            self.archivo.flush()
+            os.fsync(self.archivo.fileno())
+
+    def cerrar(self):
+        with self.bloqueo:
+            if self.archivo:
+                self.archivo.close()
+                self.archivo = None
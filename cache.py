@@ -0,0 +1,89 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+# Cache persistente de auditorías: reutiliza las puntuaciones de una página que no cambió.
+# La clave combina URL, modo, versión de Lighthouse y banderas; la entrada guarda la firma
+# de la página (ETag, Last-Modified, hash del cuerpo) que entrega validar_Url.
+class CacheAuditorias:
+    def __init__(self, pathCache, ttlHoras=24, maxEntradas=10000, versionLighthouse=None):
+        self.ttl = ttlHoras * 3600
+        self.maxEntradas = maxEntradas
+        self.versionLighthouse = versionLighthouse
+        self.bloqueo = threading.Lock()
+        self.conexion = sqlite3.connect(pathCache, check_same_thread=False)
+        self.conexion.execute('''
+            CREATE TABLE IF NOT EXISTS auditorias (
+                clave TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                hash TEXT,
+                puntuaciones TEXT NOT NULL,
+                reporte TEXT,
+                creado REAL NOT NULL,
+                usado REAL NOT NULL
+            )
+        ''')
+        self.conexion.execute('CREATE INDEX IF NOT EXISTS idx_auditorias_usado ON auditorias (usado)')
+        self.conexion.commit()
+
+    def clave(self, url, mode, banderas):
+        contenido = json.dumps([url, mode, self.versionLighthouse, sorted(banderas)])
+        return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+    # Devuelve (puntuaciones, reporte) si hay una entrada vigente para la misma versión de la página
+    def obtener(self, url, mode, banderas, firma):
+        if not firma or not any(firma.values()):
+            return None
+        clave = self.clave(url, mode, banderas)
+        with self.bloqueo:
+            fila = self.conexion.execute(
+                'SELECT etag, last_modified, hash, puntuaciones, reporte, creado FROM auditorias WHERE clave = ?', (clave,)
+            ).fetchone()
+            if fila is None:
+                return None
+            etag, lastModified, hashCuerpo, puntuaciones, reporte, creado = fila
+            if self.ttl and time.time() - creado > self.ttl:
+                return None
+            if not _misma_Pagina(firma, etag, lastModified, hashCuerpo):
+                return None
+            self.conexion.execute('UPDATE auditorias SET usado = ? WHERE clave = ?', (time.time(), clave))
+            self.conexion.commit()
+        return json.loads(puntuaciones), reporte
+
+    def guardar(self, url, mode, banderas, firma, puntuaciones, reporte):
+        # Solo se guardan auditorías completas de páginas con firma
+        if not firma or not any(firma.values()) or None in puntuaciones.values():
+            return
+        ahora = time.time()
+        with self.bloqueo:
+            self.conexion.execute(
+                'INSERT OR REPLACE INTO auditorias VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (self.clave(url, mode, banderas), url, mode, firma['etag'], firma['lastModified'], firma['hash'],
+                 json.dumps(puntuaciones), reporte, ahora, ahora)
+            )
+            # Desalojo por tamaño: se eliminan las entradas usadas hace más tiempo
+            if self.maxEntradas:
+                self.conexion.execute(
+                    'DELETE FROM auditorias WHERE clave IN (SELECT clave FROM auditorias ORDER BY usado DESC LIMIT -1 OFFSET ?)',
+                    (self.maxEntradas,)
+                )
+            self.conexion.commit()
+
+    def cerrar(self):
+        with self.bloqueo:
+            self.conexion.close()
+
+# La página no cambió si coincide el validador más fuerte que tengan ambas firmas
+def _misma_Pagina(firma, etag, lastModified, hashCuerpo):
+    if firma['etag'] and etag:
+        return firma['etag'] == etag
+    if firma['lastModified'] and lastModified:
+        return firma['lastModified'] == lastModified
+    if firma['hash'] and hashCuerpo:
+        return firma['hash'] == hashCuerpo
+    return False
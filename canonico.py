@@ -0,0 +1,65 @@
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from descubrimiento import normalizar_Url
+
+# Reglas de canonicalización que se pueden combinar con --reglas-canonicas. Siempre se aplica
+# normalizar_Url (esquema y host en minúsculas, sin puerto por defecto ni fragmento).
+#   seguimiento  quita parámetros de campañas (utm_*, gclid, fbclid, ...)
+#   orden        ordena los parámetros de la query
+#   query        quita la query completa
+#   barra        quita la barra final de la ruta (salvo la raíz)
+#   www          quita el "www." del host
+#   https        trata http y https como la misma página
+REGLAS = ['seguimiento', 'orden', 'query', 'barra', 'www', 'https']
+REGLAS_POR_DEFECTO = 'seguimiento,orden,barra'
+
+PARAMETROS_SEGUIMIENTO = re.compile(r'^(utm_\w+|gclid|dclid|fbclid|msclkid|mc_cid|mc_eid|_ga|_gl)$', re.IGNORECASE)
+
+def leer_Reglas(texto):
+    reglas = {regla.strip() for regla in texto.split(',') if regla.strip()}
+    desconocidas = reglas - set(REGLAS)
+    if desconocidas:
+        raise ValueError(f"Reglas canónicas desconocidas: {', '.join(sorted(desconocidas))} (disponibles: {', '.join(REGLAS)})")
+    return reglas
+
+# Clave canónica de una URL: dos URLs con la misma clave se consideran la misma página
+def canonizar(url, reglas):
+    esquema, host, ruta, query, _ = urlsplit(normalizar_Url(url))
+    if 'https' in reglas and esquema == 'http':
+        esquema = 'https'
+        host = host[:-3] if host.endswith(':80') else host
+    if 'www' in reglas and host.startswith('www.'):
+        host = host[4:]
+    if 'barra' in reglas and len(ruta) > 1:
+        ruta = ruta.rstrip('/') or '/'
+    if 'query' in reglas:
+        query = ''
+    else:
+        parametros = parse_qsl(query, keep_blank_values=True)
+        if 'seguimiento' in reglas:
+            parametros = [(nombre, valor) for nombre, valor in parametros if not PARAMETROS_SEGUIMIENTO.match(nombre)]
+        if 'orden' in reglas:
+            parametros.sort()
+        query = urlencode(parametros)
+    return urlunsplit((esquema, host, ruta, query, ''))
+
+# Agrupa las URLs válidas que llegan a la misma página después de las redirecciones.
+# destinos es {url: url final}. Devuelve (representantes, alias): las URLs que se auditan, en el
+# orden original, y {representante: [alias]}. Como representante se prefiere una URL que no
+# redirige, así la auditoría no carga con redirecciones que solo tiene un alias.
+def agrupar_Alias(urls, destinos, reglas):
+    grupos = {}
+    for url in urls:
+        grupos.setdefault(canonizar(destinos.get(url) or url, reglas), []).append(url)
+
+    representantes = []
+    alias = {}
+    for miembros in grupos.values():
+        directas = [url for url in miembros if normalizar_Url(destinos.get(url) or url) == normalizar_Url(url)]
+        representante = directas[0] if directas else miembros[0]
+        representantes.append(representante)
+        if len(miembros) > 1:
+            alias[representante] = [url for url in miembros if url != representante]
+    orden = {url: i for i, url in enumerate(urls)}
+    representantes.sort(key=orden.get)
+    return representantes, alias
@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from estadistica import percentil
+
+# Estado del host en un momento: cpu (fracción 0-1 de todos los núcleos), carga (load average
+# de 1 minuto por núcleo) y memoria disponible en MB
+MuestraHost = namedtuple('MuestraHost', ['momento', 'cpu', 'carga', 'memoriaMB'])
+
+# Tiempos de CPU acumulados del host (ocupado, total) desde /proc/stat; None fuera de Linux
+def tiempos_Cpu():
+    try:
+        with open('/proc/stat', 'r') as archivo:
+            campos = [int(valor) for valor in archivo.readline().split()[1:]]
+    except (OSError, ValueError):
+        return None
+    # idle + iowait no cuentan como ocupado
+    ocioso = campos[3] + (campos[4] if len(campos) > 4 else 0)
+    return sum(campos) - ocioso, sum(campos)
+
+# Memoria disponible para procesos nuevos (MemAvailable de /proc/meminfo); None fuera de Linux
+def memoria_Disponible_MB():
+    try:
+        with open('/proc/meminfo', 'r') as archivo:
+            for linea in archivo:
+                if linea.startswith('MemAvailable:'):
+                    return int(linea.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+# Controla cuántas auditorías corren a la vez según la carga del host. Lighthouse mide peor cuando
+# el host está saturado: con CPU, load average o memoria sobre el objetivo se baja el límite, y
+# cuando sobra capacidad se sube de a uno hasta el máximo. El benchmarkIndex de cada reporte
+# (la velocidad que Lighthouse midió en el host) también cuenta: si cae bajo el factor de
+# referencia de la ejecución, el host está más lento de lo normal aunque la CPU no lo muestre.
+class ControladorConcurrencia:
+    def __init__(self, minimo=1, maximo=4, cpuObjetivo=0.8, memoriaMinMB=1024, factorBenchmark=0.8, intervalo=2):
+        self.minimo = max(1, minimo)
+        self.maximo = max(self.minimo, maximo)
+        self.cpuObjetivo = cpuObjetivo
+        self.memoriaMinMB = memoriaMinMB
+        self.factorBenchmark = factorBenchmark
+        self.intervalo = intervalo
+        self.nucleos = os.cpu_count() or 1
+        # Se empieza con el mínimo y se sube a medida que el host lo permite
+        self.limite = self.minimo
+        self.activas = 0
+        self.condicion = threading.Condition()
+        # Unos 10 minutos de muestras para revisar el estado del host durante cada auditoría
+        self.muestras = deque(maxlen=max(10, int(600 / intervalo)))
+        self.benchmarks = deque(maxlen=50)
+        self.cpuAnterior = tiempos_Cpu()
+        self.parar = threading.Event()
+        self.hilo = threading.Thread(target=self._vigilar, daemon=True, name='control_carga')
+        self.hilo.start()
+
+    def _medir(self):
+        cpu = None
+        actual = tiempos_Cpu()
+        if actual and self.cpuAnterior and actual[1] > self.cpuAnterior[1]:
+            cpu = (actual[0] - self.cpuAnterior[0]) / (actual[1] - self.cpuAnterior[1])
+        self.cpuAnterior = actual
+        try:
+            carga = os.getloadavg()[0] / self.nucleos
+        except OSError:
+            carga = None
+        return MuestraHost(time.time(), cpu, carga, memoria_Disponible_MB())
+
+    # Motivo por el que el host está saturado en una muestra, o None
+    def _saturacion(self, muestra):
+        if muestra.memoriaMB is not None and muestra.memoriaMB < self.memoriaMinMB:
+            return f'memoria disponible {muestra.memoriaMB:.0f} MB'
+        if muestra.cpu is not None and muestra.cpu > self.cpuObjetivo:
+            return f'CPU {muestra.cpu:.0%}'
+        if muestra.carga is not None and muestra.carga > 1:
+            return f'load average {muestra.carga:.2f} por núcleo'
+        return None
+
+    def _vigilar(self):
+        while not self.parar.wait(self.intervalo):
+            muestra = self._medir()
+            with self.condicion:
+                self.muestras.append(muestra)
+                motivo = self._saturacion(muestra) or self._benchmark_Degradado()
+                if motivo and self.limite > self.minimo:
+                    self.limite -= 1
+                    print(f"Host saturado ({motivo}): {self.limite} auditorías concurrentes")
+                elif (not motivo and self.limite < self.maximo and self.activas >= self.limite
+                      and (muestra.cpu is None or muestra.cpu < self.cpuObjetivo - 0.15)):
+                    # Solo se sube si el límite actual está en uso y la CPU tiene holgura
+                    self.limite += 1
+                    print(f"Host con capacidad libre: {self.limite} auditorías concurrentes")
+                    self.condicion.notify()
+
+    # benchmarkIndex de referencia: el percentil 90 de la ejecución (el host sin competencia)
+    def _referencia_Benchmark(self):
+        if len(self.benchmarks) < 3:
+            return None
+        return percentil(sorted(self.benchmarks), 90)
+
+    def _benchmark_Degradado(self):
+        referencia = self._referencia_Benchmark()
+        if referencia is None:
+            return None
+        recientes = list(self.benchmarks)[-3:]
+        mediana = sorted(recientes)[1]
+        if mediana < referencia * self.factorBenchmark:
+            return f'benchmarkIndex {mediana:.0f} de {referencia:.0f}'
+        return None
+
+    def registrar_Benchmark(self, indice):
+        if isinstance(indice, (int, float)) and indice > 0:
+            with self.condicion:
+                self.benchmarks.append(indice)
+
+    # Bloquea hasta que haya lugar para una auditoría más
+    def adquirir(self):
+        with self.condicion:
+            self.condicion.wait_for(lambda: self.activas < self.limite)
+            self.activas += 1
+
+    # Igual que adquirir, sin bloquear (para el motor asyncio); devuelve si obtuvo el lugar
+    def intentar_Adquirir(self):
+        with self.condicion:
+            if self.activas >= self.limite:
+                return False
+            self.activas += 1
+            return True
+
+    def liberar(self):
+        with self.condicion:
+            self.activas -= 1
+            self.condicion.notify()
+
+    # Motivo por el que el host estuvo sobrecargado mientras corría una auditoría (entre inicio y
+    # fin), o None. Se usa un umbral más alto que el objetivo del control: solo se marcan las
+    # auditorías cuyo resultado es dudoso, no las que corrieron con el host bien aprovechado.
+    def sobrecarga(self, inicio, fin, benchmarkIndex=None):
+        with self.condicion:
+            durante = [muestra for muestra in self.muestras if inicio <= muestra.momento <= fin + self.intervalo]
+            referencia = self._referencia_Benchmark()
+        memorias = [muestra.memoriaMB for muestra in durante if muestra.memoriaMB is not None]
+        if memorias and min(memorias) < self.memoriaMinMB / 2:
+            return f'memoria disponible {min(memorias):.0f} MB'
+        cargas = [muestra.carga for muestra in durante if muestra.carga is not None]
+        if cargas and sum(cargas) / len(cargas) > 1.5:
+            return f'load average {sum(cargas) / len(cargas):.2f} por núcleo'
+        if referencia and isinstance(benchmarkIndex, (int, float)) and benchmarkIndex < referencia * self.factorBenchmark:
+            return f'benchmarkIndex {benchmarkIndex:.0f} de {referencia:.0f}'
+        return None
+
+    # Espera (hasta maximo segundos) a que el host deje de estar saturado
+    def esperar_Holgura(self, maximo=60):
+        limite = time.time() + maximo
+        while time.time() < limite:
+            with self.condicion:
+                ultima = self.muestras[-1] if self.muestras else None
+            if ultima is None or not self._saturacion(ultima):
+                return True
+            time.sleep(self.intervalo)
+        return False
+
+    def cerrar(self):
+        self.parar.set()
+        self.hilo.join()
@@ -0,0 +1,335 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+# Trabajo (url, mode) entregado a un trabajador y su resultado devuelto al coordinador
+Trabajo = namedtuple('Trabajo', ['id', 'url', 'mode'])
+ResultadoTrabajo = namedtuple('ResultadoTrabajo', ['id', 'url', 'mode', 'reporte', 'puntuaciones', 'trabajador'])
+
+def id_Trabajo(url, mode):
+    return hashlib.sha1(f'{mode} {url}'.encode('utf-8')).hexdigest()[:20]
+
+# Cola de trabajos para repartir las auditorías entre varias máquinas. Cada trabajador toma un
+# trabajo con un lease de duración fija y lo renueva con latidos mientras audita; si el lease
+# vence (el trabajador murió o perdió la conexión) el trabajo vuelve a la cola, hasta intentosMax
+# veces. El coordinador agrega los trabajos, cierra el envío y recoge los resultados.
+# Backends: ColaSQLite (un archivo SQLite, por ejemplo en un disco compartido) y ColaArchivos
+# (una carpeta compartida, con renombres atómicos); abrir_Cola elige uno por la ruta.
+
+class ColaSQLite:
+    def __init__(self, pathCola, intentosMax=3):
+        self.intentosMax = intentosMax
+        self.ultimoOrden = 0
+        self.bloqueo = threading.Lock()
+        # Transacciones explícitas: tomar un trabajo debe ser atómico entre procesos
+        self.conexion = sqlite3.connect(pathCola, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conexion.executescript('''
+            CREATE TABLE IF NOT EXISTS trabajos (
+                id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                estado TEXT NOT NULL DEFAULT 'pendiente',
+                trabajador TEXT,
+                vence REAL,
+                intentos INTEGER NOT NULL DEFAULT 0,
+                reporte TEXT,
+                puntuaciones TEXT,
+                orden INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_trabajos_estado ON trabajos (estado, vence);
+            CREATE INDEX IF NOT EXISTS idx_trabajos_orden ON trabajos (orden);
+            CREATE TABLE IF NOT EXISTS estado_cola (clave TEXT PRIMARY KEY, valor TEXT);
+        ''')
+
+    def _transaccion(self, funcion):
+        with self.bloqueo:
+            self.conexion.execute('BEGIN IMMEDIATE')
+            try:
+                resultado = funcion()
+                self.conexion.execute('COMMIT')
+                return resultado
+            except BaseException:
+                self.conexion.execute('ROLLBACK')
+                raise
+
+    def reiniciar(self):
+        def reiniciar():
+            self.conexion.execute('DELETE FROM trabajos')
+            self.conexion.execute('DELETE FROM estado_cola')
+        self._transaccion(reiniciar)
+        self.ultimoOrden = 0
+
+    # Los trabajos que ya existen (por ejemplo al retomar) no se duplican
+    def agregar(self, trabajos):
+        filas = [(id_Trabajo(url, mode), url, mode) for url, mode in trabajos]
+        self._transaccion(lambda: self.conexion.executemany('INSERT OR IGNORE INTO trabajos (id, url, mode) VALUES (?, ?, ?)', filas))
+
+    def cerrar_Envio(self):
+        self._transaccion(lambda: self.conexion.execute("INSERT OR REPLACE INTO estado_cola VALUES ('envio_cerrado', '1')"))
+
+    # Vuelve a abrir el envío (al retomar): los trabajadores esperan los trabajos nuevos en vez de terminar
+    def abrir_Envio(self):
+        self._transaccion(lambda: self.conexion.execute("DELETE FROM estado_cola WHERE clave = 'envio_cerrado'"))
+
+    def _completar(self, id, trabajador, reporte, puntuaciones):
+        orden = self.conexion.execute('SELECT COALESCE(MAX(orden), 0) + 1 FROM trabajos').fetchone()[0]
+        # Solo el primero que completa un trabajo cuenta (un lease vencido pudo repartirlo dos veces)
+        self.conexion.execute(
+            "UPDATE trabajos SET estado = 'hecho', trabajador = ?, reporte = ?, puntuaciones = ?, orden = ?, vence = NULL WHERE id = ? AND estado != 'hecho'",
+            (trabajador, reporte, json.dumps(puntuaciones), orden, id)
+        )
+
+    def _reencolar_Vencidos(self):
+        vencidos = self.conexion.execute("SELECT id, intentos FROM trabajos WHERE estado = 'en_curso' AND vence < ?", (time.time(),)).fetchall()
+        for id, intentos in vencidos:
+            if intentos + 1 >= self.intentosMax:
+                # Un trabajo que agota sus leases se da por fallido en vez de tumbar a más trabajadores
+                self._completar(id, None, None, {'performance': None, 'accessibility': None, 'seo': None})
+            else:
+                self.conexion.execute("UPDATE trabajos SET estado = 'pendiente', trabajador = NULL, vence = NULL, intentos = intentos + 1 WHERE id = ?", (id,))
+        return len(vencidos)
+
+    def reencolar_Vencidos(self):
+        return self._transaccion(self._reencolar_Vencidos)
+
+    # Entrega el siguiente trabajo pendiente con un lease de duracionLease segundos, o None
+    def tomar(self, trabajador, duracionLease=60):
+        def tomar():
+            self._reencolar_Vencidos()
+            fila = self.conexion.execute("SELECT id, url, mode FROM trabajos WHERE estado = 'pendiente' ORDER BY rowid LIMIT 1").fetchone()
+            if fila is None:
+                return None
+            self.conexion.execute("UPDATE trabajos SET estado = 'en_curso', trabajador = ?, vence = ? WHERE id = ?", (trabajador, time.time() + duracionLease, fila[0]))
+            return Trabajo(*fila)
+        return self._transaccion(tomar)
+
+    # Renueva el lease; devuelve False si el trabajo ya no es de este trabajador
+    def latido(self, id, trabajador, duracionLease=60):
+        def latido():
+            return self.conexion.execute(
+                "UPDATE trabajos SET vence = ? WHERE id = ? AND estado = 'en_curso' AND trabajador = ?",
+                (time.time() + duracionLease, id, trabajador)
+            ).rowcount > 0
+        return self._transaccion(latido)
+
+    def completar(self, id, trabajador, reporte, puntuaciones):
+        self._transaccion(lambda: self._completar(id, trabajador, reporte, puntuaciones))
+
+    # Resultados completados desde la última llamada (el coordinador los va recogiendo)
+    def resultados_Nuevos(self):
+        with self.bloqueo:
+            filas = self.conexion.execute(
+                "SELECT id, url, mode, reporte, puntuaciones, trabajador, orden FROM trabajos WHERE estado = 'hecho' AND orden > ? ORDER BY orden",
+                (self.ultimoOrden,)
+            ).fetchall()
+        if filas:
+            self.ultimoOrden = filas[-1][6]
+        return [ResultadoTrabajo(id, url, mode, reporte, json.loads(puntuaciones), trabajador)
+                for id, url, mode, reporte, puntuaciones, trabajador, _ in filas]
+
+    def estado(self):
+        with self.bloqueo:
+            conteos = dict(self.conexion.execute('SELECT estado, COUNT(*) FROM trabajos GROUP BY estado').fetchall())
+            cerrado = self.conexion.execute("SELECT 1 FROM estado_cola WHERE clave = 'envio_cerrado'").fetchone() is not None
+        return {'pendiente': conteos.get('pendiente', 0), 'en_curso': conteos.get('en_curso', 0), 'hecho': conteos.get('hecho', 0), 'envio_cerrado': cerrado}
+
+    # No queda nada por hacer: el coordinador cerró el envío y no hay trabajos pendientes ni en curso
+    def terminada(self):
+        estado = self.estado()
+        return estado['envio_cerrado'] and estado['pendiente'] == 0 and estado['en_curso'] == 0
+
+    def cerrar(self):
+        with self.bloqueo:
+            self.conexion.close()
+
+# Cola en una carpeta compartida: cada trabajo es un archivo JSON que pasa de pendientes/ a
+# en_curso/ y a hechos/. Tomar un trabajo es un os.rename (atómico: solo un trabajador gana) y el
+# lease es la fecha de modificación del archivo en en_curso/, que los latidos renuevan.
+# orden.json guarda los ids en el orden en que se agregaron: los trabajos se entregan y los
+# resultados se devuelven en el orden de entrada, como en ColaSQLite (los nombres son hashes).
+class ColaArchivos:
+    def __init__(self, carpeta, intentosMax=3):
+        self.carpeta = carpeta
+        self.intentosMax = intentosMax
+        self.vistos = set()
+        self.posiciones = {}
+        self.fechaOrden = None
+        for subcarpeta in ['pendientes', 'en_curso', 'hechos']:
+            os.makedirs(os.path.join(carpeta, subcarpeta), exist_ok=True)
+
+    def _path(self, subcarpeta, id=''):
+        return os.path.join(self.carpeta, subcarpeta, f'{id}.json' if id else '')
+
+    def _leer(self, path):
+        with open(path, 'r', encoding='utf-8') as archivo:
+            return json.load(archivo)
+
+    # Escritura atómica: nadie lee un archivo a medio escribir
+    def _escribir(self, path, datos):
+        temporal = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo, ensure_ascii=False)
+        os.replace(temporal, path)
+
+    def _ids(self, subcarpeta):
+        return [nombre[:-5] for nombre in sorted(os.listdir(self._path(subcarpeta))) if nombre.endswith('.json')]
+
+    # {id: posición de entrada}; orden.json solo se relee si cambió
+    def _posiciones(self):
+        pathOrden = os.path.join(self.carpeta, 'orden.json')
+        try:
+            fecha = os.path.getmtime(pathOrden)
+            if fecha != self.fechaOrden:
+                self.posiciones = {id: posicion for posicion, id in enumerate(self._leer(pathOrden))}
+                self.fechaOrden = fecha
+        except (OSError, ValueError):
+            pass
+        return self.posiciones
+
+    # Ids de una subcarpeta en el orden en que se agregaron (los desconocidos al final)
+    def _ids_Ordenados(self, subcarpeta):
+        posiciones = self._posiciones()
+        return sorted(self._ids(subcarpeta), key=lambda id: posiciones.get(id, len(posiciones)))
+
+    def reiniciar(self):
+        for subcarpeta in ['pendientes', 'en_curso', 'hechos']:
+            for nombre in os.listdir(self._path(subcarpeta)):
+                os.remove(os.path.join(self._path(subcarpeta), nombre))
+        for nombre in ['envio_cerrado', 'orden.json']:
+            if os.path.exists(os.path.join(self.carpeta, nombre)):
+                os.remove(os.path.join(self.carpeta, nombre))
+        self.vistos = set()
+        self.posiciones = {}
+        self.fechaOrden = None
+
+    def agregar(self, trabajos):
+        existentes = set(self._ids('pendientes')) | set(self._ids('en_curso')) | set(self._ids('hechos'))
+        orden = list(self._posiciones())
+        conocidos = set(orden)
+        for url, mode in trabajos:
+            id = id_Trabajo(url, mode)
+            if id not in conocidos:
+                conocidos.add(id)
+                orden.append(id)
+            if id not in existentes:
+                self._escribir(self._path('pendientes', id), {'id': id, 'url': url, 'mode': mode, 'intentos': 0})
+        self._escribir(os.path.join(self.carpeta, 'orden.json'), orden)
+
+    def cerrar_Envio(self):
+        open(os.path.join(self.carpeta, 'envio_cerrado'), 'w').close()
+
+    def abrir_Envio(self):
+        try:
+            os.remove(os.path.join(self.carpeta, 'envio_cerrado'))
+        except FileNotFoundError:
+            pass
+
+    def _completar(self, datos, trabajador, reporte, puntuaciones):
+        datos = dict(datos, trabajador=trabajador, reporte=reporte, puntuaciones=puntuaciones)
+        try:
+            # Solo el primero que completa un trabajo cuenta (un lease vencido pudo repartirlo dos veces)
+            with open(self._path('hechos', datos['id']), 'x', encoding='utf-8') as archivo:
+                json.dump(datos, archivo, ensure_ascii=False)
+        except FileExistsError:
+            pass
+
+    def reencolar_Vencidos(self):
+        vencidos = 0
+        for id in self._ids('en_curso'):
+            path = self._path('en_curso', id)
+            try:
+                datos = self._leer(path)
+                if os.path.getmtime(path) + datos.get('lease', 60) >= time.time():
+                    continue
+                datos['intentos'] += 1
+                datos.pop('trabajador', None)
+                if datos['intentos'] >= self.intentosMax:
+                    self._completar(datos, None, None, {'performance': None, 'accessibility': None, 'seo': None})
+                    os.remove(path)
+                else:
+                    self._escribir(path, datos)
+                    os.rename(path, self._path('pendientes', id))
+                vencidos += 1
+            except (OSError, ValueError):
+                # Otro proceso lo movió o lo está escribiendo
+                continue
+        return vencidos
+
+    def tomar(self, trabajador, duracionLease=60):
+        self.reencolar_Vencidos()
+        for id in self._ids_Ordenados('pendientes'):
+            path = self._path('en_curso', id)
+            try:
+                os.rename(self._path('pendientes', id), path)
+                # El lease empieza ahora: rename conserva la fecha de modificación original
+                os.utime(path)
+                datos = self._leer(path)
+            except (OSError, ValueError):
+                continue
+            datos.update(trabajador=trabajador, lease=duracionLease)
+            self._escribir(path, datos)
+            return Trabajo(id, datos['url'], datos['mode'])
+        return None
+
+    def latido(self, id, trabajador, duracionLease=60):
+        path = self._path('en_curso', id)
+        try:
+            if self._leer(path).get('trabajador') != trabajador:
+                return False
+            os.utime(path)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def completar(self, id, trabajador, reporte, puntuaciones):
+        # Con el lease vencido el trabajo pudo volver a pendientes; el resultado igual sirve
+        for subcarpeta in ['en_curso', 'pendientes']:
+            path = self._path(subcarpeta, id)
+            try:
+                datos = self._leer(path)
+            except (OSError, ValueError):
+                continue
+            self._completar(datos, trabajador, reporte, puntuaciones)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return
+
+    def resultados_Nuevos(self):
+        nuevos = []
+        for id in self._ids_Ordenados('hechos'):
+            if id in self.vistos:
+                continue
+            try:
+                datos = self._leer(self._path('hechos', id))
+            except (OSError, ValueError):
+                continue
+            self.vistos.add(id)
+            nuevos.append(ResultadoTrabajo(id, datos['url'], datos['mode'], datos['reporte'], datos['puntuaciones'], datos['trabajador']))
+        return nuevos
+
+    def estado(self):
+        return {'pendiente': len(self._ids('pendientes')), 'en_curso': len(self._ids('en_curso')), 'hecho': len(self._ids('hechos')),
+                'envio_cerrado': os.path.exists(os.path.join(self.carpeta, 'envio_cerrado'))}
+
+    def terminada(self):
+        estado = self.estado()
+        return estado['envio_cerrado'] and estado['pendiente'] == 0 and estado['en_curso'] == 0
+
+    def cerrar(self):
+        pass
+
+# Backends disponibles; otros (Redis, una API HTTP) solo necesitan los mismos métodos
+BACKENDS = {'sqlite': ColaSQLite, 'archivos': ColaArchivos}
+
+# "sqlite:ruta", "archivos:carpeta" o una ruta: .sqlite/.db es SQLite y cualquier otra cosa una carpeta
+def abrir_Cola(destino, intentosMax=3):
+    backend, _, ruta = destino.partition(':')
+    if backend not in BACKENDS or not ruta:
+        backend, ruta = ('sqlite' if destino.endswith(('.sqlite', '.db')) else 'archivos'), destino
+    return BACKENDS[backend](ruta, intentosMax)
@@ -0,0 +1,216 @@
+import argparse
+import asyncio
+import gzip
+import re
+import time
+import xml.etree.ElementTree as ET
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit, urlunsplit
+import requests
+from validacion import es_Pagina_Error, leer_Titulo, sesion, titulo_Html
+
+# Tipos de archivo que no son páginas auditables
+EXTENSIONES_IGNORADAS = re.compile(r'\.(jpe?g|png|gif|svg|webp|ico|pdf|zip|mp4|mp3|css|js|json|xml|txt|woff2?)$', re.IGNORECASE)
+
+# Normaliza una URL para la frontera: esquema y host en minúsculas, sin puerto por defecto,
+# sin fragmento y con la ruta vacía como "/"
+def normalizar_Url(url):
+    partes = urlsplit(url.strip())
+    esquema = partes.scheme.lower()
+    host = (partes.hostname or '').lower()
+    if partes.port and not (esquema == 'http' and partes.port == 80) and not (esquema == 'https' and partes.port == 443):
+        host += f':{partes.port}'
+    return urlunsplit((esquema, host, partes.path or '/', partes.query, ''))
+
+def mismo_Origen(url, origen):
+    a, b = urlsplit(url), urlsplit(origen)
+    return (a.scheme, a.netloc.lower()) == (b.scheme, b.netloc.lower())
+
+# Extrae los href de <a> sin construir el DOM
+class _Enlaces(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.enlaces = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            for nombre, valor in attrs:
+                if nombre == 'href' and valor:
+                    self.enlaces.append(valor)
+
+def extraer_Enlaces(html, base):
+    parser = _Enlaces()
+    parser.feed(html)
+    return [urljoin(base, enlace) for enlace in parser.enlaces if not enlace.startswith(('mailto:', 'tel:', 'javascript:', '#'))]
+
+# Entradas <loc> de un sitemap: (sitemaps hijos si es un índice, URLs de páginas si es un urlset)
+def leer_Sitemap(contenido):
+    if contenido[:2] == b'\x1f\x8b':
+        contenido = gzip.decompress(contenido)
+    raiz = ET.fromstring(contenido)
+    locs = [elemento.text.strip() for elemento in raiz.iter() if elemento.tag.endswith('loc') and elemento.text]
+    if raiz.tag.endswith('sitemapindex'):
+        return locs, []
+    return [], locs
+
+# Limita las solicitudes por host: concurrencia máxima y pausa mínima entre solicitudes
+class Cortesia:
+    def __init__(self, porHost=2, pausa=0.25):
+        self.porHost = porHost
+        self.pausa = pausa
+        self.semaforos = {}
+        self.ultimas = {}
+        self.bloqueos = {}
+
+    async def esperar(self, url):
+        host = urlsplit(url).netloc
+        if host not in self.semaforos:
+            self.semaforos[host] = asyncio.Semaphore(self.porHost)
+            self.bloqueos[host] = asyncio.Lock()
+            self.ultimas[host] = 0
+        await self.semaforos[host].acquire()
+        async with self.bloqueos[host]:
+            espera = self.ultimas[host] + self.pausa - time.monotonic()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            self.ultimas[host] = time.monotonic()
+        return host
+
+    def liberar(self, host):
+        self.semaforos[host].release()
+
+# Descubre las URLs de un sitio desde su sitemap.xml (e índices de sitemaps) y, opcionalmente,
+# rastreando enlaces del mismo origen. Las solicitudes corren en paralelo con un límite global
+# y cortesía por host; la frontera deduplica por URL normalizada. Las páginas rastreadas que
+# responden distinto de 200 o muestran la página de error de Entel se descartan. Con
+# verificar=False las páginas del sitemap se aceptan sin visitarlas (lighthouse.py ya las valida).
+class Descubridor:
+    def __init__(self, origen, sitemaps=None, rastrear=False, verificar=True, maxPaginas=1000, concurrencia=8, porHost=2, pausa=0.25):
+        self.origen = normalizar_Url(origen)
+        self.sitemaps = sitemaps or [urljoin(self.origen, '/sitemap.xml')]
+        self.rastrear = rastrear
+        self.verificar = verificar
+        self.maxPaginas = maxPaginas
+        self.semaforo = None
+        self.concurrencia = concurrencia
+        self.cortesia = Cortesia(porHost, pausa)
+        self.vistas = set()
+        self.encontradas = []
+        self.descartadas = {}
+
+    async def _get(self, url):
+        host = await self.cortesia.esperar(url)
+        try:
+            async with self.semaforo:
+                # El cliente HTTP es requests con Sessions keep-alive por hilo; asyncio solo orquesta.
+                # sesion() se llama dentro del hilo: llamarla aquí daría la Session del hilo del bucle
+                return await asyncio.to_thread(lambda: sesion().get(url, allow_redirects=True, stream=True, timeout=30))
+        finally:
+            self.cortesia.liberar(host)
+
+    def _agregar(self, url, cola):
+        if not url.startswith(('http://', 'https://')) or EXTENSIONES_IGNORADAS.search(urlsplit(url).path):
+            return
+        url = normalizar_Url(url)
+        if url in self.vistas or not mismo_Origen(url, self.origen) or len(self.vistas) >= self.maxPaginas:
+            return
+        self.vistas.add(url)
+        cola.put_nowait(url)
+
+    async def _sitemap(self, url, cola, sitemapsVistos):
+        if url in sitemapsVistos:
+            return
+        sitemapsVistos.add(url)
+        try:
+            response = await self._get(url)
+            with response:
+                if response.status_code != 200:
+                    print(f"Sitemap {url}: {response.status_code}")
+                    return
+                contenido = await asyncio.to_thread(lambda: response.content)
+            hijos, paginas = leer_Sitemap(contenido)
+        except (requests.RequestException, ET.ParseError, OSError) as e:
+            print(f"Error al leer el sitemap {url}: {e}")
+            return
+        await asyncio.gather(*[self._sitemap(hijo, cola, sitemapsVistos) for hijo in hijos])
+        for pagina in paginas:
+            self._agregar(pagina, cola)
+
+    # Visita una página: la descarta si es un error y, al rastrear, agrega sus enlaces
+    async def _pagina(self, url, cola):
+        if not self.rastrear and not self.verificar:
+            self.encontradas.append(url)
+            return
+        try:
+            response = await self._get(url)
+            with response:
+                if response.status_code != 200:
+                    self.descartadas[url] = response.status_code
+                    return
+                if not self.rastrear:
+                    titulo = await asyncio.to_thread(leer_Titulo, response)
+                    html = None
+                else:
+                    contenido = await asyncio.to_thread(lambda: response.content)
+                    # Sin charset en la cabecera requests asume ISO-8859-1; las páginas de Entel son UTF-8
+                    codificacion = response.encoding if 'charset=' in response.headers.get('Content-Type', '').lower() else 'utf-8'
+                    html = contenido.decode(codificacion, errors='replace')
+                    titulo = titulo_Html(contenido, response.headers.get('Content-Type', ''))
+        except (requests.RequestException, LookupError) as e:
+            self.descartadas[url] = str(e)
+            return
+
+        if es_Pagina_Error(titulo):
+            self.descartadas[url] = "Página de Error Detectada"
+            return
+        self.encontradas.append(url)
+
+        if html and 'text/html' in response.headers.get('Content-Type', 'text/html'):
+            for enlace in extraer_Enlaces(html, response.url):
+                self._agregar(enlace, cola)
+
+    async def _trabajador(self, cola):
+        while True:
+            url = await cola.get()
+            try:
+                await self._pagina(url, cola)
+            finally:
+                cola.task_done()
+
+    async def descubrir(self):
+        self.semaforo = asyncio.Semaphore(self.concurrencia)
+        cola = asyncio.Queue()
+        trabajadores = [asyncio.create_task(self._trabajador(cola)) for _ in range(self.concurrencia)]
+
+        await asyncio.gather(*[self._sitemap(sitemap, cola, set()) for sitemap in self.sitemaps])
+        if self.rastrear:
+            self._agregar(self.origen, cola)
+        await cola.join()
+
+        for trabajador in trabajadores:
+            trabajador.cancel()
+        await asyncio.gather(*trabajadores, return_exceptions=True)
+        return sorted(self.encontradas)
+
+# Atajo sincrónico para lighthouse.py
+def descubrir_Urls(origen, **opciones):
+    return asyncio.run(Descubridor(origen, **opciones).descubrir())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Genera la lista de URLs de un sitio desde su sitemap y rastreando enlaces')
+    parser.add_argument('origen', help='URL base del sitio, por ejemplo https://www.entel.cl/')
+    parser.add_argument('--sitemap', action='append', help='Sitemap a leer (por defecto <origen>/sitemap.xml); se puede repetir')
+    parser.add_argument('--rastrear', action='store_true', help='Seguir también los enlaces del mismo origen')
+    parser.add_argument('--max-paginas', type=int, default=1000)
+    parser.add_argument('--concurrencia', type=int, default=8)
+    parser.add_argument('--por-host', type=int, default=2, help='Solicitudes simultáneas por host')
+    parser.add_argument('--pausa', type=float, default=0.25, help='Segundos mínimos entre solicitudes al mismo host')
+    parser.add_argument('--salida', default='urls.txt')
+    args = parser.parse_args()
+
+    inicio = time.time()
+    urls = descubrir_Urls(args.origen, sitemaps=args.sitemap, rastrear=args.rastrear, maxPaginas=args.max_paginas,
+                          concurrencia=args.concurrencia, porHost=args.por_host, pausa=args.pausa)
+    with open(args.salida, 'w') as archivo:
+        archivo.write('\n'.join(urls) + '\n')
+    print(f"{len(urls)} URLs guardadas en {args.salida} ({round(time.time() - inicio, 2)} segundos)")
@@ -0,0 +1,8 @@
+# Percentil por interpolación lineal sobre valores ya ordenados
+def percentil(valores, p):
+    if not valores:
+        return None
+    posicion = (len(valores) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(valores) - 1)
+    return valores[inferior] + (valores[superior] - valores[inferior]) * (posicion - inferior)
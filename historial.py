@@ -0,0 +1,207 @@
+import argparse
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from estadistica import percentil
+
+CATEGORIAS = ['performance', 'accessibility', 'seo']
+
+def _puntuacion(valor):
+    # "N/A" (Lighthouse no pudo calcularla) y None se guardan como NULL
+    return valor if isinstance(valor, (int, float)) else None
+
+# Base de datos histórica de resultados: cada ejecución de lighthouse.py agrega sus filas
+# y las consultas de tendencia/regresiones no necesitan abrir los Excel de cada día
+class HistorialResultados:
+    def __init__(self, pathHistorial='historial.sqlite'):
+        self.bloqueo = threading.Lock()
+        self.conexion = sqlite3.connect(pathHistorial, check_same_thread=False)
+        self.conexion.executescript('''
+            CREATE TABLE IF NOT EXISTS ejecuciones (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fecha TEXT NOT NULL,
+                excel TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_ejecuciones_fecha ON ejecuciones (fecha);
+            CREATE TABLE IF NOT EXISTS resultados (
+                ejecucion INTEGER NOT NULL REFERENCES ejecuciones (id),
+                url TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                performance REAL,
+                accessibility REAL,
+                seo REAL,
+                codigo TEXT,
+                descripcion TEXT,
+                muestras INTEGER,
+                varianza REAL,
+                sobrecarga TEXT,
+                perfil TEXT,
+                PRIMARY KEY (ejecucion, url, mode)
+            );
+            CREATE INDEX IF NOT EXISTS idx_resultados_url ON resultados (url, mode, ejecucion);
+        ''')
+        # Historiales creados antes del modo muestreo, de la concurrencia adaptativa o de los perfiles no tienen sus columnas
+        columnas = [fila[1] for fila in self.conexion.execute('PRAGMA table_info(resultados)')]
+        for columna, tipo in [('muestras', 'INTEGER'), ('varianza', 'REAL'), ('sobrecarga', 'TEXT'), ('perfil', 'TEXT')]:
+            if columna not in columnas:
+                self.conexion.execute(f'ALTER TABLE resultados ADD COLUMN {columna} {tipo}')
+        self.conexion.commit()
+
+    def iniciar_Ejecucion(self, pathExcel=None):
+        with self.bloqueo:
+            cursor = self.conexion.execute(
+                'INSERT INTO ejecuciones (fecha, excel) VALUES (?, ?)',
+                (datetime.now().isoformat(timespec='seconds'), pathExcel)
+            )
+            self.conexion.commit()
+            return cursor.lastrowid
+
+    # Guarda (o reemplaza, al retomar una ejecución) los resultados de una URL en ambos modos
+    def registrar(self, ejecucion, url, puntuacionesMOBILE, puntuacionesDESKTOP, codigo, descripcionCodigo):
+        filas = [
+            (ejecucion, url, mode, *[_puntuacion(puntuaciones[categoria]) for categoria in CATEGORIAS], str(codigo), descripcionCodigo,
+             puntuaciones.get('muestras'), puntuaciones.get('varianza'), puntuaciones.get('sobrecarga'), puntuaciones.get('perfil'))
+            for mode, puntuaciones in [('mobile', puntuacionesMOBILE), ('desktop', puntuacionesDESKTOP)]
+        ]
+        with self.bloqueo:
+            self.conexion.executemany(
+                'INSERT OR REPLACE INTO resultados (ejecucion, url, mode, performance, accessibility, seo, codigo, descripcion, muestras, varianza, sobrecarga, perfil) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', filas
+            )
+            self.conexion.commit()
+
+    def ejecuciones(self, limite=20):
+        with self.bloqueo:
+            return self.conexion.execute(
+                'SELECT e.id, e.fecha, e.excel, COUNT(r.url) FROM ejecuciones e LEFT JOIN resultados r ON r.ejecucion = e.id '
+                'GROUP BY e.id ORDER BY e.id DESC LIMIT ?', (limite,)
+            ).fetchall()
+
+    def ultimas_Ejecuciones(self, cantidad=2):
+        with self.bloqueo:
+            return [fila[0] for fila in self.conexion.execute(
+                'SELECT DISTINCT ejecucion FROM resultados ORDER BY ejecucion DESC LIMIT ?', (cantidad,)
+            ).fetchall()]
+
+    # Evolución de las puntuaciones de una URL en los últimos días: [(fecha, mode, performance, accessibility, seo)]
+    def tendencia(self, url, mode=None, dias=90):
+        desde = (datetime.now() - timedelta(days=dias)).isoformat(timespec='seconds')
+        consulta = (
+            'SELECT e.fecha, r.mode, r.performance, r.accessibility, r.seo FROM resultados r '
+            'JOIN ejecuciones e ON e.id = r.ejecucion WHERE r.url = ? AND e.fecha >= ?'
+        )
+        parametros = [url, desde]
+        if mode:
+            consulta += ' AND r.mode = ?'
+            parametros.append(mode)
+        with self.bloqueo:
+            return self.conexion.execute(consulta + ' ORDER BY r.ejecucion, r.mode', parametros).fetchall()
+
+    # Mayores caídas de una categoría entre dos ejecuciones: [(url, mode, antes, despues, diferencia)]
+    def regresiones(self, ejecucionAntes, ejecucionDespues, categoria='performance', limite=20):
+        if categoria not in CATEGORIAS:
+            raise ValueError(f"Categoría desconocida: {categoria}")
+        with self.bloqueo:
+            return self.conexion.execute(
+                f'SELECT a.url, a.mode, a.{categoria}, d.{categoria}, d.{categoria} - a.{categoria} AS diferencia '
+                'FROM resultados a JOIN resultados d ON d.url = a.url AND d.mode = a.mode '
+                f'WHERE a.ejecucion = ? AND d.ejecucion = ? AND a.{categoria} IS NOT NULL AND d.{categoria} IS NOT NULL '
+                'AND diferencia < 0 ORDER BY diferencia LIMIT ?',
+                (ejecucionAntes, ejecucionDespues, limite)
+            ).fetchall()
+
+    # Percentiles de una categoría por modo en una ejecución: {mode: {p: valor}}
+    def percentiles(self, ejecucion, categoria='performance', ps=(50, 75, 90, 95)):
+        if categoria not in CATEGORIAS:
+            raise ValueError(f"Categoría desconocida: {categoria}")
+        resumen = {}
+        with self.bloqueo:
+            for mode in ['mobile', 'desktop']:
+                valores = [fila[0] for fila in self.conexion.execute(
+                    f'SELECT {categoria} FROM resultados WHERE ejecucion = ? AND mode = ? AND {categoria} IS NOT NULL ORDER BY {categoria}',
+                    (ejecucion, mode)
+                ).fetchall()]
+                resumen[mode] = {p: percentil(valores, p) for p in ps}
+        return resumen
+
+    # Genera el Excel de una ejecución desde la base de datos
+    def exportar_Excel(self, ejecucion, pathExcel):
+        from resultados import ResultadosExcel
+
+        with self.bloqueo:
+            filas = self.conexion.execute(
+                'SELECT url, mode, performance, accessibility, seo, codigo, descripcion, muestras, varianza, sobrecarga, perfil FROM resultados '
+                'WHERE ejecucion = ? ORDER BY rowid', (ejecucion,)
+            ).fetchall()
+
+        porUrl = {}
+        for url, mode, performance, accessibility, seo, codigo, descripcion, muestras, varianza, sobrecarga, perfil in filas:
+            datos = porUrl.setdefault(url, {'codigo': int(codigo) if codigo.isdigit() else codigo, 'descripcion': descripcion})
+            datos[mode] = {'performance': _entero(performance), 'accessibility': _entero(accessibility), 'seo': _entero(seo), 'muestras': muestras,
+                           'varianza': varianza, 'sobrecarga': sobrecarga, 'perfil': perfil}
+
+        # Las columnas del muestreo, de la sobrecarga y del perfil solo se agregan si la ejecución los usó
+        muestreo = any(fila[7] is not None for fila in filas)
+        carga = any(fila[9] is not None for fila in filas)
+        perfil = any(fila[10] not in (None, 'completo') for fila in filas)
+        sumidero = ResultadosExcel(pathExcel, muestreo=muestreo, carga=carga, perfil=perfil)
+        vacias = {'performance': None, 'accessibility': None, 'seo': None}
+        for url, datos in porUrl.items():
+            sumidero.registrar(url, datos.get('mobile', vacias), datos.get('desktop', vacias), datos['codigo'], datos['descripcion'])
+        sumidero.cerrar()
+        return len(porUrl)
+
+    def cerrar(self):
+        with self.bloqueo:
+            self.conexion.close()
+
+def _entero(valor):
+    return int(valor) if valor is not None else None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Consultas sobre el historial de resultados de Lighthouse')
+    parser.add_argument('--db', default='historial.sqlite', help='Archivo SQLite del historial')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    subparsers.add_parser('ejecuciones', help='Listar las últimas ejecuciones')
+    tendencia = subparsers.add_parser('tendencia', help='Evolución de una URL')
+    tendencia.add_argument('url')
+    tendencia.add_argument('--mode', choices=['mobile', 'desktop'])
+    tendencia.add_argument('--dias', type=int, default=90)
+    regresiones = subparsers.add_parser('regresiones', help='Mayores caídas entre dos ejecuciones (por defecto las dos últimas)')
+    regresiones.add_argument('--antes', type=int)
+    regresiones.add_argument('--despues', type=int)
+    regresiones.add_argument('--categoria', choices=CATEGORIAS, default='performance')
+    regresiones.add_argument('--limite', type=int, default=20)
+    percentiles = subparsers.add_parser('percentiles', help='Percentiles de una categoría en una ejecución (por defecto la última)')
+    percentiles.add_argument('--ejecucion', type=int)
+    percentiles.add_argument('--categoria', choices=CATEGORIAS, default='performance')
+    exportar = subparsers.add_parser('exportar', help='Generar el Excel de una ejecución (por defecto la última)')
+    exportar.add_argument('--ejecucion', type=int)
+    exportar.add_argument('--salida')
+    args = parser.parse_args()
+
+    historial = HistorialResultados(args.db)
+    if args.comando == 'ejecuciones':
+        for id, fecha, excel, filas in historial.ejecuciones():
+            print(f"{id:>5}  {fecha}  {filas:>6} resultados  {excel or ''}")
+    elif args.comando == 'tendencia':
+        for fecha, mode, performance, accessibility, seo in historial.tendencia(args.url, args.mode, args.dias):
+            print(f"{fecha}  {mode:<8} performance {performance}  accesibilidad {accessibility}  seo {seo}")
+    elif args.comando == 'regresiones':
+        ultimas = historial.ultimas_Ejecuciones(2)
+        despues = args.despues or (ultimas[0] if ultimas else None)
+        antes = args.antes or (ultimas[1] if len(ultimas) > 1 else None)
+        if antes is None or despues is None:
+            parser.error("Se necesitan dos ejecuciones para comparar")
+        print(f"Regresiones de {args.categoria} entre las ejecuciones {antes} y {despues}:")
+        for url, mode, valorAntes, valorDespues, diferencia in historial.regresiones(antes, despues, args.categoria, args.limite):
+            print(f"  {diferencia:>+6.0f}  {valorAntes:>4.0f} -> {valorDespues:<4.0f} {mode:<8} {url}")
+    elif args.comando == 'percentiles':
+        ejecucion = args.ejecucion or (historial.ultimas_Ejecuciones(1) or [None])[0]
+        for mode, valores in historial.percentiles(ejecucion, args.categoria).items():
+            print(f"{mode:<8} " + '  '.join(f"p{p} {valor:.1f}" if valor is not None else f"p{p} -" for p, valor in valores.items()))
+    else:
+        ejecucion = args.ejecucion or (historial.ultimas_Ejecuciones(1) or [None])[0]
+        salida = args.salida or f'resultados_ejecucion_{ejecucion}.xlsx'
+        print(f"{historial.exportar_Excel(ejecucion, salida)} URLs exportadas a {salida}")
+    historial.cerrar()
@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from estadistica import percentil
+
+# Tramo en curso: etiquetas y datos extra (CPU, RSS, resultado) que se agregan antes de cerrarlo
+class Tramo:
+    def __init__(self, etapa, etiquetas):
+        self.etapa = etapa
+        self.etiquetas = etiquetas
+        self.datos = {}
+
+    # Agrega el uso de CPU y memoria de un proceso hijo (rusage de wait4; None si no se midió)
+    def proceso(self, uso):
+        if uso is None:
+            return
+        self.datos['cpu_s'] = round(uso.ru_utime + uso.ru_stime, 3)
+        # ru_maxrss está en KB en Linux
+        self.datos['rss_max_mb'] = round(uso.ru_maxrss / 1024, 1)
+
+# Tiempos por etapa de una ejecución (validación, auditoría mobile/desktop, extracción, escritura).
+# Cada tramo se escribe como una línea JSON apenas termina y se acumula en memoria para el
+# archivo de texto de Prometheus (formato del textfile collector de node_exporter) del final.
+class Instrumentacion:
+    def __init__(self, pathJsonl=None, pathPrometheus=None):
+        self.pathPrometheus = pathPrometheus
+        self.bloqueo = threading.Lock()
+        self.archivo = open(pathJsonl, 'a', encoding='utf-8') if pathJsonl else None
+        self.inicio = time.time()
+        self.duraciones = {}
+        self.cpu = {}
+        self.rss = {}
+
+    @contextmanager
+    def tramo(self, etapa, **etiquetas):
+        tramo = Tramo(etapa, etiquetas)
+        inicio = time.time()
+        try:
+            yield tramo
+        finally:
+            self._registrar(tramo, inicio, time.time() - inicio)
+
+    def _registrar(self, tramo, inicio, duracion):
+        # Las series se separan por etapa y modo; la URL solo va en las líneas JSON
+        clave = (tramo.etapa, tramo.etiquetas.get('mode'))
+        with self.bloqueo:
+            self.duraciones.setdefault(clave, []).append(duracion)
+            if 'cpu_s' in tramo.datos:
+                self.cpu[clave] = self.cpu.get(clave, 0) + tramo.datos['cpu_s']
+                self.rss[clave] = max(self.rss.get(clave, 0), tramo.datos['rss_max_mb'])
+            if self.archivo:
+                registro = {'etapa': tramo.etapa, **tramo.etiquetas, 'inicio': datetime.fromtimestamp(inicio).isoformat(timespec='milliseconds'),
+                            'duracion_s': round(duracion, 4), **tramo.datos}
+                self.archivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+                self.archivo.flush()
+
+    # Resumen por etapa: {(etapa, mode): (cantidad, total, p50, p95, max)}
+    def resumen(self):
+        with self.bloqueo:
+            resultado = {}
+            for clave, valores in self.duraciones.items():
+                ordenados = sorted(valores)
+                resultado[clave] = (len(ordenados), sum(ordenados), percentil(ordenados, 50), percentil(ordenados, 95), ordenados[-1])
+            return resultado
+
+    def prometheus(self):
+        lineas = [
+            '# HELP lighthouse_etapa_segundos Duración de cada etapa del pipeline de lighthouse.py',
+            '# TYPE lighthouse_etapa_segundos summary'
+        ]
+        resumen = self.resumen()
+        for (etapa, mode), (cantidad, total, p50, p95, _) in sorted(resumen.items(), key=lambda item: (item[0][0], item[0][1] or '')):
+            etiquetas = f'etapa="{etapa}"' + (f',mode="{mode}"' if mode else '')
+            lineas.append(f'lighthouse_etapa_segundos{{{etiquetas},quantile="0.5"}} {p50:.6f}')
+            lineas.append(f'lighthouse_etapa_segundos{{{etiquetas},quantile="0.95"}} {p95:.6f}')
+            lineas.append(f'lighthouse_etapa_segundos_sum{{{etiquetas}}} {total:.6f}')
+            lineas.append(f'lighthouse_etapa_segundos_count{{{etiquetas}}} {cantidad}')
+        lineas += ['# HELP lighthouse_etapa_segundos_max Duración máxima de cada etapa', '# TYPE lighthouse_etapa_segundos_max gauge']
+        for (etapa, mode), (_, _, _, _, maximo) in sorted(resumen.items(), key=lambda item: (item[0][0], item[0][1] or '')):
+            etiquetas = f'etapa="{etapa}"' + (f',mode="{mode}"' if mode else '')
+            lineas.append(f'lighthouse_etapa_segundos_max{{{etiquetas}}} {maximo:.6f}')
+        with self.bloqueo:
+            lineas += ['# HELP lighthouse_proceso_cpu_segundos_total CPU de Lighthouse y Chrome (procesos hijos)', '# TYPE lighthouse_proceso_cpu_segundos_total counter']
+            lineas += [f'lighthouse_proceso_cpu_segundos_total{{mode="{mode}"}} {cpu:.3f}' for (_, mode), cpu in sorted(self.cpu.items())]
+            lineas += ['# HELP lighthouse_proceso_rss_max_bytes Memoria residente máxima de un proceso hijo', '# TYPE lighthouse_proceso_rss_max_bytes gauge']
+            lineas += [f'lighthouse_proceso_rss_max_bytes{{mode="{mode}"}} {int(rss * 1024 * 1024)}' for (_, mode), rss in sorted(self.rss.items())]
+        lineas += [
+            '# HELP lighthouse_ejecucion_segundos Duración total de la ejecución',
+            '# TYPE lighthouse_ejecucion_segundos gauge',
+            f'lighthouse_ejecucion_segundos {time.time() - self.inicio:.3f}',
+            '# HELP lighthouse_ejecucion_fin_timestamp_segundos Momento en que terminó la ejecución',
+            '# TYPE lighthouse_ejecucion_fin_timestamp_segundos gauge',
+            f'lighthouse_ejecucion_fin_timestamp_segundos {time.time():.0f}'
+        ]
+        return '\n'.join(lineas) + '\n'
+
+    def imprimir_Resumen(self):
+        print("Tiempos por etapa:")
+        for (etapa, mode), (cantidad, total, p50, p95, maximo) in sorted(self.resumen().items(), key=lambda item: -item[1][1]):
+            nombre = f"{etapa} {mode}" if mode else etapa
+            print(f"  {nombre:<20} {cantidad:>6} x  total {total:>9.2f} s  p50 {p50:>7.3f} s  p95 {p95:>7.3f} s  max {maximo:>7.3f} s")
+
+    def cerrar(self):
+        if self.pathPrometheus:
+            # Escritura atómica: el collector nunca lee un archivo a medio escribir
+            temporal = self.pathPrometheus + '.tmp'
+            with open(temporal, 'w', encoding='utf-8') as archivo:
+                archivo.write(self.prometheus())
+            os.replace(temporal, self.pathPrometheus)
+        with self.bloqueo:
+            if self.archivo:
+                self.archivo.close()
+                self.archivo = None
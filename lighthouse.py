@@ -1,300 +1,172 @@
-from datetime import datetime
-import json
+import argparse
 import os
-import re
-import time
-import subprocess
-from bs4 import BeautifulSoup
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from openpyxl import Workbook, load_workbook
-
-# Crear carpetas si no existen y asegurarse de que tienen los permisos adecuados
-def crear_carpetas():
-    for carpeta in ['HTMLMobile', 'HTMLDesktop']:
-        if not os.path.exists(carpeta):
-            os.makedirs(carpeta)
-        os.chmod(carpeta, 0o777)
-
-# Función para verificar si una URL responde con un código de estado 200 y saltar pagina 404 de Entel
-def validar_Url(url):
+import socket
+import sys
+from perfiles import PERFIL_POR_DEFECTO, PERFILES
+
+# Punto de entrada de las auditorías Lighthouse. Cada subcomando importa solo los módulos que usa:
+# --help, validar, extraer o exportar no cargan openpyxl, asyncio ni el pipeline de auditoría.
+#   auditar   valida y audita urls.txt (o --descubrir) y escribe el Excel; es el subcomando por defecto
+#   validar   solo valida las URLs
+#   extraer   puntuaciones de reportes ya generados
+#   exportar  Excel de una ejecución guardada en historial.sqlite
+#   pdf       convierte los reportes HTML a PDF
+# Desde otro programa: lighthouse.main(['auditar', '--trabajadores', '4'])
+
+def leer_Urls(pathUrls):
+    with open(pathUrls, 'r') as archivo:
+        return [url for url in archivo.read().splitlines() if url.strip()]
+
+def opciones_Auditoria(parser):
+    parser.add_argument('--excel-por-url', action='store_true', help='Abrir y guardar el Excel por cada URL (comportamiento anterior)')
+    parser.add_argument('--flush-cada', type=int, default=0, help='Escribir el Excel cada N resultados (0 = solo al terminar)')
+    parser.add_argument('--trabajadores', type=int, default=1, help='Número de auditorías Lighthouse concurrentes')
+    parser.add_argument('--concurrencia-adaptativa', action='store_true', help='Ajustar las auditorías concurrentes (hasta --trabajadores) según CPU, load average, memoria y benchmarkIndex del host')
+    parser.add_argument('--trabajadores-min', type=int, default=1, help='Con --concurrencia-adaptativa, mínimo de auditorías concurrentes')
+    parser.add_argument('--cpu-objetivo', type=float, default=80, help='Con --concurrencia-adaptativa, porcentaje de CPU del host que no se debe superar')
+    parser.add_argument('--memoria-min', type=float, default=1024, help='Con --concurrencia-adaptativa, MB de memoria disponible que se deben conservar')
+    parser.add_argument('--factor-benchmark', type=float, default=0.8, help='Con --concurrencia-adaptativa, el host está sobrecargado si el benchmarkIndex cae bajo esta fracción del habitual')
+    parser.add_argument('--reintentos-carga', type=int, default=1, help='Con --concurrencia-adaptativa, veces que se repite una auditoría hecha con el host sobrecargado antes de marcarla')
+    parser.add_argument('--motor', choices=['hilos', 'asyncio'], default='hilos', help='hilos: un hilo por validación y por auditoría; asyncio: validación y auditorías como tareas de un solo bucle de eventos')
+    parser.add_argument('--puerto-base', type=int, default=9222, help='Con --chrome-persistente: puerto de depuración de Chrome del primer trabajador (los siguientes usan puerto-base + i)')
+    parser.add_argument('--perfil', choices=list(PERFILES), default=PERFIL_POR_DEFECTO, help='Perfil de auditoría: completo (configuración por defecto de Lighthouse), estandar (solo performance, accesibilidad y SEO) o triage (además sin capturas de pantalla y solo reporte JSON)')
+    parser.add_argument('--formato-reporte', choices=['json,html', 'json', 'html'], help='Formatos de reporte de Lighthouse (por defecto los del --perfil); las puntuaciones se leen del JSON cuando existe')
+    parser.add_argument('--concurrencia-validacion', type=int, default=16, help='Número de URLs validadas en paralelo antes de las auditorías')
+    parser.add_argument('--chrome-persistente', action='store_true', help='Reutilizar un Chrome de larga duración por trabajador en vez de lanzar uno por auditoría')
+    parser.add_argument('--auditorias-por-chrome', type=int, default=50, help='Reiniciar el Chrome persistente después de N auditorías')
+    parser.add_argument('--memoria-max-chrome', type=int, default=1024, help='Reiniciar el Chrome persistente si supera N MB de memoria residente')
+    parser.add_argument('--pdf', action='store_true', help='Convertir cada reporte HTML a PDF (PDFMobile/PDFDesktop) mientras siguen las auditorías')
+    parser.add_argument('--trabajadores-pdf', type=int, default=2, help='Sesiones de Chrome para la conversión a PDF')
+    parser.add_argument('--almacen-reportes', action='store_true', help='Guardar los reportes comprimidos (con el hash de su contenido como nombre) en reportes/ en vez de HTMLMobile/HTMLDesktop')
+    parser.add_argument('--compresion', choices=['gzip', 'zstd'], default='gzip', help='Compresión del almacén de reportes (zstd requiere el paquete zstandard)')
+    parser.add_argument('--metricas', action='store_true', help='Guardar LCP, TBT, CLS, FCP, Speed Index y TTI de cada reporte en metricas.sqlite')
+    parser.add_argument('--sin-historial', action='store_true', help='No agregar los resultados a historial.sqlite')
+    parser.add_argument('--sin-excel', action='store_true', help='No generar el Excel (se puede exportar después con historial.py exportar)')
+    parser.add_argument('--muestras-max', type=int, default=1, help='Auditorías máximas por URL y modo; con más de 1 se informa la ejecución mediana')
+    parser.add_argument('--muestras-min', type=int, default=2, help='Auditorías que se lanzan en paralelo en cada ronda del muestreo')
+    parser.add_argument('--umbral-desviacion', type=float, default=5, help='Detener el muestreo cuando la desviación estándar de performance baje de este valor')
+    parser.add_argument('--descubrir', metavar='ORIGEN', help='Auditar las URLs del sitemap.xml de este sitio en vez de urls.txt')
+    parser.add_argument('--sitemap', action='append', help='Sitemap a leer con --descubrir (por defecto <origen>/sitemap.xml); se puede repetir')
+    parser.add_argument('--rastrear', action='store_true', help='Con --descubrir, seguir también los enlaces del mismo origen')
+    parser.add_argument('--max-paginas', type=int, default=1000, help='Máximo de URLs descubiertas')
+    parser.add_argument('--plazo-auditoria', type=float, default=300, help='Segundos máximos por auditoría incluidos los reintentos; al vencer se termina Lighthouse y su Chrome (0 = sin plazo)')
+    parser.add_argument('--reintentos', type=int, default=2, help='Reintentos de una auditoría que falló por un error transitorio de Lighthouse o Chrome')
+    parser.add_argument('--espera-reintento', type=float, default=5, help='Segundos de espera antes del primer reintento (se duplica en cada uno)')
+    parser.add_argument('--tiempos', metavar='ARCHIVO', help='Escribir la duración de cada etapa (validación, auditoría, extracción, escritura) como líneas JSON')
+    parser.add_argument('--prometheus', metavar='ARCHIVO', help='Escribir al terminar un resumen de tiempos por etapa en formato de texto de Prometheus (.prom)')
+    parser.add_argument('--cola', metavar='DESTINO', help='Repartir las auditorías entre máquinas con una cola compartida (archivo .sqlite o carpeta; también sqlite:ruta o archivos:carpeta)')
+    parser.add_argument('--rol', choices=['coordinador', 'trabajador'], default='coordinador', help='Con --cola: el coordinador valida, encola y reúne los resultados; los trabajadores auditan')
+    parser.add_argument('--lease', type=float, default=60, help='Segundos del lease de un trabajo de la cola; el trabajador lo renueva mientras audita')
+    parser.add_argument('--id-trabajador', default=f'{socket.gethostname()}-{os.getpid()}', help='Nombre de este trabajador en la cola')
+    parser.add_argument('--resume', action='store_true', help='Retomar la ejecución anterior desde bitacora.jsonl: solo se audita lo que falta y se reconstruye su Excel')
+    parser.add_argument('--cache', action='store_true', help='Reutilizar auditorías de páginas que no cambiaron (cache_auditorias.sqlite)')
+    parser.add_argument('--cache-ttl', type=float, default=24, help='Horas de validez de una auditoría en cache (0 = sin vencimiento)')
+    parser.add_argument('--cache-max', type=int, default=10000, help='Máximo de entradas del cache; se eliminan las menos usadas')
+    parser.add_argument('--canonizar', action='store_true', help='Auditar una sola vez las URLs que llegan a la misma página (después de redirecciones y de --reglas-canonicas) y repetir el resultado en cada una')
+    parser.add_argument('--reglas-canonicas', default='seguimiento,orden,barra', help='Con --canonizar, reglas separadas por coma: seguimiento, orden, query, barra, www, https')
+    parser.add_argument('--refrescar-cache', action='store_true', help='Auditar todo de nuevo y actualizar el cache')
+
+def comando_Auditar(args):
+    from auditoria import ejecutar
+    ejecutar(args)
+
+def comando_Validar(args):
+    from validacion import validar_Urls
+    validaciones = validar_Urls(leer_Urls(args.urls), args.concurrencia)
+    validas = [url for url, (codigo, _, _, _) in validaciones.items() if codigo == 200]
+    for url, (codigo, descripcion, _, urlFinal) in validaciones.items():
+        redireccion = f" -> {urlFinal}" if urlFinal and urlFinal != url else ''
+        print(f"{codigo if codigo is not None else 'Error':<6} {url}{redireccion}  {descripcion}")
+    print(f"{len(validas)} de {len(validaciones)} URLs válidas")
+    if args.salida:
+        with open(args.salida, 'w') as archivo:
+            archivo.write(''.join(f'{url}\n' for url in validas))
+    return 0 if len(validas) == len(validaciones) else 1
+
+def comando_Extraer(args):
+    import json
+    from metricas import buscar_Reportes
+    from reportes import extraer_Puntuaciones, path_Json
+
+    paths = args.paths or [carpeta for carpeta in ['HTMLMobile', 'HTMLDesktop', 'reportes'] if os.path.isdir(carpeta)]
+    salida = open(args.salida, 'w', encoding='utf-8') if args.salida else sys.stdout
     try:
-        response = requests.head(url, allow_redirects=True)
-        codigo = response.status_code
-        if codigo == 200:
-            response = requests.get(url)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            titulo = soup.title.string if soup.title else ""
-
-            if "Error" in titulo or "Página de Error | Entel" in titulo:
-                codigo = 404
-                descripcion = "Redireccion - Página de Error Detectada"
-                print(f"Error al verificar la URL {url}: {codigo} {descripcion}")
-            else:
-                descripcion = "OK"
-        else:
-            descripcion = requests.status_codes._codes[codigo][0].replace('_', ' ').title()
-
-        return codigo, descripcion
-    except requests.RequestException as e:
-        print(f"Error al verificar la URL {url}: {e}")
-        return None, str(e)
-
-# Función para ejecutar Lighthouse en una URL específica (Mobile - Desktop)
-# def auditoria_Lighthouse(url, mode):
-#     nombreLimpio = re.sub(r'[^\w.-]', '_', url)
-#     if mode == 'mobile':
-#         finalHTML = os.path.join('HTMLMobile', f'{mode}_{nombreLimpio}.html')
-#     else:
-#         finalHTML = os.path.join('HTMLDesktop', f'{mode}_{nombreLimpio}.html')
-
-#     #username = os.getlogin()
-    
-#     # Ruta completa al ejecutable de Node.js
-#     #node_path = f'/Users/{username}/.nvm/versions/node/v20.15.1/bin/node'
-#     PATH_NODE = '/usr/bin/node'
-#     #PATH_NODE = r'C:\Program Files\nodejs\node.exe'
-
-#     # Ruta completa al archivo de Lighthouse
-#     #lighthouse_path = f'/Users/{username}/.nvm/versions/node/v20.15.1/lib/node_modules/lighthouse/cli/index.js'
-#     LIGHTHOUSE_PATH = '/usr/lib/node_modules/lighthouse/cli/index.js'
-#     #LIGHTHOUSE_PATH = rf'C:\Users\{username}\AppData\Roaming\npm\node_modules\lighthouse\cli\index.js'
-
-#     # Comando para ejecutar Lighthouse con la configuración necesaria
-#     command = [
-#         PATH_NODE,
-#         LIGHTHOUSE_PATH,
-#         url,
-#         '--output=html',
-#         f'--output-path={finalHTML}',
-#         '--chrome-flags="--headless --no-sandbox --disable-dev-shm-usage --window-size=1920,1080"'
-#     ]
-
-#     # Configuración extra para el modo Desktop
-#     if mode == 'desktop':
-#         command.append('--preset=desktop')
-
-#     try:
-#         # Ejecuta la auditoría de Lighthouse
-#         result = subprocess.run(command, capture_output=True, text=True)
-#         if result.returncode != 0:
-#             print(f"Error al ejecutar Lighthouse desde {url} ({mode}):\n{result.stderr}")
-#             return None
-#     except FileNotFoundError:
-#         print(f"Lighthouse no se encontró en la ruta especificada. Asegúrate de que está instalado y accesible en {LIGHTHOUSE_PATH}.")
-#         return None
-    
-#     print(f"Se genera informe {finalHTML}")
-#     return finalHTML
-
-def auditoria_Lighthouse(url, mode):
-    nombreLimpio = re.sub(r'[^\w.-]', '_', url)
-    if mode == 'mobile':
-        finalHTML = os.path.join('HTMLMobile', f'{mode}_{nombreLimpio}.html')
-    else:
-        finalHTML = os.path.join('HTMLDesktop', f'{mode}_{nombreLimpio}.html')
-
-    #username = os.getlogin()
-    
-    # Ruta completa al ejecutable de Node.js
-    #node_path = f'/Users/{username}/.nvm/versions/node/v20.15.1/bin/node'
-    PATH_NODE = '/usr/bin/node'
-    #PATH_NODE = r'C:\Program Files\nodejs\node.exe'
-
-    # Ruta completa al archivo de Lighthouse
-    #lighthouse_path = f'/Users/{username}/.nvm/versions/node/v20.15.1/lib/node_modules/lighthouse/cli/index.js'
-    LIGHTHOUSE_PATH = '/usr/lib/node_modules/lighthouse/cli/index.js'
-    #LIGHTHOUSE_PATH = rf'C:\Users\{username}\AppData\Roaming\npm\node_modules\lighthouse\cli\index.js'
-
-    # Banderas de Chrome para simular un entorno más similar al de DevTools
-    chrome_flags = (
-        '--disable-gpu --no-sandbox --disable-dev-shm-usage '
-        '--disable-setuid-sandbox --disable-software-rasterizer '
-        '--disable-extensions --user-agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36"'
-    )
-
-    # Comando para ejecutar Lighthouse con la configuración necesaria
-    command = [
-        PATH_NODE,
-        LIGHTHOUSE_PATH,
-        url,
-        '--output=html',
-        f'--output-path={finalHTML}',
-        f'--chrome-flags={chrome_flags}'
-    ]
-
-    if mode == 'desktop':
-        # Configuración para el modo Desktop
-        command.extend(['--preset=desktop', '--screenEmulation.disabled=true', '--formFactor=desktop', '--throttling-method=devtools'])
-    else:
-        # Configuración explícita para el modo Mobile
-        command.extend([
-            '--formFactor=mobile',
-            '--screenEmulation.mobile',
-            '--throttling-method=devtools'
-        ])
-
+        for pathReporte in buscar_Reportes(paths):
+            # El HTML y el JSON de una misma auditoría se informan una sola vez (desde el JSON)
+            if pathReporte.endswith('.html') and os.path.exists(path_Json(pathReporte)):
+                continue
+            salida.write(json.dumps({'reporte': pathReporte, **extraer_Puntuaciones(pathReporte)}, ensure_ascii=False) + '\n')
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+
+def comando_Exportar(args):
+    from historial import HistorialResultados
+    historial = HistorialResultados(args.db)
     try:
-        # Ejecuta la auditoría de Lighthouse
-        result = subprocess.run(command, capture_output=True, text=True)
-        if result.returncode != 0:
-            print(f"Error al ejecutar Lighthouse desde {url} ({mode}):\n{result.stderr}")
-            return None
-    except FileNotFoundError:
-        print(f"Lighthouse no se encontró en la ruta especificada. Asegúrate de que está instalado y accesible en {LIGHTHOUSE_PATH}.")
-        return None
-    
-    print(f"Se genera informe {finalHTML}")
-    return finalHTML
-
-# Función que ejecuta Lighthouse para una URL
-def urls_Lighthouse(url):
-    codigo, descripcionCodigo = validar_Url(url)
-    if codigo is None or codigo != 200:
-        # Si la URL no es válida, registrar el error en el Excel
-        actualizar_Excel(url, {'performance': None, 'accessibility': None, 'seo': None}, {'performance': None, 'accessibility': None, 'seo': None}, "Error", descripcionCodigo)
-        return {
-            'url': url,
-            'totalTest': None
-        }
-
-    inicio = time.time()
-
-    # Ejecutar Lighthouse (Mobile - Desktop)
-    print(f"Ejecutando auditoria Lighthouse ...")
-    rporteMOBILE = auditoria_Lighthouse(url, 'mobile')
-    if rporteMOBILE:
-        puntuacionesMOBILE = extraer_Puntuaciones(rporteMOBILE)
-    else:
-        puntuacionesMOBILE = {'performance': None, 'accessibility': None, 'seo': None}
-
-    reporteDESKTOP = auditoria_Lighthouse(url, 'desktop')
-    if reporteDESKTOP:
-        puntuacionesDESKTOP = extraer_Puntuaciones(reporteDESKTOP)
-    else:
-        puntuacionesDESKTOP = {'performance': None, 'accessibility': None, 'seo': None}
-
-    # Actualizar el archivo Excel después de completar ambas auditorías
-    actualizar_Excel(url, puntuacionesMOBILE, puntuacionesDESKTOP, codigo, descripcionCodigo)
-    
-    termino = time.time()
-    totalTest = round(termino - inicio, 2)
-    
-    return {
-        'url': url,
-        'totalTest': totalTest
-    }
-
-# Función para extraer las puntuaciones de SEO, Accesibilidad y Performance del reporte HTML
-def extraer_Puntuaciones(pathHTML):
-    try:
-        puntuaciones = {
-            'performance': None,
-            'accessibility': None,
-            'seo': None
-        }
-
-        with open(pathHTML, 'r', encoding="utf-8") as file:
-            filas = file.readlines()
-        
-        # Buscamos la línea que contiene los datos JSON
-        jsonLine = next((line for line in filas if 'window.__LIGHTHOUSE_JSON__' in line), None)
-        if jsonLine:
-            match = re.search(r'=(.*?);<', jsonLine)
-            if match:
-                resultados = match.group(1)
-            else:
-                resultados = None
-            data = json.loads(resultados)
-            puntuaciones['performance'] = int(data["categories"]["performance"]["score"]*100) if data["categories"]["performance"]["score"] is not None else "N/A"
-            puntuaciones['accessibility'] = int(data["categories"]["accessibility"]["score"]*100) if data["categories"]["accessibility"]["score"] is not None else "N/A"
-            puntuaciones['seo'] = int(data["categories"]["seo"]["score"]*100) if data["categories"]["seo"]["score"] is not None else "N/A"
-
-        return puntuaciones
-    except Exception as e:
-        print(f"Error al extraer puntuaciones desde {pathHTML}: {e}")
-        return {
-            'performance': None,
-            'accessibility': None,
-            'seo': None
-        }
-
-# Función para crear y actualizar el archivo Excel con los resultados
-# Función para crear y actualizar el archivo Excel con los resultados
-def actualizar_Excel(url, puntuacionesMOBILE, puntuacionesDESKTOP, codigo, descripcionCodigo):
-    global pathArchivo
-    fecha_hora_actual = datetime.now().strftime('%Y%m%d_%H%M%S')
-    
-    # Nombre del archivo con la fecha y hora de ejecución (solo se crea una vez)
-    if not pathArchivo:
-        pathArchivo = f'resultados_{fecha_hora_actual}.xlsx'
-    
-    try:
-        cargarExcel = load_workbook(pathArchivo)
-        hoja = cargarExcel.active
-    except FileNotFoundError:
-        cargarExcel = Workbook()
-        hoja = cargarExcel.active
-        hoja.append(['URL', 'Performance Mobile', 'Performance Desktop', 'Accesibilidad Mobile', 'Accesibilidad Desktop', 'SEO Mobile', 'SEO Desktop', 'Código', 'Descripción Código'])
-
-    actualizado = False
-    for row in hoja.iter_rows(min_row=2, values_only=False):
-        if row[0].value == url:
-            row[1].value = puntuacionesMOBILE['performance']
-            row[2].value = puntuacionesDESKTOP['performance']
-            row[3].value = puntuacionesMOBILE['accessibility']
-            row[4].value = puntuacionesDESKTOP['accessibility']
-            row[5].value = puntuacionesMOBILE['seo']
-            row[6].value = puntuacionesDESKTOP['seo']
-            row[7].value = codigo
-            row[8].value = descripcionCodigo
-            actualizado = True
-            break
-
-    if not actualizado:
-        new_row = [
-            url,
-            puntuacionesMOBILE['performance'], puntuacionesDESKTOP['performance'],
-            puntuacionesMOBILE['accessibility'], puntuacionesDESKTOP['accessibility'],
-            puntuacionesMOBILE['seo'], puntuacionesDESKTOP['seo'],
-            codigo, descripcionCodigo
-        ]
-        hoja.append(new_row)
-
-    # Ajustar el ancho de las columnas
-    for col in hoja.columns:
-        largo = 0
-        columna = col[0].column_letter
-        for cell in col:
-            try:
-                if len(str(cell.value)) > largo:
-                    largo = len(cell.value)
-            except:
-                pass
-        ancho = (largo + 2)
-        hoja.column_dimensions[columna].width = ancho
-
-    cargarExcel.save(pathArchivo)
-
-# Crear carpetas si no existen y asegurarse de que tienen los permisos adecuados
-crear_carpetas()
-
-# Leer las URLs desde un archivo de texto
-with open('urls.txt', 'r') as archivo:
-    urls = archivo.read().splitlines()
-
-# Variable global para almacenar la ruta del archivo Excel
-pathArchivo = None
-
-with ThreadPoolExecutor(max_workers=1) as ejec:
-    future_to_url = {ejec.submit(urls_Lighthouse, url): url for url in urls}
-    
-    for future in as_completed(future_to_url):
-        url = future_to_url[future]
+        ejecucion = args.ejecucion or (historial.ultimas_Ejecuciones(1) or [None])[0]
+        if ejecucion is None:
+            print(f"No hay ejecuciones en {args.db}")
+            return 1
+        salida = args.salida or f'resultados_ejecucion_{ejecucion}.xlsx'
+        print(f"{historial.exportar_Excel(ejecucion, salida)} URLs exportadas a {salida}")
+    finally:
+        historial.cerrar()
+
+def comando_Pdf(args):
+    from pdf import convertir_all_htmls
+    for carpeta in ['HTMLDesktop', 'HTMLMobile']:
+        if os.path.isdir(carpeta):
+            print(f"Convirtiendo archivos {carpeta} a {carpeta.replace('HTML', 'PDF', 1)}...")
+            convertir_all_htmls(carpeta, carpeta.replace('HTML', 'PDF', 1), args.trabajadores, args.paginas_por_sesion)
+
+def construir_Parser():
+    parser = argparse.ArgumentParser(description='Auditorías Lighthouse para las URLs de urls.txt')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    auditar = subparsers.add_parser('auditar', aliases=['audit'], help='Validar y auditar las URLs y escribir los resultados (por defecto)')
+    opciones_Auditoria(auditar)
+    auditar.set_defaults(funcion=comando_Auditar)
+
+    validar = subparsers.add_parser('validar', aliases=['validate'], help='Solo validar las URLs (código HTTP y páginas de error)')
+    validar.add_argument('--urls', default='urls.txt', help='Archivo con una URL por línea')
+    validar.add_argument('--concurrencia', type=int, default=16, help='URLs validadas en paralelo')
+    validar.add_argument('--salida', help='Escribir las URLs válidas en este archivo')
+    validar.set_defaults(funcion=comando_Validar)
+
+    extraer = subparsers.add_parser('extraer', aliases=['extract'], help='Puntuaciones de reportes ya generados, como líneas JSON')
+    extraer.add_argument('paths', nargs='*', help='Reportes o carpetas (por defecto HTMLMobile, HTMLDesktop y reportes)')
+    extraer.add_argument('--salida', help='Archivo de salida (por defecto la salida estándar)')
+    extraer.set_defaults(funcion=comando_Extraer)
+
+    exportar = subparsers.add_parser('exportar', aliases=['export'], help='Generar el Excel de una ejecución del historial (por defecto la última)')
+    exportar.add_argument('--db', default='historial.sqlite', help='Archivo SQLite del historial')
+    exportar.add_argument('--ejecucion', type=int)
+    exportar.add_argument('--salida')
+    exportar.set_defaults(funcion=comando_Exportar)
+
+    pdf = subparsers.add_parser('pdf', help='Convertir los reportes de HTMLMobile y HTMLDesktop a PDF')
+    pdf.add_argument('--trabajadores', type=int, default=5, help='Número de sesiones de Chrome convirtiendo en paralelo')
+    pdf.add_argument('--paginas-por-sesion', type=int, default=50, help='Reiniciar cada sesión de Chrome después de N páginas')
+    pdf.set_defaults(funcion=comando_Pdf)
+    return parser, subparsers
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    parser, subparsers = construir_Parser()
+    # Sin subcomando se audita, como antes de los subcomandos (lighthouse.py --trabajadores 4)
+    if not argv or (argv[0] not in subparsers.choices and argv[0] not in ('-h', '--help')):
+        argv = ['auditar'] + argv
+    args = parser.parse_args(argv)
+    if args.funcion is comando_Auditar and args.motor == 'asyncio' and args.cola:
+        parser.error("--motor asyncio no se puede combinar con --cola")
+    if args.funcion is comando_Auditar and args.canonizar:
+        from canonico import leer_Reglas
         try:
-            result = future.result()
-            if result['totalTest'] is not None:
-                print(f"Duración total de la auditoría para {url}: {result['totalTest']} segundos")
-        except Exception as e:
-            print(f"Error de procesamiento en {url}: {e}")
-    
+            args.reglas_canonicas = leer_Reglas(args.reglas_canonicas)
+        except ValueError as e:
+            parser.error(str(e))
+    return args.funcion(args) or 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+# Lighthouse falso para benchmarks y pruebas sin navegador: acepta los mismos argumentos que
+# lighthouse.py le pasa a cli/index.js y, después de una demora, escribe reportes JSON/HTML con
+# la misma estructura y un tamaño parecido a los reales. Respeta --only-categories, --only-audits,
+# --skip-audits y --disable-full-page-screenshot: la demora y el tamaño se reparten entre las
+# categorías y las capturas según COSTOS, así los perfiles de auditoría se pueden comparar. Se usa con
+#   LIGHTHOUSE_NODE=<python> LIGHTHOUSE_CLI=lighthouse_falso.py python lighthouse.py
+# Variables de entorno:
+#   LH_FALSO_DEMORA  milisegundos que "dura" la auditoría completa (por defecto 100)
+#   LH_FALSO_KB      tamaño aproximado del reporte JSON completo en KB (por defecto 500)
+#   LH_FALSO_FALLOS  fracción de auditorías que terminan con un error transitorio (por defecto 0)
+#   LH_FALSO_COLGADOS fracción de auditorías que se cuelgan y nunca terminan (por defecto 0)
+#   LH_FALSO_CHROME  con 1, lanza un proceso "Chrome" con el --user-data-dir de --chrome-flags en su
+#                    propio grupo (como chrome-launcher) y lo termina al final, salvo si se cuelga
+#   LH_FALSO_LOG     archivo JSONL donde se agrega el inicio y fin de cada auditoría
+
+VERSION = '12.2.1'
+
+METRICAS = {
+    'first-contentful-paint': (900, 4000),
+    'largest-contentful-paint': (1500, 8000),
+    'total-blocking-time': (0, 1500),
+    'cumulative-layout-shift': (0, 0.4),
+    'speed-index': (1500, 9000),
+    'interactive': (2000, 15000)
+}
+
+# Reparto supuesto (no medido) de la demora y del tamaño del reporte entre las partes de una
+# auditoría completa; el arranque (Chrome, navegación) siempre se paga. Solo sirve para que los
+# perfiles ejerciten el pipeline: las diferencias de tiempo entre perfiles con el Lighthouse falso
+# son estas fracciones, no el costo de Lighthouse real
+COSTOS = {
+    'arranque': 0.1,
+    'performance': 0.5,
+    'accessibility': 0.15,
+    'best-practices': 0.1,
+    'seo': 0.05,
+    'capturas': 0.05,
+    'captura-completa': 0.05
+}
+CATEGORIAS = ['performance', 'accessibility', 'best-practices', 'seo']
+CAPTURAS = ['screenshot-thumbnails', 'final-screenshot']
+
+def argumentos(argv):
+    url = next((arg for arg in argv if not arg.startswith('--')), None)
+    opciones = {'output': []}
+    for arg in argv:
+        if arg.startswith('--') and '=' in arg:
+            nombre, valor = arg[2:].split('=', 1)
+            if nombre == 'output':
+                opciones['output'].append(valor)
+            else:
+                opciones[nombre] = valor
+        elif arg.startswith('--'):
+            opciones[arg[2:]] = True
+    return url, opciones
+
+# Auditorías de relleno con "details" como las de diagnóstico reales hasta llegar al tamaño pedido
+def auditorias_Relleno(kb, generador):
+    auditorias = {}
+    tamano = 0
+    i = 0
+    while tamano < kb * 1024:
+        items = [{'url': f'https://cdn.example.com/recurso/{i}/{j}.js', 'wastedBytes': generador.randint(0, 200000),
+                  'totalBytes': generador.randint(1000, 400000)} for j in range(20)]
+        auditorias[f'diagnostico-{i}'] = {'id': f'diagnostico-{i}', 'title': 'Diagnóstico de relleno', 'score': None,
+                                          'scoreDisplayMode': 'informative', 'details': {'type': 'table', 'items': items}}
+        tamano += len(json.dumps(auditorias[f'diagnostico-{i}'], indent=2))
+        i += 1
+    return auditorias
+
+# Partes de la auditoría que corren con las opciones dadas
+def partes(opciones):
+    categorias = opciones['only-categories'].split(',') if 'only-categories' in opciones else CATEGORIAS
+    omitidas = opciones.get('skip-audits', '').split(',')
+    capturas = 'only-audits' not in opciones and not set(CAPTURAS) & set(omitidas)
+    return {'arranque', *[categoria for categoria in categorias if categoria in COSTOS],
+            *(['capturas'] if capturas else []), *([] if opciones.get('disable-full-page-screenshot') else ['captura-completa'])}
+
+def costo(opciones):
+    return sum(COSTOS[parte] for parte in partes(opciones))
+
+def reporte(url, mode, kb, opciones):
+    # Puntuaciones estables por URL con algo de ruido entre ejecuciones, como en Lighthouse real
+    base = int(hashlib.md5(url.encode()).hexdigest()[:8], 16) / 0xffffffff
+    generador = random.Random()
+    fraccion = min(max(base + generador.gauss(0, 0.03), 0), 1)
+    auditorias = {}
+    for auditoria, (minimo, maximo) in METRICAS.items():
+        auditorias[auditoria] = {'id': auditoria, 'score': round(1 - fraccion, 2), 'numericValue': minimo + (maximo - minimo) * fraccion}
+    auditorias.update(auditorias_Relleno(kb * costo(opciones), generador))
+    categorias = {
+        'performance': {'id': 'performance', 'score': round(1 - fraccion, 2)},
+        'accessibility': {'id': 'accessibility', 'score': round(0.7 + 0.3 * base, 2)},
+        'best-practices': {'id': 'best-practices', 'score': round(0.9 - 0.2 * base, 2)},
+        'seo': {'id': 'seo', 'score': round(0.8 + 0.2 * base, 2)}
+    }
+    return {
+        'lighthouseVersion': VERSION,
+        'requestedUrl': url,
+        'finalDisplayedUrl': url,
+        'fetchTime': datetime.now(timezone.utc).isoformat(),
+        'environment': {'benchmarkIndex': 1500 + generador.randint(-100, 100)},
+        'audits': auditorias,
+        'configSettings': {'formFactor': mode},
+        'categories': {categoria: valores for categoria, valores in categorias.items() if categoria in partes(opciones)},
+        'timing': {'total': float(os.environ.get('LH_FALSO_DEMORA', 100)) * costo(opciones)}
+    }
+
+def html(lhr):
+    # Mismo escape de "<" que el generador de reportes de Lighthouse
+    datos = json.dumps(lhr).replace('<', '\\u003c')
+    return ('<!doctype html><html lang="en"><head><meta charset="utf-8"><title>Lighthouse Report</title></head>'
+            f'<body><noscript>Lighthouse report requires JavaScript.</noscript><script>window.__LIGHTHOUSE_JSON__ = {datos};</script>'
+            '<script>/* renderer */</script></body></html>')
+
+def main(argv):
+    inicio = time.time()
+    url, opciones = argumentos(argv)
+    if not url or 'output-path' not in opciones:
+        print("Uso: lighthouse_falso.py <url> --output=json|html --output-path=<archivo>", file=sys.stderr)
+        return 1
+    mode = 'desktop' if opciones.get('preset') == 'desktop' else 'mobile'
+
+    chrome = None
+    if os.environ.get('LH_FALSO_CHROME') == '1':
+        perfil = [bandera for bandera in shlex.split(opciones.get('chrome-flags', '')) if bandera.startswith('--user-data-dir=')]
+        chrome = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(3600)', *perfil], start_new_session=True)
+
+    if random.random() < float(os.environ.get('LH_FALSO_COLGADOS', 0)):
+        time.sleep(3600)
+    time.sleep(float(os.environ.get('LH_FALSO_DEMORA', 100)) * costo(opciones) / 1000)
+    fallo = random.random() < float(os.environ.get('LH_FALSO_FALLOS', 0))
+    if fallo:
+        print(f"Runtime error encountered: Waiting for DevTools protocol response has exceeded the allotted time. (PROTOCOL_TIMEOUT) simulado para {url}", file=sys.stderr)
+    else:
+        lhr = reporte(url, mode, int(os.environ.get('LH_FALSO_KB', 500)), opciones)
+        formatos = opciones['output'] or ['html']
+        base, _ = os.path.splitext(opciones['output-path'])
+        for formato in formatos:
+            # Como cli/run.js de Lighthouse: con varios formatos quita la extensión y escribe <base>.report.<formato>
+            path = f'{base}.report.{formato}' if len(formatos) > 1 else opciones['output-path']
+            with open(path, 'w', encoding='utf-8') as archivo:
+                archivo.write(json.dumps(lhr, indent=2) if formato == 'json' else html(lhr))
+
+    if chrome:
+        chrome.kill()
+        chrome.wait()
+
+    if os.environ.get('LH_FALSO_LOG'):
+        with open(os.environ['LH_FALSO_LOG'], 'a', encoding='utf-8') as archivo:
+            archivo.write(json.dumps({'url': url, 'mode': mode, 'puerto': opciones.get('port'), 'inicio': inicio,
+                                      'fin': time.time(), 'ok': not fallo}) + '\n')
+    return 1 if fallo else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,166 @@
+import argparse
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from reportes import leer_Reporte
+
+# Métricas de laboratorio (Core Web Vitals y afines): columna -> id de la auditoría de Lighthouse
+METRICAS = {
+    'lcp_ms': 'largest-contentful-paint',
+    'tbt_ms': 'total-blocking-time',
+    'cls': 'cumulative-layout-shift',
+    'fcp_ms': 'first-contentful-paint',
+    'speed_index_ms': 'speed-index',
+    'tti_ms': 'interactive'
+}
+
+CATEGORIAS = ['performance', 'accessibility', 'seo']
+
+COLUMNAS = [
+    ('url', 'TEXT NOT NULL'),
+    ('url_final', 'TEXT'),
+    ('mode', 'TEXT NOT NULL'),
+    ('fecha', 'TEXT NOT NULL'),
+    ('reporte', 'TEXT'),
+    ('version_lighthouse', 'TEXT'),
+    ('benchmark_index', 'REAL'),
+    ('performance', 'REAL'),
+    ('accessibility', 'REAL'),
+    ('seo', 'REAL'),
+] + [(columna, 'REAL') for columna in METRICAS]
+
+def _numero(valor):
+    return float(valor) if isinstance(valor, (int, float)) else None
+
+# Fila de métricas de un reporte (lighthouse.py HTML/JSON o test.py JSON), o None si no es un reporte válido.
+# La fila se identifica por la URL solicitada (la misma del historial y del Excel aunque la página
+# redirija) y la URL final queda aparte en url_final
+def extraer_Metricas(pathReporte, url=None):
+    try:
+        lhr = leer_Reporte(pathReporte)
+    except Exception as e:
+        print(f"Error al leer métricas desde {pathReporte}: {e}")
+        return None
+    if not lhr or 'audits' not in lhr:
+        return None
+
+    categorias = lhr.get('categories', {})
+    auditorias = lhr['audits']
+    fila = {
+        'reporte': pathReporte,
+        'url': lhr.get('requestedUrl') or url,
+        'url_final': lhr.get('finalDisplayedUrl') or lhr.get('finalUrl'),
+        'mode': lhr.get('configSettings', {}).get('formFactor'),
+        'fecha': lhr.get('fetchTime'),
+        'version_lighthouse': lhr.get('lighthouseVersion'),
+        'benchmark_index': _numero(lhr.get('environment', {}).get('benchmarkIndex')),
+    }
+    for categoria in CATEGORIAS:
+        # Misma escala 0-100 que el Excel
+        score = _numero(categorias.get(categoria, {}).get('score'))
+        fila[categoria] = score * 100 if score is not None else None
+    for columna, auditoria in METRICAS.items():
+        fila[columna] = _numero(auditorias.get(auditoria, {}).get('numericValue'))
+    return fila
+
+# Almacén columnar de métricas en SQLite con columnas tipadas, una fila por auditoría:
+# el HTML y el JSON de una misma ejecución comparten (url, mode, fecha) y no se duplican
+class AlmacenMetricas:
+    def __init__(self, pathMetricas='metricas.sqlite'):
+        self.bloqueo = threading.Lock()
+        self.conexion = sqlite3.connect(pathMetricas, check_same_thread=False)
+        self.conexion.execute(f"CREATE TABLE IF NOT EXISTS metricas ({', '.join(f'{nombre} {tipo}' for nombre, tipo in COLUMNAS)}, PRIMARY KEY (url, mode, fecha))")
+        # Bases creadas antes de la columna url_final
+        existentes = {fila[1] for fila in self.conexion.execute('PRAGMA table_info(metricas)')}
+        for nombre, tipo in COLUMNAS:
+            if nombre not in existentes:
+                self.conexion.execute(f'ALTER TABLE metricas ADD COLUMN {nombre} {tipo}')
+        self.conexion.execute('CREATE INDEX IF NOT EXISTS idx_metricas_fecha ON metricas (fecha)')
+        self.conexion.commit()
+
+    def guardar(self, filas):
+        filas = [fila for fila in filas if fila and fila['url'] and fila['mode'] and fila['fecha']]
+        if not filas:
+            return 0
+        columnas = [nombre for nombre, _ in COLUMNAS]
+        with self.bloqueo:
+            self.conexion.executemany(
+                f"INSERT OR REPLACE INTO metricas ({', '.join(columnas)}) VALUES ({', '.join('?' * len(columnas))})",
+                [[fila[columna] for columna in columnas] for fila in filas]
+            )
+            self.conexion.commit()
+        return len(filas)
+
+    # Extrae y guarda las métricas de un reporte recién generado de la URL auditada
+    def registrar(self, pathReporte, url=None):
+        return self.guardar([extraer_Metricas(pathReporte, url)])
+
+    # Promedio y percentil 75 (como en CrUX) de cada métrica por modo
+    def resumen(self, desde=None):
+        condicion, parametros = ('WHERE fecha >= ?', [desde]) if desde else ('', [])
+        resultado = {}
+        with self.bloqueo:
+            for mode, total in self.conexion.execute(f'SELECT mode, COUNT(*) FROM metricas {condicion} GROUP BY mode', parametros).fetchall():
+                resultado[mode] = {'auditorias': total}
+                for columna in ['performance'] + list(METRICAS):
+                    filtro = f"{condicion + ' AND' if condicion else 'WHERE'} mode = ? AND {columna} IS NOT NULL"
+                    promedio, cantidad = self.conexion.execute(f'SELECT AVG({columna}), COUNT({columna}) FROM metricas {filtro}', parametros + [mode]).fetchone()
+                    p75 = None
+                    if cantidad:
+                        p75 = self.conexion.execute(
+                            f'SELECT {columna} FROM metricas {filtro} ORDER BY {columna} LIMIT 1 OFFSET ?',
+                            parametros + [mode, int(0.75 * (cantidad - 1))]
+                        ).fetchone()[0]
+                    resultado[mode][columna] = (promedio, p75)
+        return resultado
+
+    def cerrar(self):
+        with self.bloqueo:
+            self.conexion.close()
+
+# Reportes de Lighthouse dentro de archivos y carpetas (HTMLMobile, HTMLDesktop, report_*.json de test.py, reportes/blobs)
+def buscar_Reportes(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for raiz, _, archivos in os.walk(path):
+                for nombreArchivo in sorted(archivos):
+                    if nombreArchivo.endswith(('.html', '.json', '.html.gz', '.json.gz', '.html.zst', '.json.zst')):
+                        yield os.path.join(raiz, nombreArchivo)
+        else:
+            yield path
+
+# Carga por lotes: los reportes se parsean en paralelo en varios procesos y se insertan en bloques
+def cargar_Reportes(paths, almacen, procesos=None, lote=500):
+    total = 0
+    pendientes = []
+    with ProcessPoolExecutor(max_workers=procesos) as ejec:
+        for fila in ejec.map(extraer_Metricas, buscar_Reportes(paths), chunksize=16):
+            pendientes.append(fila)
+            if len(pendientes) >= lote:
+                total += almacen.guardar(pendientes)
+                pendientes = []
+    total += almacen.guardar(pendientes)
+    return total
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Almacén de métricas (LCP, TBT, CLS, FCP, Speed Index, TTI) de los reportes de Lighthouse')
+    parser.add_argument('--db', default='metricas.sqlite', help='Archivo SQLite de métricas')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    carga = subparsers.add_parser('carga', help='Cargar reportes HTML/JSON (archivos o carpetas)')
+    carga.add_argument('paths', nargs='+')
+    carga.add_argument('--procesos', type=int, default=None, help='Procesos para parsear reportes (por defecto, uno por núcleo)')
+    resumen = subparsers.add_parser('resumen', help='Promedio y p75 de cada métrica por modo')
+    resumen.add_argument('--desde', help='Solo auditorías desde esta fecha (ISO, por ejemplo 2024-08-01)')
+    args = parser.parse_args()
+
+    almacen = AlmacenMetricas(args.db)
+    if args.comando == 'carga':
+        print(f"{cargar_Reportes(args.paths, almacen, args.procesos)} reportes cargados en {args.db}")
+    else:
+        for mode, valores in almacen.resumen(args.desde).items():
+            print(f"{mode} ({valores.pop('auditorias')} auditorías)")
+            for columna, (promedio, p75) in valores.items():
+                if promedio is not None:
+                    print(f"  {columna:<16} promedio {promedio:>10.2f}   p75 {p75:>10.2f}")
+    almacen.cerrar()
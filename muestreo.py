@@ -0,0 +1,63 @@
+import asyncio
+import statistics
+
+# Muestreo adaptativo: varias auditorías de la misma (url, mode) y se informa la ejecución
+# mediana, como recomienda Lighthouse para reducir la variabilidad. Se lanzan muestrasMin
+# auditorías en paralelo y solo se agregan más (de a muestrasMin) mientras la desviación
+# estándar de performance supere el umbral, hasta muestrasMax.
+
+def _performance(muestra):
+    reporte, puntuaciones = muestra
+    valor = puntuaciones.get('performance')
+    return valor if reporte and isinstance(valor, (int, float)) else None
+
+# Muestra con la puntuación de performance mediana (la inferior si la cantidad es par,
+# para que siempre sea una ejecución real)
+def muestra_Mediana(muestras):
+    validas = sorted((m for m in muestras if _performance(m) is not None), key=_performance)
+    if not validas:
+        return None
+    return validas[(len(validas) - 1) // 2]
+
+def desviacion(valores):
+    return statistics.stdev(valores) if len(valores) >= 2 else None
+
+def _estable(muestras, umbral):
+    dispersion = desviacion([_performance(m) for m in muestras if _performance(m) is not None])
+    return dispersion is not None and dispersion <= umbral
+
+# (reporte, puntuaciones) de la mediana con 'muestras' y 'varianza' agregadas a las puntuaciones
+def _resultado(muestras):
+    mediana = muestra_Mediana(muestras)
+    if mediana is None:
+        # Ninguna muestra válida: se informa la última como en una auditoría simple
+        return muestras[-1]
+
+    reporte, puntuaciones = mediana
+    valores = [_performance(m) for m in muestras if _performance(m) is not None]
+    puntuaciones = dict(puntuaciones)
+    puntuaciones['muestras'] = len(valores)
+    puntuaciones['varianza'] = round(statistics.variance(valores), 2) if len(valores) >= 2 else None
+    return reporte, puntuaciones
+
+# enviar(muestra) debe devolver un Future con (reporte, puntuaciones).
+# Devuelve (reporte, puntuaciones) de la mediana con 'muestras' y 'varianza' agregadas a las puntuaciones.
+def muestrear(enviar, muestrasMin=2, muestrasMax=5, umbral=5):
+    muestras = []
+    while len(muestras) < muestrasMax:
+        lote = min(muestrasMin, muestrasMax - len(muestras))
+        futuros = [enviar(len(muestras) + i + 1) for i in range(lote)]
+        muestras.extend(futuro.result() for futuro in futuros)
+        if _estable(muestras, umbral):
+            break
+    return _resultado(muestras)
+
+# Igual que muestrear para el motor asyncio: enviar(muestra) es una corrutina que devuelve (reporte, puntuaciones)
+async def muestrear_Async(enviar, muestrasMin=2, muestrasMax=5, umbral=5):
+    muestras = []
+    while len(muestras) < muestrasMax:
+        lote = min(muestrasMin, muestrasMax - len(muestras))
+        muestras.extend(await asyncio.gather(*(enviar(len(muestras) + i + 1) for i in range(lote))))
+        if _estable(muestras, umbral):
+            break
+    return _resultado(muestras)
@@ -0,0 +1,153 @@
+import json
+import os
+import shlex
+import shutil
+import signal
+import subprocess
+import threading
+import time
+import urllib.request
+
+# Banderas que chrome-launcher agrega siempre al lanzar Chrome para Lighthouse
+FLAGS_BASE = ['--no-first-run', '--no-default-browser-check', '--disable-background-timer-throttling', '--disable-renderer-backgrounding']
+
+# Ruta del ejecutable de Chrome (CHROME_PATH, igual que chrome-launcher, o el primero que se encuentre en el PATH)
+def ruta_Chrome():
+    if os.environ.get('CHROME_PATH'):
+        return os.environ['CHROME_PATH']
+    for nombre in ['google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser']:
+        ruta = shutil.which(nombre)
+        if ruta:
+            return ruta
+    return None
+
+# Memoria residente (MB) de un grupo de procesos completo: Chrome y todos sus procesos hijos.
+# Solo disponible en Linux (/proc); en otros sistemas devuelve None y no se recicla por memoria.
+def memoria_Grupo_MB(pgid):
+    if not os.path.isdir('/proc'):
+        return None
+    total = 0
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f'/proc/{pid}/stat', 'r') as archivo:
+                campos = archivo.read().rsplit(')', 1)[1].split()
+            if int(campos[2]) != pgid:
+                continue
+            with open(f'/proc/{pid}/status', 'r') as archivo:
+                for linea in archivo:
+                    if linea.startswith('VmRSS:'):
+                        total += int(linea.split()[1])
+                        break
+        except (OSError, IndexError, ValueError):
+            pass
+    return total / 1024
+
+# Chrome de larga duración al que Lighthouse se conecta con --port
+class NavegadorChrome:
+    def __init__(self, puerto, perfil, chromeFlags, auditoriasMax=50, memoriaMaxMB=1024):
+        self.puerto = puerto
+        self.perfil = perfil
+        self.chromeFlags = chromeFlags
+        self.auditoriasMax = auditoriasMax
+        self.memoriaMaxMB = memoriaMaxMB
+        self.proceso = None
+        self.auditorias = 0
+
+    def iniciar(self, espera=30):
+        rutaChrome = ruta_Chrome()
+        if not rutaChrome:
+            raise RuntimeError("No se encontró Chrome. Define CHROME_PATH con la ruta del ejecutable.")
+
+        command = [rutaChrome] + shlex.split(self.chromeFlags) + FLAGS_BASE + [
+            f'--remote-debugging-port={self.puerto}',
+            f'--user-data-dir={self.perfil}',
+            'about:blank'
+        ]
+        # Sesión propia para poder terminar Chrome junto con todos sus procesos hijos
+        self.proceso = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+        self.auditorias = 0
+
+        limite = time.time() + espera
+        while time.time() < limite:
+            if self.saludable():
+                print(f"Chrome iniciado en el puerto {self.puerto} (pid {self.proceso.pid})")
+                return
+            time.sleep(0.25)
+        self.detener()
+        raise RuntimeError(f"Chrome no respondió en el puerto {self.puerto} después de {espera} segundos")
+
+    # El proceso sigue vivo y el endpoint de DevTools responde
+    def saludable(self):
+        if self.proceso is None or self.proceso.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{self.puerto}/json/version', timeout=2) as respuesta:
+                return 'webSocketDebuggerUrl' in json.loads(respuesta.read())
+        except (OSError, ValueError):
+            return False
+
+    def debe_Reciclarse(self):
+        if self.auditoriasMax and self.auditorias >= self.auditoriasMax:
+            return True
+        if self.memoriaMaxMB and self.proceso is not None:
+            memoria = memoria_Grupo_MB(self.proceso.pid)
+            if memoria is not None and memoria > self.memoriaMaxMB:
+                print(f"Chrome del puerto {self.puerto} usa {memoria:.0f} MB, se recicla")
+                return True
+        return False
+
+    # Deja el navegador listo para la siguiente auditoría: lo lanza, o lo reinicia si está caído o agotado
+    def asegurar(self):
+        if self.proceso is not None and (not self.saludable() or self.debe_Reciclarse()):
+            self.detener()
+        if self.proceso is None:
+            self.iniciar()
+
+    def detener(self):
+        if self.proceso is None:
+            return
+        try:
+            os.killpg(self.proceso.pid, signal.SIGTERM)
+            self.proceso.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            os.killpg(self.proceso.pid, signal.SIGKILL)
+            self.proceso.wait()
+        except ProcessLookupError:
+            pass
+        self.proceso = None
+
+# Un Chrome persistente por trabajador del planificador (mismo puerto y perfil del trabajador)
+class PoolChrome:
+    def __init__(self, chromeFlags, auditoriasMax=50, memoriaMaxMB=1024):
+        self.chromeFlags = chromeFlags
+        self.auditoriasMax = auditoriasMax
+        self.memoriaMaxMB = memoriaMaxMB
+        self.navegadores = {}
+        self.bloqueo = threading.Lock()
+
+    def preparar(self, trabajador):
+        with self.bloqueo:
+            navegador = self.navegadores.get(trabajador.id)
+            if navegador is None:
+                navegador = NavegadorChrome(trabajador.puerto, trabajador.perfil, self.chromeFlags, self.auditoriasMax, self.memoriaMaxMB)
+                self.navegadores[trabajador.id] = navegador
+        # Solo el trabajador dueño usa su navegador, no hace falta bloquear mientras arranca
+        navegador.asegurar()
+        return navegador
+
+    # El Chrome en el puerto del trabajador es de este pool y sigue vivo (si no, Lighthouse lanza el suyo)
+    def propio(self, trabajador):
+        navegador = self.navegadores.get(trabajador.id)
+        return navegador is not None and navegador.proceso is not None and navegador.proceso.poll() is None
+
+    def liberar(self, trabajador):
+        navegador = self.navegadores.get(trabajador.id)
+        if navegador is not None:
+            navegador.auditorias += 1
+
+    def cerrar(self):
+        for navegador in self.navegadores.values():
+            navegador.detener()
+        self.navegadores.clear()
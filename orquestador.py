@@ -0,0 +1,329 @@
+import asyncio
+import base64
+import hashlib
+import os
+import signal
+import ssl
+import subprocess
+import tempfile
+import zlib
+from urllib.parse import unquote, urljoin, urlsplit
+import requests
+from requests.utils import get_environ_proxies, select_proxy
+from supervisor import ResultadoProceso
+from validacion import LIMITE_DRENADO, LIMITE_TITULO, PATRON_TITULO, TIMEOUT_VALIDACION, descripcion_Codigo, titulo_Html, verificar_Titulo
+
+# Piezas asyncio del motor --motor asyncio de lighthouse.py y de test.py: validación HTTP y
+# procesos de Lighthouse como tareas no bloqueantes de un solo bucle de eventos. Los procesos se
+# esperan con un pidfd registrado en el bucle (sin un hilo por auditoría) y se recogen con wait4,
+# que entrega el uso de CPU y memoria igual que en el motor de hilos.
+
+# Códigos que se siguen como redirección y máximo de saltos (los mismos que requests)
+REDIRECCIONES = {301, 302, 303, 307, 308}
+MAX_REDIRECCIONES = 30
+BLOQUE = 8192
+
+# Respuesta HTTP/1.1 leída de un StreamReader. El cuerpo se entrega por bloques ya descomprimidos y
+# completo queda en True solo si se leyó entero, así la conexión puede volver al pool.
+class RespuestaAsync:
+    def __init__(self, reader, url, version, codigo, cabeceras, timeout):
+        self.reader = reader
+        self.url = url
+        self.codigo = codigo
+        self.cabeceras = cabeceras
+        self.timeout = timeout
+        self.completo = False
+        conexion = cabeceras.get('connection', '').lower()
+        self.cierra = 'close' in conexion or (version == 'HTTP/1.0' and 'keep-alive' not in conexion)
+
+    async def _leer(self, lectura):
+        return await asyncio.wait_for(lectura, self.timeout)
+
+    async def _crudo(self):
+        if self.codigo in (204, 304):
+            self.completo = True
+            return
+        if 'chunked' in self.cabeceras.get('transfer-encoding', '').lower():
+            while True:
+                linea = await self._leer(self.reader.readline())
+                tamano = int(linea.split(b';')[0].strip(), 16)
+                if tamano == 0:
+                    # Cabeceras finales (trailers) hasta la línea vacía
+                    while (await self._leer(self.reader.readline())).strip():
+                        pass
+                    break
+                while tamano:
+                    bloque = await self._leer(self.reader.readexactly(min(BLOQUE, tamano)))
+                    tamano -= len(bloque)
+                    yield bloque
+                await self._leer(self.reader.readexactly(2))
+            self.completo = True
+        elif 'content-length' in self.cabeceras:
+            restante = int(self.cabeceras['content-length'])
+            while restante:
+                bloque = await self._leer(self.reader.read(min(BLOQUE, restante)))
+                if not bloque:
+                    raise ConnectionError(f"Respuesta incompleta: faltan {restante} bytes")
+                restante -= len(bloque)
+                yield bloque
+            self.completo = True
+        else:
+            # Sin largo declarado el cuerpo termina al cerrarse la conexión, que no se reutiliza
+            self.cierra = True
+            while bloque := await self._leer(self.reader.read(BLOQUE)):
+                yield bloque
+
+    async def bloques(self):
+        # gzip o deflate (zlib), como los descomprime requests
+        decodificador = None
+        if self.cabeceras.get('content-encoding', '').lower() in ('gzip', 'deflate'):
+            decodificador = zlib.decompressobj(32 + zlib.MAX_WBITS)
+        async for bloque in self._crudo():
+            if decodificador:
+                bloque = decodificador.decompress(bloque)
+            if bloque:
+                yield bloque
+
+    # Descarta el resto del cuerpo si es chico (LIMITE_DRENADO) para poder reutilizar la conexión
+    async def drenar(self, bloques=None):
+        drenado = 0
+        async for bloque in bloques or self.bloques():
+            drenado += len(bloque)
+            if drenado > LIMITE_DRENADO:
+                break
+
+# Cliente HTTP/1.1 sobre asyncio streams para validar URLs sin bloquear hilos: un GET en streaming
+# que sigue redirecciones y lee solo hasta </title>, como validacion.validar_Url. Respeta los mismos
+# proxies (HTTP_PROXY, HTTPS_PROXY, NO_PROXY), certificados, User-Agent y timeouts que requests, y
+# guarda hasta porHost conexiones keep-alive libres por destino.
+class ClienteValidacion:
+    def __init__(self, porHost=4):
+        self.porHost = porHost
+        self.libres = {}
+        self.conectar, self.timeout = TIMEOUT_VALIDACION
+        self.contextoSsl = ssl.create_default_context(cafile=os.environ.get('REQUESTS_CA_BUNDLE') or os.environ.get('CURL_CA_BUNDLE') or requests.certs.where())
+        self.cabeceras = {'User-Agent': requests.utils.default_user_agent(), 'Accept-Encoding': 'gzip, deflate', 'Accept': '*/*'}
+
+    async def _esperar(self, operacion, plazo=None):
+        return await asyncio.wait_for(operacion, plazo or self.timeout)
+
+    async def _cabecera(self, reader):
+        bloque = await self._esperar(reader.readuntil(b'\r\n\r\n'))
+        lineas = bloque.decode('iso-8859-1').split('\r\n')
+        estado = lineas[0].split(None, 2)
+        if len(estado) < 2 or not estado[0].startswith('HTTP/') or not estado[1].isdigit():
+            raise ConnectionError(f"Respuesta HTTP no válida: {lineas[0]!r}")
+        cabeceras = {}
+        cookies = []
+        for linea in lineas[1:]:
+            nombre, separador, valor = linea.partition(':')
+            if separador:
+                nombre = nombre.strip().lower()
+                if nombre == 'set-cookie':
+                    cookies.append(valor.strip())
+                cabeceras[nombre] = valor.strip()
+        return estado[0], int(estado[1]), cabeceras, cookies
+
+    async def _abrir(self, esquema, host, puerto, proxy):
+        contexto = self.contextoSsl if esquema == 'https' else None
+        if not proxy:
+            return await self._esperar(asyncio.open_connection(host, puerto, ssl=contexto, server_hostname=host if contexto else None), self.conectar)
+        partesProxy = urlsplit(proxy if '://' in proxy else f'http://{proxy}')
+        reader, writer = await self._esperar(asyncio.open_connection(partesProxy.hostname, partesProxy.port or 80), self.conectar)
+        if contexto:
+            # HTTPS a través del proxy: túnel CONNECT y TLS con el host de destino
+            writer.write(f'CONNECT {host}:{puerto} HTTP/1.1\r\nHost: {host}:{puerto}\r\n{self._autorizacion_Proxy(partesProxy)}\r\n'.encode('latin-1'))
+            _, codigo, _, _ = await self._cabecera(reader)
+            if codigo != 200:
+                writer.close()
+                raise ConnectionError(f"El proxy {partesProxy.hostname} rechazó el túnel: {codigo}")
+            await self._esperar(writer.start_tls(contexto, server_hostname=host), self.conectar)
+        return reader, writer
+
+    def _autorizacion_Proxy(self, partesProxy):
+        if not partesProxy.username:
+            return ''
+        credenciales = f'{unquote(partesProxy.username)}:{unquote(partesProxy.password or "")}'
+        return f'Proxy-Authorization: Basic {base64.b64encode(credenciales.encode()).decode()}\r\n'
+
+    # Un GET sobre una conexión libre del pool o una nueva; si una keep-alive reutilizada ya la cerró
+    # el servidor, se reintenta con otra. Devuelve la respuesta y la conexión para devolver()
+    async def _solicitar(self, url, cookies):
+        partes = urlsplit(url)
+        if partes.scheme not in ('http', 'https') or not partes.hostname:
+            raise ValueError(f"URL no válida: {url}")
+        puerto = partes.port or (443 if partes.scheme == 'https' else 80)
+        proxy = select_proxy(url, get_environ_proxies(url))
+        huesped = partes.netloc.rpartition('@')[2]
+        destino = url.split('#')[0] if proxy and partes.scheme == 'http' else (partes.path or '/') + (f'?{partes.query}' if partes.query else '')
+        cabeceras = dict(self.cabeceras, Host=huesped)
+        if cookies.get(partes.hostname):
+            cabeceras['Cookie'] = '; '.join(f'{nombre}={valor}' for nombre, valor in cookies[partes.hostname].items())
+        pedido = f'GET {destino} HTTP/1.1\r\n' + ''.join(f'{nombre}: {valor}\r\n' for nombre, valor in cabeceras.items())
+        if proxy and partes.scheme == 'http':
+            pedido += self._autorizacion_Proxy(urlsplit(proxy if '://' in proxy else f'http://{proxy}'))
+        pedido = (pedido + '\r\n').encode('latin-1')
+
+        clave = (partes.scheme, partes.hostname, puerto, proxy)
+        while True:
+            reutilizada = bool(self.libres.get(clave))
+            reader, writer = self.libres[clave].pop() if reutilizada else await self._abrir(partes.scheme, partes.hostname, puerto, proxy)
+            try:
+                writer.write(pedido)
+                await self._esperar(writer.drain())
+                version, codigo, respuesta, nuevas = await self._cabecera(reader)
+                while 100 <= codigo < 200:
+                    version, codigo, respuesta, nuevas = await self._cabecera(reader)
+            except (OSError, EOFError):
+                writer.close()
+                if not reutilizada:
+                    raise
+                continue
+            except BaseException:
+                writer.close()
+                raise
+            for cookie in nuevas:
+                nombre, _, valor = cookie.split(';', 1)[0].partition('=')
+                cookies.setdefault(partes.hostname, {})[nombre.strip()] = valor.strip()
+            return RespuestaAsync(reader, url, version, codigo, respuesta, self.timeout), (clave, writer)
+
+    # La conexión vuelve al pool solo si el cuerpo se leyó entero y el servidor no la cierra
+    def devolver(self, respuesta, conexion):
+        clave, writer = conexion
+        libres = self.libres.setdefault(clave, [])
+        if respuesta.completo and not respuesta.cierra and len(libres) < self.porHost:
+            libres.append((respuesta.reader, writer))
+        else:
+            writer.close()
+
+    # GET siguiendo redirecciones (las cookies de la cadena se reenvían, como en una Session)
+    async def get(self, url):
+        cookies = {}
+        for _ in range(MAX_REDIRECCIONES + 1):
+            respuesta, conexion = await self._solicitar(url, cookies)
+            ubicacion = respuesta.cabeceras.get('location')
+            if respuesta.codigo not in REDIRECCIONES or not ubicacion:
+                return respuesta, conexion
+            try:
+                await respuesta.drenar()
+            finally:
+                self.devolver(respuesta, conexion)
+            url = urljoin(url, ubicacion)
+        raise ConnectionError(f"Más de {MAX_REDIRECCIONES} redirecciones")
+
+    # Misma lectura que validacion.leer_Titulo: hasta </title>, y después el resto al hash o al drenado
+    async def leer_Titulo(self, respuesta, hashCuerpo=None):
+        contenido = b''
+        bloques = respuesta.bloques()
+        async for bloque in bloques:
+            contenido += bloque
+            if PATRON_TITULO.search(contenido) or len(contenido) >= LIMITE_TITULO:
+                break
+
+        if hashCuerpo is not None:
+            hashCuerpo.update(contenido)
+            async for bloque in bloques:
+                hashCuerpo.update(bloque)
+        else:
+            await respuesta.drenar(bloques)
+
+        return titulo_Html(contenido, respuesta.cabeceras.get('content-type', ''))
+
+    # Versión asyncio de validacion.validar_Url: (codigo, descripcion, firma, urlFinal)
+    async def validar(self, url, firmar=False):
+        firma = {'etag': None, 'lastModified': None, 'hash': None}
+        try:
+            respuesta, conexion = await self.get(url)
+            try:
+                codigo = respuesta.codigo
+                if codigo == 200:
+                    firma['etag'] = respuesta.cabeceras.get('etag')
+                    firma['lastModified'] = respuesta.cabeceras.get('last-modified')
+                    hashCuerpo = None
+                    if firmar and not firma['etag'] and not firma['lastModified']:
+                        hashCuerpo = hashlib.sha256()
+                    titulo = await self.leer_Titulo(respuesta, hashCuerpo)
+                    if hashCuerpo is not None:
+                        firma['hash'] = hashCuerpo.hexdigest()
+                    codigo, descripcion = verificar_Titulo(url, titulo)
+                else:
+                    descripcion = descripcion_Codigo(codigo)
+                    await respuesta.drenar()
+            finally:
+                self.devolver(respuesta, conexion)
+            return codigo, descripcion, firma, respuesta.url
+        except (OSError, EOFError, ValueError, asyncio.LimitOverrunError, zlib.error) as e:
+            # TimeoutError y los errores de TLS también son OSError
+            descripcion = str(e) or type(e).__name__
+            print(f"Error al verificar la URL {url}: {descripcion}")
+            return None, descripcion, firma, None
+
+    def cerrar(self):
+        for libres in self.libres.values():
+            for _, writer in libres:
+                writer.close()
+        self.libres.clear()
+
+# Valida una URL en el bucle de eventos, sin ocupar un hilo por URL en vuelo:
+# (codigo, descripcion, firma, urlFinal). Sin cliente se usa uno propio para esta URL.
+async def validar_Url_Async(url, firmar=False, cliente=None):
+    if cliente:
+        return await cliente.validar(url, firmar)
+    cliente = ClienteValidacion()
+    try:
+        return await cliente.validar(url, firmar)
+    finally:
+        cliente.cerrar()
+
+# Espera a que termine el hijo pid y lo recoge: devuelve el resultado de wait4. Con pidfd
+# (Linux 5.3+) el bucle avisa cuando el proceso termina; sin pidfd se bloquea un hilo en wait4.
+async def esperar_Proceso_Async(pid):
+    try:
+        pidfd = os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        return await asyncio.to_thread(os.wait4, pid, 0)
+    bucle = asyncio.get_running_loop()
+    terminado = bucle.create_future()
+    bucle.add_reader(pidfd, lambda: terminado.done() or terminado.set_result(None))
+    try:
+        await terminado
+    finally:
+        bucle.remove_reader(pidfd)
+        os.close(pidfd)
+    return os.wait4(pid, 0)
+
+def _matar_Grupo(pid, senal):
+    try:
+        os.killpg(pid, senal)
+    except ProcessLookupError:
+        pass
+
+# Versión asyncio de supervisor.ejecutar_Supervisado: el proceso corre en su propio grupo y, al
+# vencer el plazo o cancelarse la tarea, se termina el grupo completo. El proceso siempre se
+# recoge (también al cancelar), así no quedan zombis y uso trae el rusage de wait4.
+async def ejecutar_Supervisado_Async(command, plazo=None, gracia=5):
+    with tempfile.TemporaryFile() as salida, tempfile.TemporaryFile() as errores:
+        proceso = subprocess.Popen(command, stdout=salida, stderr=errores, start_new_session=True)
+        espera = asyncio.ensure_future(esperar_Proceso_Async(proceso.pid))
+        vencido = False
+        try:
+            await asyncio.wait_for(asyncio.shield(espera), plazo)
+        except asyncio.TimeoutError:
+            vencido = True
+            _matar_Grupo(proceso.pid, signal.SIGTERM)
+            try:
+                await asyncio.wait_for(asyncio.shield(espera), gracia)
+            except asyncio.TimeoutError:
+                pass
+            _matar_Grupo(proceso.pid, signal.SIGKILL)
+        except asyncio.CancelledError:
+            # Cancelación (Ctrl+C o SIGTERM): no se deja a Lighthouse corriendo ni sin recoger
+            _matar_Grupo(proceso.pid, signal.SIGKILL)
+            await asyncio.shield(espera)
+            raise
+        _, estado, uso = await espera
+        proceso.returncode = os.waitstatus_to_exitcode(estado)
+        salida.seek(0)
+        errores.seek(0)
+        return ResultadoProceso(proceso.returncode, salida.read().decode('utf-8', errors='replace'),
+                                errores.read().decode('utf-8', errors='replace'), uso, vencido)
@@ -1,4 +1,7 @@
+import argparse
 import os
+import queue
+import threading
 import time
 #import chromedriver_autoinstaller
 from selenium import webdriver
@@ -7,7 +10,8 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import base64
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from almacen import abrir_Reporte, es_Comprimido
+from reportes import path_PDF
 
 def guardar_como_pdf(driver, pathPDF):
     # Usa DevTools para guardar la página como PDF
@@ -20,37 +24,123 @@ def guardar_como_pdf(driver, pathPDF):
     with open(pathPDF, "wb") as archivo:
         archivo.write(base64.b64decode(result['data']))
 
+# Carga un reporte del almacén comprimido directamente en la pestaña, sin escribir una copia descomprimida
+def cargar_Comprimido(driver, pathHTML):
+    with abrir_Reporte(pathHTML) as archivo:
+        contenido = archivo.read().decode('utf-8')
+    driver.get('about:blank')
+    frame = driver.execute_cdp_cmd("Page.getFrameTree", {})['frameTree']['frame']['id']
+    driver.execute_cdp_cmd("Page.setDocumentContent", {"frameId": frame, "html": contenido})
+
+# El PDF existe y es más nuevo que su reporte HTML: no hace falta convertirlo de nuevo
+def pdf_Actualizado(pathHTML, pathPDF):
+    try:
+        return os.path.getmtime(pathPDF) >= os.path.getmtime(pathHTML)
+    except OSError:
+        return False
+
+def crear_driver():
+    # Configura las opciones de Chrome
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")
+    options.add_argument("--incognito")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-dev-shm-usage")
+
+    # Instala y configura chromedriver
+    #chromedriver_autoinstaller.install()
+    return webdriver.Chrome(options=options)
+
+# Sesión de WebDriver de larga duración: convierte muchos reportes con el mismo navegador
+# y se recicla después de un error o de paginasMax páginas
+class SesionPDF:
+    def __init__(self, paginasMax=50):
+        self.paginasMax = paginasMax
+        self.driver = None
+        self.paginas = 0
+
+    def convertir(self, pathHTML, pathPDF):
+        try:
+            if self.driver is None:
+                self.driver = crear_driver()
+                self.paginas = 0
+            if es_Comprimido(pathHTML):
+                cargar_Comprimido(self.driver, pathHTML)
+            else:
+                self.driver.get('file://' + os.path.abspath(pathHTML))
+
+            # Espera a que la página cargue completamente
+            WebDriverWait(self.driver, 10).until(
+                EC.presence_of_element_located((By.TAG_NAME, "script"))
+            )
+
+            # Guarda la página como PDF
+            guardar_como_pdf(self.driver, pathPDF)
+            print(f'PDF generado en: {pathPDF}')
+            self.paginas += 1
+            if self.paginasMax and self.paginas >= self.paginasMax:
+                self.cerrar()
+            return True
+        except Exception as e:
+            print(f"Error al convertir {pathHTML}: {e}")
+            # El navegador puede haber quedado en mal estado: la siguiente página usa una sesión nueva
+            self.cerrar()
+            return False
+
+    def cerrar(self):
+        if self.driver:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                print(f"Error al cerrar la sesión de Chrome: {e}")
+            self.driver = None
+
+# Conversor con un número fijo de sesiones calientes, una por hilo trabajador,
+# que reciben los reportes desde una cola. Los reportes cuyo PDF ya está al día se omiten,
+# así lighthouse.py --pdf puede enviar cada reporte apenas se genera.
+class ConvertidorPDF:
+    def __init__(self, trabajadores=5, paginasPorSesion=50):
+        self.cola = queue.Queue()
+        self.hilos = []
+        for i in range(trabajadores):
+            hilo = threading.Thread(target=self._trabajar, args=(SesionPDF(paginasPorSesion),), name=f'pdf{i}', daemon=True)
+            hilo.start()
+            self.hilos.append(hilo)
+
+    def enviar(self, pathHTML, pathPDF=None):
+        pathPDF = pathPDF or path_PDF(pathHTML)
+        if pdf_Actualizado(pathHTML, pathPDF):
+            return False
+        os.makedirs(os.path.dirname(pathPDF) or '.', exist_ok=True)
+        self.cola.put((pathHTML, pathPDF))
+        return True
+
+    def _trabajar(self, sesion):
+        try:
+            while True:
+                trabajo = self.cola.get()
+                if trabajo is None:
+                    break
+                sesion.convertir(*trabajo)
+        finally:
+            sesion.cerrar()
+
+    # Espera a que se conviertan todos los reportes enviados y cierra las sesiones
+    def cerrar(self):
+        for _ in self.hilos:
+            self.cola.put(None)
+        for hilo in self.hilos:
+            hilo.join()
+
 def convertir_a_pdf(pathHTML, pathPDF):
-    driver = None
+    sesion = SesionPDF()
     try:
-        # Configura las opciones de Chrome
-        options = webdriver.ChromeOptions()
-        options.add_argument("--headless")
-        options.add_argument("--incognito")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--disable-dev-shm-usage")
-
-        # Instala y configura chromedriver
-        #chromedriver_autoinstaller.install()
-        driver = webdriver.Chrome(options=options)
-        driver.get('file://' + pathHTML)
-
-        # Espera a que la página cargue completamente
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.TAG_NAME, "script"))
-        )
-
-        # Guarda la página como PDF
-        guardar_como_pdf(driver, pathPDF)
-        print(f'PDF generado en: {pathPDF}')
-    except Exception as e:
-        print(f"Error al convertir {pathHTML}: {e}")
+        sesion.convertir(pathHTML, pathPDF)
     finally:
-        if driver:
-            driver.quit()
+        sesion.cerrar()
 
-def convertir_all_htmls(pathCarpetaHTML, pathCarpetaPDF):
+def convertir_all_htmls(pathCarpetaHTML, pathCarpetaPDF, trabajadores=5, paginasPorSesion=50):
     inicio = time.time()
 
     archivosHTML = [f for f in os.listdir(pathCarpetaHTML) if f.endswith(".html")]
@@ -58,24 +148,31 @@ def convertir_all_htmls(pathCarpetaHTML, pathCarpetaPDF):
     if not os.path.exists(pathCarpetaPDF):
         os.makedirs(pathCarpetaPDF)
 
-    with ProcessPoolExecutor(max_workers=5) as executor:
-        futures = []
-        for nombreArchivo in archivosHTML:
-            pathHTML = os.path.join(pathCarpetaHTML, nombreArchivo)
-            pathPDF = os.path.join(pathCarpetaPDF, nombreArchivo.replace(".html", ".pdf"))
-            futures.append(executor.submit(convertir_a_pdf, pathHTML, pathPDF))
+    # Solo se convierten los reportes nuevos o regenerados desde su último PDF
+    pendientes = []
+    for nombreArchivo in archivosHTML:
+        pathHTML = os.path.join(pathCarpetaHTML, nombreArchivo)
+        pathPDF = os.path.join(pathCarpetaPDF, os.path.basename(path_PDF(pathHTML)))
+        if not pdf_Actualizado(pathHTML, pathPDF):
+            pendientes.append((pathHTML, pathPDF))
+    print(f"{len(pendientes)} de {len(archivosHTML)} reportes por convertir")
 
-        for future in as_completed(futures):
-            try:
-                future.result()
-            except Exception as e:
-                print(f"Error en la conversión: {e}")
+    if pendientes:
+        convertidor = ConvertidorPDF(min(trabajadores, len(pendientes)), paginasPorSesion)
+        for pathHTML, pathPDF in pendientes:
+            convertidor.enviar(pathHTML, pathPDF)
+        convertidor.cerrar()
 
     termino = time.time()
     totalTest = round(termino - inicio, 2)
     print(f'Tiempo total de la prueba: {totalTest} segundos')
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Convierte los reportes HTML de Lighthouse a PDF')
+    parser.add_argument('--trabajadores', type=int, default=5, help='Número de sesiones de Chrome convirtiendo en paralelo')
+    parser.add_argument('--paginas-por-sesion', type=int, default=50, help='Reiniciar cada sesión de Chrome después de N páginas')
+    args = parser.parse_args()
+
     current_directory = os.getcwd()
     pathCarpetaHTMLDesktop = f'{current_directory}/HTMLDesktop'
     pathCarpetaPDFDesktop = f'{current_directory}/PDFDesktop'
@@ -83,7 +180,7 @@ if __name__ == "__main__":
     pathCarpetaPDFMobile = f'{current_directory}/PDFMobile'
 
     print("Convirtiendo archivos HTMLDesktop a PDFDesktop...")
-    convertir_all_htmls(pathCarpetaHTMLDesktop, pathCarpetaPDFDesktop)
+    convertir_all_htmls(pathCarpetaHTMLDesktop, pathCarpetaPDFDesktop, args.trabajadores, args.paginas_por_sesion)
 
     print("Convirtiendo archivos HTMLMobile a PDFMobile...")
-    convertir_all_htmls(pathCarpetaHTMLMobile, pathCarpetaPDFMobile)
+    convertir_all_htmls(pathCarpetaHTMLMobile, pathCarpetaPDFMobile, args.trabajadores, args.paginas_por_sesion)
@@ -0,0 +1,33 @@
+from collections import namedtuple
+
+# Perfiles de auditoría (--perfil): qué corre Lighthouse en cada auditoría y qué reportes guarda.
+# El Excel solo usa performance, accessibility y seo; best-practices, las capturas de pantalla y
+# el reporte HTML cuestan tiempo de Lighthouse y disco sin cambiar esas puntuaciones.
+#   completo  configuración por defecto de Lighthouse, reportes JSON y HTML (ejecuciones nocturnas)
+#   estandar  solo las categorías del Excel, reportes JSON y HTML
+#   triage    las categorías del Excel sin capturas de pantalla y solo el JSON (barridos cada hora)
+# categorias va a --only-categories, soloAuditorias a --only-audits y omitirAuditorias a
+# --skip-audits (None = sin filtro). soloAuditorias recalcula las categorías solo con esas
+# auditorías, por eso los perfiles que alimentan el Excel no lo usan.
+PerfilAuditoria = namedtuple('PerfilAuditoria', ['categorias', 'soloAuditorias', 'omitirAuditorias', 'capturaCompleta', 'formatos'])
+
+PERFILES = {
+    'completo': PerfilAuditoria(None, None, None, True, ['json', 'html']),
+    'estandar': PerfilAuditoria(['performance', 'accessibility', 'seo'], None, None, True, ['json', 'html']),
+    'triage': PerfilAuditoria(['performance', 'accessibility', 'seo'], None, ['screenshot-thumbnails', 'final-screenshot'], False, ['json'])
+}
+PERFIL_POR_DEFECTO = 'completo'
+
+# Banderas de Lighthouse de un perfil; también forman parte de la clave del cache
+def banderas_Perfil(nombre):
+    perfil = PERFILES[nombre]
+    banderas = []
+    if perfil.categorias:
+        banderas.append(f"--only-categories={','.join(perfil.categorias)}")
+    if perfil.soloAuditorias:
+        banderas.append(f"--only-audits={','.join(perfil.soloAuditorias)}")
+    if perfil.omitirAuditorias:
+        banderas.append(f"--skip-audits={','.join(perfil.omitirAuditorias)}")
+    if not perfil.capturaCompleta:
+        banderas.append('--disable-full-page-screenshot')
+    return banderas
@@ -0,0 +1,67 @@
+import os
+import queue
+import shutil
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Cada trabajador tiene su propio perfil de Chrome, así dos auditorías concurrentes nunca
+# comparten navegador ni user-data-dir; el puerto de depuración solo se usa con un PoolChrome
+Trabajador = namedtuple('Trabajador', ['id', 'puerto', 'perfil'])
+
+# Planificador que ejecuta trabajos (url, mode) como unidades independientes
+# sobre un número fijo de trabajadores. Con un PoolChrome cada trabajador
+# reutiliza un Chrome persistente en su puerto en lugar de lanzar uno por auditoría.
+# Con un ControladorConcurrencia, los trabajadores son el máximo y el controlador decide
+# cuántos auditan a la vez según la carga del host
+class PlanificadorAuditorias:
+    def __init__(self, funcionAuditoria, trabajadores=1, puertoBase=9222, poolChrome=None, controlador=None):
+        self.funcionAuditoria = funcionAuditoria
+        self.poolChrome = poolChrome
+        self.controlador = controlador
+        self.libres = queue.Queue()
+        self.trabajadores = []
+        for i in range(trabajadores):
+            perfil = tempfile.mkdtemp(prefix=f'lighthouse_trabajador{i}_')
+            trabajador = Trabajador(i, puertoBase + i, perfil)
+            self.trabajadores.append(trabajador)
+            self.libres.put(trabajador)
+        self.ejecutor = ThreadPoolExecutor(max_workers=trabajadores, thread_name_prefix='auditoria')
+
+    # Encola la auditoría de una URL en un modo y devuelve su Future
+    # (los argumentos extra, como el número de muestra, se pasan a la función de auditoría)
+    def enviar(self, url, mode, *extra):
+        return self.ejecutor.submit(self._ejecutar, url, mode, *extra)
+
+    def _ejecutar(self, url, mode, *extra):
+        if self.controlador:
+            self.controlador.adquirir()
+        trabajador = self.libres.get()
+        try:
+            if self.poolChrome:
+                try:
+                    self.poolChrome.preparar(trabajador)
+                except RuntimeError as e:
+                    # Sin Chrome persistente, Lighthouse lanza su propio Chrome en un puerto libre
+                    print(f"Error al preparar Chrome del trabajador {trabajador.id}: {e}")
+            return self.funcionAuditoria(url, mode, trabajador, *extra)
+        finally:
+            if self.poolChrome:
+                self.poolChrome.liberar(trabajador)
+            self.libres.put(trabajador)
+            if self.controlador:
+                self.controlador.liberar()
+
+    # Descarta los trabajos que todavía no empezaron (al interrumpir la ejecución); sus Futures
+    # quedan cancelados y los que están en curso terminan solos
+    def cancelar(self):
+        self.ejecutor.shutdown(wait=False, cancel_futures=True)
+
+    def cerrar(self):
+        self.ejecutor.shutdown(wait=True)
+        # Chrome debe terminar antes de borrar su perfil
+        if self.poolChrome:
+            self.poolChrome.cerrar()
+        for trabajador in self.trabajadores:
+            if os.path.isdir(trabajador.perfil):
+                shutil.rmtree(trabajador.perfil, ignore_errors=True)
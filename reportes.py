@@ -0,0 +1,168 @@
+import json
+import mmap
+import os
+import re
+from almacen import abrir_Reporte, es_Comprimido, formato_Reporte
+
+# Marcador del JSON embebido en los reportes HTML de Lighthouse
+MARCADOR_HTML = b'window.__LIGHTHOUSE_JSON__'
+# Clave "categories" de primer nivel en el JSON de Lighthouse (indentado con 2 espacios)
+MARCADOR_CATEGORIAS = b'\n  "categories": '
+# environment.benchmarkIndex va al principio del JSON, antes de "audits"
+PATRON_BENCHMARK = re.compile(rb'"benchmarkIndex":\s*([0-9.]+)')
+
+def puntuaciones_Vacias():
+    return {'performance': None, 'accessibility': None, 'seo': None}
+
+# Convierte las categorías del reporte a puntuaciones 0-100 ("N/A" si Lighthouse no pudo calcularla)
+def puntuaciones_Categorias(categorias):
+    puntuaciones = puntuaciones_Vacias()
+    for categoria in puntuaciones:
+        score = categorias[categoria]["score"]
+        puntuaciones[categoria] = int(score*100) if score is not None else "N/A"
+    return puntuaciones
+
+# Archivo que escribe Lighthouse para un formato: con un solo --output usa --output-path tal cual;
+# con varios le quita la extensión y escribe <base>.report.<formato>
+def path_Salida(pathSalida, formato, formatos):
+    if len(formatos) > 1:
+        return f'{os.path.splitext(pathSalida)[0]}.report.{formato}'
+    return pathSalida
+
+# Reporte JSON que Lighthouse escribió junto a un reporte HTML (x.report.html -> x.report.json)
+def path_Json(pathReporte):
+    return os.path.splitext(pathReporte)[0] + '.json'
+
+# Ruta del PDF de un reporte: HTMLMobile/x.report.html -> PDFMobile/x.pdf
+def path_PDF(pathHTML):
+    carpeta, nombreArchivo = os.path.split(pathHTML)
+    carpetaPDF = os.path.join(os.path.dirname(carpeta), os.path.basename(carpeta).replace('HTML', 'PDF', 1))
+    return os.path.join(carpetaPDF, re.sub(r'(\.report)?\.html$', '.pdf', nombreArchivo))
+
+# Lee solo el objeto "categories" del JSON: lo decodifica por ventanas crecientes a partir
+# de la clave y se detiene apenas el objeto está completo, sin cargar "audits" ni capturas
+def leer_Categorias_Json(pathJSON):
+    with open(pathJSON, 'rb') as archivo, mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+        inicio = datos.find(MARCADOR_CATEGORIAS)
+        if inicio == -1:
+            # JSON sin el formato esperado (por ejemplo compactado): lectura completa
+            return json.loads(datos[:])["categories"]
+
+        inicio += len(MARCADOR_CATEGORIAS)
+        decodificador = json.JSONDecoder()
+        ventana = 64 * 1024
+        while True:
+            fragmento = datos[inicio:inicio + ventana].decode('utf-8', errors='ignore')
+            try:
+                categorias, _ = decodificador.raw_decode(fragmento)
+                return categorias
+            except json.JSONDecodeError:
+                if inicio + ventana >= len(datos):
+                    raise
+                ventana *= 2
+
+# Lee el JSON embebido en un reporte HTML sin cargar el archivo línea por línea
+def leer_Categorias_Html(pathHTML):
+    with open(pathHTML, 'rb') as archivo, mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+        marcador = datos.find(MARCADOR_HTML)
+        if marcador == -1:
+            return None
+        inicio = datos.find(b'=', marcador) + 1
+        # Lighthouse escapa "<" dentro del JSON, así que el primer ";</script>" cierra el bloque
+        fin = datos.find(b';</script>', inicio)
+        if fin == -1:
+            return None
+        return json.loads(datos[inicio:fin].decode('utf-8'))["categories"]
+
+# benchmarkIndex del reporte (velocidad del host que midió Lighthouse); solo revisa los primeros
+# 64 KB del JSON, o los 64 KB que siguen al marcador en un HTML. None si no aparece.
+def leer_Benchmark_Index(pathReporte):
+    if not pathReporte.endswith('.json') and os.path.exists(path_Json(pathReporte)):
+        pathReporte = path_Json(pathReporte)
+    try:
+        with open(pathReporte, 'rb') as archivo, mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+            inicio = 0 if pathReporte.endswith('.json') else datos.find(MARCADOR_HTML)
+            if inicio == -1:
+                return None
+            encontrado = PATRON_BENCHMARK.search(datos[inicio:inicio + 64 * 1024])
+            return float(encontrado.group(1)) if encontrado else None
+    except (OSError, ValueError):
+        return None
+
+# Lee "categories" de un reporte comprimido del almacén descomprimiéndolo en streaming,
+# sin escribir una copia descomprimida: se descarta todo hasta el marcador y se decodifica
+# solo lo necesario después de él
+def leer_Categorias_Stream(pathReporte):
+    esJson = formato_Reporte(pathReporte) == 'json'
+    marcador = MARCADOR_CATEGORIAS if esJson else MARCADOR_HTML
+    bloqueMax = 1024 * 1024
+    with abrir_Reporte(pathReporte) as archivo:
+        contenido = b''
+        while True:
+            bloque = archivo.read(bloqueMax)
+            if not bloque:
+                return None
+            contenido += bloque
+            posicion = contenido.find(marcador)
+            if posicion != -1:
+                contenido = contenido[posicion + len(marcador):]
+                break
+            contenido = contenido[-len(marcador):]
+
+        if esJson:
+            decodificador = json.JSONDecoder()
+            while True:
+                try:
+                    categorias, _ = decodificador.raw_decode(contenido.decode('utf-8', errors='ignore'))
+                    return categorias
+                except json.JSONDecodeError:
+                    bloque = archivo.read(bloqueMax)
+                    if not bloque:
+                        raise
+                    contenido += bloque
+
+        # HTML: el JSON embebido termina en el primer ";</script>"
+        while b';</script>' not in contenido:
+            bloque = archivo.read(bloqueMax)
+            if not bloque:
+                return None
+            contenido += bloque
+        contenido = contenido[contenido.find(b'=') + 1:contenido.find(b';</script>')]
+        return json.loads(contenido.decode('utf-8'))["categories"]
+
+# Lee el reporte completo de Lighthouse (JSON, HTML con el JSON embebido, o comprimido del almacén)
+def leer_Reporte(pathReporte):
+    with abrir_Reporte(pathReporte) as archivo:
+        contenido = archivo.read()
+    if formato_Reporte(pathReporte) == 'json':
+        return json.loads(contenido)
+
+    marcador = contenido.find(MARCADOR_HTML)
+    if marcador == -1:
+        return None
+    inicio = contenido.find(b'=', marcador) + 1
+    fin = contenido.find(b';</script>', inicio)
+    if fin == -1:
+        return None
+    return json.loads(contenido[inicio:fin])
+
+# Función para extraer las puntuaciones de SEO, Accesibilidad y Performance del reporte.
+# Usa el JSON de Lighthouse si existe; los reportes solo HTML se leen con mmap
+# y los del almacén comprimido en streaming.
+def extraer_Puntuaciones(pathReporte):
+    try:
+        if es_Comprimido(pathReporte):
+            categorias = leer_Categorias_Stream(pathReporte)
+        elif pathReporte.endswith('.json'):
+            categorias = leer_Categorias_Json(pathReporte)
+        elif os.path.exists(path_Json(pathReporte)):
+            categorias = leer_Categorias_Json(path_Json(pathReporte))
+        else:
+            categorias = leer_Categorias_Html(pathReporte)
+
+        if categorias is None:
+            return puntuaciones_Vacias()
+        return puntuaciones_Categorias(categorias)
+    except Exception as e:
+        print(f"Error al extraer puntuaciones desde {pathReporte}: {e}")
+        return puntuaciones_Vacias()
@@ -0,0 +1,91 @@
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+# Encabezados de la hoja de resultados
+ENCABEZADOS = ['URL', 'Performance Mobile', 'Performance Desktop', 'Accesibilidad Mobile', 'Accesibilidad Desktop', 'SEO Mobile', 'SEO Desktop', 'Código', 'Descripción Código']
+# Columnas extra del modo muestreo (--muestras-max > 1)
+ENCABEZADOS_MUESTREO = ['Muestras Mobile', 'Muestras Desktop', 'Varianza Performance Mobile', 'Varianza Performance Desktop']
+# Columnas extra de la concurrencia adaptativa (--concurrencia-adaptativa): motivo si el host estuvo sobrecargado
+ENCABEZADOS_CARGA = ['Sobrecarga Mobile', 'Sobrecarga Desktop']
+# Columna extra de los perfiles de auditoría (--perfil distinto de completo)
+ENCABEZADOS_PERFIL = ['Perfil']
+
+# Construye la fila de resultados de una URL en el orden de ENCABEZADOS (+ ENCABEZADOS_MUESTREO, + ENCABEZADOS_CARGA, + ENCABEZADOS_PERFIL)
+def fila_Resultado(url, puntuacionesMOBILE, puntuacionesDESKTOP, codigo, descripcionCodigo, muestreo=False, carga=False, perfil=False):
+    fila = [
+        url,
+        puntuacionesMOBILE['performance'], puntuacionesDESKTOP['performance'],
+        puntuacionesMOBILE['accessibility'], puntuacionesDESKTOP['accessibility'],
+        puntuacionesMOBILE['seo'], puntuacionesDESKTOP['seo'],
+        codigo, descripcionCodigo
+    ]
+    if muestreo:
+        fila.extend([
+            puntuacionesMOBILE.get('muestras'), puntuacionesDESKTOP.get('muestras'),
+            puntuacionesMOBILE.get('varianza'), puntuacionesDESKTOP.get('varianza')
+        ])
+    if carga:
+        fila.extend([puntuacionesMOBILE.get('sobrecarga'), puntuacionesDESKTOP.get('sobrecarga')])
+    if perfil:
+        # Ambos modos corren con el mismo perfil; una URL con error no tiene perfil
+        fila.append(puntuacionesMOBILE.get('perfil') or puntuacionesDESKTOP.get('perfil'))
+    return fila
+
+# Acumula los resultados en memoria y los escribe al Excel en bloque.
+# Mantiene un indice URL -> fila para actualizar sin recorrer la hoja y el largo
+# maximo de cada columna para calcular los anchos una sola vez al escribir.
+# Con orden ({url: posición en urls.txt}) las filas se escriben en el orden de entrada aunque
+# las URLs terminen en otro orden; las URLs que no están en orden van al final.
+class ResultadosExcel:
+    def __init__(self, pathArchivo, flushCada=0, muestreo=False, carga=False, perfil=False, orden=None):
+        self.pathArchivo = pathArchivo
+        self.orden = orden
+        self.muestreo = muestreo
+        self.carga = carga
+        self.perfil = perfil
+        self.encabezados = (ENCABEZADOS + (ENCABEZADOS_MUESTREO if muestreo else []) + (ENCABEZADOS_CARGA if carga else [])
+                            + (ENCABEZADOS_PERFIL if perfil else []))
+        # 0 = escribir solo al cerrar; N = escribir cada N filas nuevas o actualizadas
+        self.flushCada = flushCada
+        self.filas = []
+        self.indice = {}
+        self.largos = [len(str(valor)) for valor in self.encabezados]
+        self.pendientes = 0
+
+    def registrar(self, url, puntuacionesMOBILE, puntuacionesDESKTOP, codigo, descripcionCodigo):
+        fila = fila_Resultado(url, puntuacionesMOBILE, puntuacionesDESKTOP, codigo, descripcionCodigo, self.muestreo, self.carga, self.perfil)
+        posicion = self.indice.get(url)
+        if posicion is None:
+            self.indice[url] = len(self.filas)
+            self.filas.append(fila)
+        else:
+            self.filas[posicion] = fila
+
+        for i, valor in enumerate(fila):
+            if valor is not None:
+                self.largos[i] = max(self.largos[i], len(str(valor)))
+
+        self.pendientes += 1
+        if self.flushCada and self.pendientes >= self.flushCada:
+            self.guardar()
+
+    def guardar(self):
+        # Modo write-only: la hoja se escribe en streaming desde las filas en memoria
+        libro = Workbook(write_only=True)
+        hoja = libro.create_sheet()
+        for i, largo in enumerate(self.largos):
+            hoja.column_dimensions[get_column_letter(i + 1)].width = largo + 2
+
+        hoja.append(self.encabezados)
+        filas = self.filas
+        if self.orden:
+            filas = sorted(filas, key=lambda fila: self.orden.get(fila[0], len(self.orden)))
+        for fila in filas:
+            hoja.append(fila)
+
+        libro.save(self.pathArchivo)
+        self.pendientes = 0
+
+    def cerrar(self):
+        if self.pendientes or not self.filas:
+            self.guardar()
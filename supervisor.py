@@ -0,0 +1,171 @@
+import os
+import random
+import select
+import signal
+import subprocess
+import tempfile
+import time
+from collections import namedtuple
+
+# Resultado de un proceso supervisado; uso es el rusage de wait4 (CPU y RSS máximo del proceso y de los hijos que esperó)
+ResultadoProceso = namedtuple('ResultadoProceso', ['codigo', 'stdout', 'stderr', 'uso', 'vencido'])
+
+# Errores de Lighthouse que suelen resolverse repitiendo la auditoría (Chrome lento, caído o sin pintar)
+ERRORES_TRANSITORIOS = [
+    'PROTOCOL_TIMEOUT', 'PAGE_HUNG', 'NO_FCP', 'NO_NAVSTART', 'NO_TRACING_STARTED', 'NO_SCREENSHOTS',
+    'Unable to connect to Chrome', 'ECONNREFUSED', 'ECONNRESET', 'Target closed', 'Session closed', 'TargetCloseError'
+]
+# Errores de la página: repetir la auditoría daría el mismo resultado
+ERRORES_PERMANENTES = [
+    'INVALID_URL', 'FAILED_DOCUMENT_REQUEST', 'ERRORED_DOCUMENT_REQUEST', 'CHROME_INTERSTITIAL_ERROR',
+    'NOT_HTML', 'DNS_FAILURE', 'INSECURE_DOCUMENT_REQUEST'
+]
+
+# Clasifica una ejecución fallida: 'vencido' (superó su plazo), 'transitorio', 'permanente' o 'desconocido'
+def clasificar_Fallo(resultado):
+    if resultado.vencido:
+        return 'vencido'
+    for error in ERRORES_PERMANENTES:
+        if error in resultado.stderr:
+            return 'permanente'
+    for error in ERRORES_TRANSITORIOS:
+        if error in resultado.stderr:
+            return 'transitorio'
+    # Terminado por una señal (por ejemplo el OOM killer)
+    if resultado.codigo < 0:
+        return 'transitorio'
+    return 'desconocido'
+
+# Espera exponencial con jitter antes del reintento número intento (1, 2, ...)
+def espera_Reintento(intento, base=5, maximo=60):
+    return min(maximo, base * 2 ** (intento - 1)) * random.uniform(0.5, 1)
+
+def _terminar_Grupo(pgid, gracia=5):
+    try:
+        os.killpg(pgid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    limite = time.time() + gracia
+    while time.time() < limite:
+        try:
+            os.killpg(pgid, 0)
+        except ProcessLookupError:
+            return
+        time.sleep(0.1)
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+# Espera hasta plazo segundos (None = sin límite) a que termine el hijo pid y lo recoge con wait4.
+# Con un pidfd (Linux 5.3+) el hilo queda bloqueado en poll hasta que el proceso termina, sin
+# consultas periódicas; sin pidfd se consulta wait4 cada 0.1 s. Devuelve None si vence el plazo.
+def esperar_Proceso(pid, plazo=None):
+    try:
+        pidfd = os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        pidfd = None
+    if pidfd is not None:
+        try:
+            sondeo = select.poll()
+            sondeo.register(pidfd, select.POLLIN)
+            if not sondeo.poll(None if plazo is None else max(0, plazo) * 1000):
+                return None
+        finally:
+            os.close(pidfd)
+        return os.wait4(pid, 0)
+
+    limite = time.time() + plazo if plazo is not None else None
+    while True:
+        resultado = os.wait4(pid, os.WNOHANG)
+        if resultado[0]:
+            return resultado
+        if limite and time.time() >= limite:
+            return None
+        time.sleep(0.1)
+
+# Termina un hijo que es líder de su grupo: SIGTERM al grupo, espera a que el hijo termine y
+# SIGKILL a lo que quede. Devuelve el resultado de wait4 del hijo.
+def _terminar_Proceso(pid, gracia=5):
+    try:
+        os.killpg(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    resultado = esperar_Proceso(pid, gracia)
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    return resultado or os.wait4(pid, 0)
+
+# Ejecuta un comando en su propio grupo de procesos con un plazo en segundos. Si se vence, se
+# termina el grupo completo (SIGTERM y luego SIGKILL). La salida va a archivos temporales para
+# no bloquear el proceso con pipes llenos. Mientras corre, su pid queda en el conjunto enCurso
+# (si se pasa) para poder terminarlo con terminar_Procesos al interrumpir la ejecución.
+def ejecutar_Supervisado(command, plazo=None, enCurso=None):
+    with tempfile.TemporaryFile() as salida, tempfile.TemporaryFile() as errores:
+        proceso = subprocess.Popen(command, stdout=salida, stderr=errores, start_new_session=True)
+        if enCurso is not None:
+            enCurso.add(proceso.pid)
+        try:
+            resultado = esperar_Proceso(proceso.pid, plazo or None)
+            vencido = resultado is None
+            if vencido:
+                resultado = _terminar_Proceso(proceso.pid)
+        finally:
+            if enCurso is not None:
+                enCurso.discard(proceso.pid)
+        _, estado, uso = resultado
+        proceso.returncode = os.waitstatus_to_exitcode(estado)
+        salida.seek(0)
+        errores.seek(0)
+        return ResultadoProceso(proceso.returncode, salida.read().decode('utf-8', errors='replace'),
+                                errores.read().decode('utf-8', errors='replace'), uso, vencido)
+
+# Termina con SIGKILL los grupos de los procesos supervisados pids (Ctrl+C con auditorías en
+# curso); cada ejecutar_Supervisado los recoge y devuelve el código de la señal
+def terminar_Procesos(pids):
+    for pid in list(pids):
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+# Procesos cuyo cmdline contiene el texto dado: [(pid, ppid, pgid)]. Solo en Linux (/proc).
+def buscar_Procesos(texto):
+    if not os.path.isdir('/proc'):
+        return []
+    encontrados = []
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as archivo:
+                cmdline = archivo.read().replace(b'\0', b' ').decode('utf-8', errors='replace')
+            if texto not in cmdline:
+                continue
+            with open(f'/proc/{pid}/stat', 'r') as archivo:
+                campos = archivo.read().rsplit(')', 1)[1].split()
+            encontrados.append((int(pid), int(campos[1]), int(campos[2])))
+        except (OSError, IndexError, ValueError):
+            pass
+    return encontrados
+
+def _terminar_Grupos(procesos, descripcion):
+    grupos = {pgid for _, _, pgid in procesos}
+    for pgid in grupos:
+        print(f"Terminando Chrome sobrante {descripcion} (grupo {pgid})")
+        _terminar_Grupo(pgid, gracia=2)
+    return len(grupos)
+
+# Termina los Chrome que siguen vivos con el perfil de un trabajador. chrome-launcher lanza Chrome
+# en su propio grupo de procesos, así que matar a Lighthouse no los alcanza; el perfil de cada
+# trabajador identifica a su Chrome.
+def limpiar_Chrome(perfil):
+    # El espacio final evita confundir perfiles que empiezan igual
+    return _terminar_Grupos(buscar_Procesos(f'--user-data-dir={perfil} '), f'del perfil {perfil}')
+
+# Al iniciar: Chrome huérfanos (sin padre) de ejecuciones anteriores que murieron sin cerrar sus navegadores
+def limpiar_Chrome_Huerfanos(prefijoPerfil='lighthouse_trabajador'):
+    prefijo = os.path.join(tempfile.gettempdir(), prefijoPerfil)
+    return _terminar_Grupos([proceso for proceso in buscar_Procesos(f'--user-data-dir={prefijo}') if proceso[1] == 1], 'de una ejecución anterior')
@@ -1,34 +1,49 @@
+import argparse
+import asyncio
+import os
+import shutil
 import time
 import json
-import subprocess
+from datetime import datetime
+from functools import lru_cache
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
 from webdriver_manager.chrome import ChromeDriverManager
-from jinja2 import Template
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from jinja2 import Environment
+from markupsafe import Markup
+from orquestador import ejecutar_Supervisado_Async
 
-# Función para ejecutar Lighthouse en una URL específica (Mobile - Desktop)
-def auditoria_Lighthouse(url, mode):
+# Función para ejecutar Lighthouse en una URL específica (Mobile - Desktop). Corre como tarea del
+# bucle de eventos (ejecutar_Supervisado_Async de orquestador.py); auditorias limita cuántas corren a la vez
+async def auditoria_Lighthouse(url, mode, auditorias):
     # Ruta salida informe JSON
     final_JSON = f'report_{mode}_{url.replace("https://", "").replace("/", "_")}.json'
     
     # Comando para ejecutar Lighthouse con la config necesaria
     command = [
-        'lighthouse',
+        shutil.which('lighthouse') or 'lighthouse',
         url,
         '--output=json',
         f'--output-path={final_JSON}',
-        '--chrome-flags="--headless --no-sandbox --disable-gpu --disable-dev-shm-usage"'
+        '--chrome-flags=--headless --no-sandbox --disable-gpu --disable-dev-shm-usage'
     ]
     # Configuracion extra para el modo Desktop
     if mode == 'desktop':
         command.append('--preset=desktop')
     
     # Eejcuta la auditoria de Lighthouse y captura cualquier salida o error generado por el comando.
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
+    try:
+        async with auditorias:
+            result = await ejecutar_Supervisado_Async(command, args.plazo)
+    except FileNotFoundError:
+        print("Lighthouse no se encontró en el PATH")
+        return None
     
     # Si el comando no se ejecutó correctamente, imprime el error
-    if result.returncode != 0:
+    if result.vencido:
+        print(f"Lighthouse superó el plazo de {args.plazo} segundos en {url} ({mode})")
+        return None
+    if result.codigo != 0:
         print(f"Error al ejecutar Lighthouse desde {url} ({mode}):\n{result.stderr}")
         return None
     
@@ -56,27 +71,120 @@ def auditoria_Lighthouse(url, mode):
         print(f"Error al decodificar el archivo JSON: {final_JSON}.")
         return None
 
-# Funcion que levanta Google Chrome y ejecuta Lighthouse para una URL
-def urls_Lighthouse(url):
-    # Configuracion de Google Chrome
-    options = webdriver.ChromeOptions()
-    options.add_argument("--headless")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--disable-dev-shm-usage")
-    
-    driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=options)
-    driver.get(url)
+# chromedriver se resuelve (y descarga si hace falta) una sola vez por proceso
+@lru_cache(maxsize=None)
+def ruta_Driver():
+    return ChromeDriverManager().install()
+
+# Etapa de calentamiento: visita las URLs antes de auditarlas para que los caches del servidor y
+# de la CDN ya estén llenos cuando corre Lighthouse (que lanza su propio Chrome). Un solo Chrome
+# carga varias URLs a la vez, una por pestaña: con pageLoadStrategy "none" driver.get no espera a
+# la carga y cada pestaña se revisa hasta que la página queda lista y sin tráfico de red.
+class CalentadorCache:
+    def __init__(self, pestanas=8, espera=30, silencio=0.5):
+        self.pestanas = pestanas
+        # Segundos máximos por URL y segundos sin recursos nuevos para considerar la red inactiva
+        self.espera = espera
+        self.silencio = silencio
+        self.driver = None
+
+    def _iniciar(self):
+        # Configuracion de Google Chrome
+        options = webdriver.ChromeOptions()
+        options.add_argument("--headless")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--disable-dev-shm-usage")
+        options.page_load_strategy = 'none'
+        self.driver = webdriver.Chrome(service=ChromeService(ruta_Driver()), options=options)
+
+    # Marca el documento actual de la pestaña antes de navegar. Con pageLoadStrategy 'none'
+    # driver.get vuelve antes de que cambie el documento, y el anterior ya está 'complete'.
+    def _marcar_Anterior(self):
+        self.driver.execute_script("window.__documentoAnterior = true;")
+
+    # Estado de la pestaña actual: (documento de la URL pedida cargado, recursos pedidos hasta ahora).
+    # El documento es el de la URL pedida si ya no tiene la marca del anterior, no es about:blank y
+    # tiene su entrada de navegación (cuyo name es la URL final, después de las redirecciones).
+    def _estado(self):
+        completo, recursos, anterior, urlDocumento, urlNavegacion = self.driver.execute_script(
+            "const navegacion = performance.getEntriesByType('navigation')[0];"
+            "return [document.readyState === 'complete', performance.getEntriesByType('resource').length,"
+            " window.__documentoAnterior === true, document.URL, navegacion ? navegacion.name : null];"
+        )
+        propio = not anterior and urlDocumento != 'about:blank' and urlNavegacion is not None
+        return completo and propio, recursos
 
-    time.sleep(10)
+    def calentar(self, urls):
+        inicio = time.time()
+        if self.driver is None:
+            self._iniciar()
+        pendientes = list(urls)
+        pendientes.reverse()
+        # Pestaña -> [url, inicio de la carga, recursos vistos, momento del último recurso nuevo]
+        enCurso = {}
+        libres = [self.driver.current_window_handle]
+        for _ in range(min(self.pestanas, len(pendientes)) - 1):
+            self.driver.switch_to.new_window('tab')
+            libres.append(self.driver.current_window_handle)
+
+        listas = 0
+        while pendientes or enCurso:
+            while libres and pendientes:
+                pestana = libres.pop()
+                url = pendientes.pop()
+                self.driver.switch_to.window(pestana)
+                try:
+                    self._marcar_Anterior()
+                    self.driver.get(url)
+                    enCurso[pestana] = [url, time.time(), -1, time.time()]
+                except Exception as e:
+                    print(f"Error al calentar {url}: {e}")
+                    libres.append(pestana)
+
+            for pestana, carga in list(enCurso.items()):
+                url, comienzo, recursos, ultimoCambio = carga
+                self.driver.switch_to.window(pestana)
+                try:
+                    completo, recursosActuales = self._estado()
+                except Exception as e:
+                    print(f"Error al calentar {url}: {e}")
+                    del enCurso[pestana]
+                    libres.append(pestana)
+                    continue
+                ahora = time.time()
+                if recursosActuales != recursos:
+                    carga[2], carga[3] = recursosActuales, ahora
+                if completo and ahora - carga[3] >= self.silencio:
+                    listas += 1
+                elif ahora - comienzo > self.espera:
+                    print(f"{url} no terminó de cargar en {self.espera} segundos, se audita igual")
+                else:
+                    continue
+                del enCurso[pestana]
+                libres.append(pestana)
+            time.sleep(0.1)
+
+        print(f"Calentamiento: {listas} de {len(urls)} URLs listas en {round(time.time() - inicio, 2)} segundos")
+
+    def cerrar(self):
+        if self.driver:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                print(f"Error al cerrar la sesión de Chrome: {e}")
+            self.driver = None
+
+# Funcion que ejecuta Lighthouse para una URL (ya calentada)
+async def urls_Lighthouse(url, auditorias):
     inicio = time.time()
 
-    # Ejecutar Lighthouse (Movile - Desktop)
-    resultados_MOBILE = auditoria_Lighthouse(url, 'mobile')
-    resultados_DESKTOP = auditoria_Lighthouse(url, 'desktop')
+    # Ejecutar Lighthouse (Movile - Desktop) en paralelo, dentro del límite de auditorías
+    resultados_MOBILE, resultados_DESKTOP = await asyncio.gather(
+        auditoria_Lighthouse(url, 'mobile', auditorias), auditoria_Lighthouse(url, 'desktop', auditorias)
+    )
     
     termino = time.time()
-    driver.quit()
     
     total_test = round(termino - inicio, 2)
     
@@ -87,15 +195,8 @@ def urls_Lighthouse(url):
         'total_test': str(total_test)
     }
 
-# Función para generar un informe HTML con los resultados de Lighthouse
-def generarReporte(url, resultados_MOBILE, resultados_DESKTOP, total_test):
-    html_template = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Lighthouse Report</title>
-        <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-        <style>
+# Estilos compartidos por el reporte de cada URL y el dashboard
+ESTILOS = """
         body {
             font-family: "Segoe UI", Tahoma, Geneva, Verdana, sans-serif;
             margin: 20px;
@@ -133,38 +234,15 @@ def generarReporte(url, resultados_MOBILE, resultados_DESKTOP, total_test):
             height: 150px;
             margin: 10px;
         }
-        </style>
-    </head>
-    <body>
-        <h1>Reporte Lighthouse - URL : {{ url }}</h1>
-        <p>Duracion de la Auditoria: {{ total_test }} segundos</p>
-        <table>
-            <thead>
-                <tr>
-                    <th>Metricas</th>
-                    <th>Mobile</th>
-                    <th>Desktop</th>
-                </tr>
-            </thead>
-            <tbody>
-                <tr>
-                    <td>Performance</td>
-                    <td><canvas id="mobilePerformance"></canvas></td>
-                    <td><canvas id="desktopPerformance"></canvas></td>
-                </tr>
-                <tr>
-                    <td>Accessibility</td>
-                    <td><canvas id="mobileAccessibility"></canvas></td>
-                    <td><canvas id="desktopAccessibility"></canvas></td>
-                </tr>
-                <tr>
-                    <td>SEO</td>
-                    <td><canvas id="mobileSEO"></canvas></td>
-                    <td><canvas id="desktopSEO"></canvas></td>
-                </tr>
-            </tbody>
-        </table>
-        <script>
+
+        .puntuacion {
+            font-weight: bold;
+        }
+"""
+
+# Dibuja las puntuaciones (0 a 1) como gráficos de dona si Chart.js está incluido en la página;
+# sin él quedan los valores en texto, así el reporte se puede ver igual sin conexión
+GRAFICOS = """
             function getColor(score) {
                 if (score < 0.5) {
                     return '#b81818';  // Rojo
@@ -175,9 +253,19 @@ def generarReporte(url, resultados_MOBILE, resultados_DESKTOP, total_test):
                 }
             }
 
-            function renderChart(id, value) {
-                const ctx = document.getElementById(id).getContext('2d');
-                new Chart(ctx, {
+            function renderChart(celda, value) {
+                celda.innerHTML = '';
+                if (value === null || value === undefined) {
+                    celda.textContent = 'N/A';
+                    return;
+                }
+                if (typeof Chart === 'undefined') {
+                    celda.innerHTML = '<span class="puntuacion" style="color:' + getColor(value) + '">' + Math.round(value * 100) + '%</span>';
+                    return;
+                }
+                const canvas = document.createElement('canvas');
+                celda.appendChild(canvas);
+                new Chart(canvas.getContext('2d'), {
                     type: 'doughnut',
                     data: {
                         datasets: [{
@@ -188,22 +276,9 @@ def generarReporte(url, resultados_MOBILE, resultados_DESKTOP, total_test):
                     options: {
                         responsive: true,
                         maintainAspectRatio: false,
-                        cutoutPercentage: 50,
-                        tooltips: { enabled: false },
-                        plugins: {
-                            datalabels: {
-                                display: true,
-                                formatter: (val, ctx) => {
-                                    if (ctx.dataIndex === 0) {
-                                        return `${value * 100}%`;
-                                    } else {
-                                        return '';
-                                    }
-                                },
-                                color: '#000',
-                                font: { weight: 'bold', size: 20 }
-                            }
-                        }
+                        animation: false,
+                        cutout: '50%',
+                        plugins: { tooltip: { enabled: false } }
                     },
                     plugins: [{
                         beforeDraw: function(chart) {
@@ -223,23 +298,194 @@ def generarReporte(url, resultados_MOBILE, resultados_DESKTOP, total_test):
                     }]
                 });
             }
+"""
+
+PLANTILLA_REPORTE = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <title>Lighthouse Report</title>
+        {% if chartjs %}<script>{{ chartjs }}</script>{% endif %}
+        <style>{{ estilos }}</style>
+    </head>
+    <body>
+        <h1>Reporte Lighthouse - URL : {{ url }}</h1>
+        <p>Duracion de la Auditoria: {{ total_test }} segundos</p>
+        <table>
+            <thead>
+                <tr>
+                    <th>Metricas</th>
+                    <th>Mobile</th>
+                    <th>Desktop</th>
+                </tr>
+            </thead>
+            <tbody>
+                {% for nombre, clave in categorias %}
+                <tr>
+                    <td>{{ nombre }}</td>
+                    <td id="mobile-{{ clave }}"></td>
+                    <td id="desktop-{{ clave }}"></td>
+                </tr>
+                {% endfor %}
+            </tbody>
+        </table>
+        <script>
+            {{ graficos }}
 
             document.addEventListener('DOMContentLoaded', function() {
-                renderChart('mobilePerformance', {{ mobile.performance }});
-                renderChart('desktopPerformance', {{ desktop.performance }});
-                renderChart('mobileAccessibility', {{ mobile.accessibility }});
-                renderChart('desktopAccessibility', {{ desktop.accessibility }});
-                renderChart('mobileSEO', {{ mobile.seo }});
-                renderChart('desktopSEO', {{ desktop.seo }});
+                const resultados = {{ resultados | tojson }};
+                for (const mode of ['mobile', 'desktop']) {
+                    for (const categoria of ['performance', 'accessibility', 'seo']) {
+                        renderChart(document.getElementById(mode + '-' + categoria), (resultados[mode] || {})[categoria]);
+                    }
+                }
             });
         </script>
     </body>
     </html>
-    """
+"""
 
+# Un solo archivo para todas las URLs de la ejecución: los resultados van embebidos como JSON
+# y la página dibuja solo los gráficos de la página visible
+PLANTILLA_DASHBOARD = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <title>Lighthouse Dashboard</title>
+        {% if chartjs %}<script>{{ chartjs }}</script>{% endif %}
+        <style>{{ estilos }}
+        canvas {
+            width: 80px;
+            height: 80px;
+            margin: 4px;
+        }
+
+        td.url {
+            text-align: left;
+            max-width: 480px;
+            word-break: break-all;
+        }
+
+        nav button {
+            margin: 0 4px;
+        }
+        </style>
+    </head>
+    <body>
+        <h1>Dashboard Lighthouse</h1>
+        <p>{{ total }} URLs - generado {{ fecha }}</p>
+        <p>
+            <input id="filtro" type="search" placeholder="Filtrar URLs">
+            <select id="orden">
+                <option value="">Orden original</option>
+                <option value="mobile">Performance Mobile (peor primero)</option>
+                <option value="desktop">Performance Desktop (peor primero)</option>
+            </select>
+        </p>
+        <nav>
+            <button id="anterior">&laquo; Anterior</button>
+            <span id="pagina"></span>
+            <button id="siguiente">Siguiente &raquo;</button>
+        </nav>
+        <table>
+            <thead>
+                <tr>
+                    <th rowspan="2">URL</th>
+                    <th rowspan="2">Duracion (s)</th>
+                    {% for nombre, _ in categorias %}<th colspan="2">{{ nombre }}</th>{% endfor %}
+                </tr>
+                <tr>
+                    {% for _ in categorias %}<th>Mobile</th><th>Desktop</th>{% endfor %}
+                </tr>
+            </thead>
+            <tbody id="filas"></tbody>
+        </table>
+        <script>
+            {{ graficos }}
+
+            const resultados = {{ resultados | tojson }};
+            const porPagina = {{ por_pagina }};
+            let visibles = resultados;
+            let pagina = 0;
+
+            function mostrar() {
+                const paginas = Math.max(1, Math.ceil(visibles.length / porPagina));
+                pagina = Math.min(pagina, paginas - 1);
+                document.getElementById('pagina').textContent = 'Página ' + (pagina + 1) + ' de ' + paginas;
+                const cuerpo = document.getElementById('filas');
+                cuerpo.innerHTML = '';
+                for (const resultado of visibles.slice(pagina * porPagina, (pagina + 1) * porPagina)) {
+                    const fila = cuerpo.insertRow();
+                    const url = fila.insertCell();
+                    url.className = 'url';
+                    url.textContent = resultado.url;
+                    fila.insertCell().textContent = resultado.total_test;
+                    for (const categoria of ['performance', 'accessibility', 'seo']) {
+                        for (const mode of ['mobile', 'desktop']) {
+                            renderChart(fila.insertCell(), (resultado[mode] || {})[categoria]);
+                        }
+                    }
+                }
+            }
+
+            function filtrar() {
+                const texto = document.getElementById('filtro').value.toLowerCase();
+                const orden = document.getElementById('orden').value;
+                visibles = resultados.filter(resultado => resultado.url.toLowerCase().includes(texto));
+                if (orden) {
+                    const valor = resultado => { const v = (resultado[orden] || {}).performance; return v === null || v === undefined ? 2 : v; };
+                    visibles = visibles.slice().sort((a, b) => valor(a) - valor(b));
+                }
+                pagina = 0;
+                mostrar();
+            }
+
+            document.getElementById('anterior').addEventListener('click', () => { if (pagina > 0) { pagina--; mostrar(); } });
+            document.getElementById('siguiente').addEventListener('click', () => { pagina++; mostrar(); });
+            document.getElementById('filtro').addEventListener('input', filtrar);
+            document.getElementById('orden').addEventListener('change', filtrar);
+            document.addEventListener('DOMContentLoaded', mostrar);
+        </script>
+    </body>
+    </html>
+"""
+
+CATEGORIAS = [('Performance', 'performance'), ('Accessibility', 'accessibility'), ('SEO', 'seo')]
+
+# Las plantillas se compilan una sola vez por proceso
+@lru_cache(maxsize=None)
+def plantilla(fuente):
+    return Environment(autoescape=True).from_string(fuente)
+
+# Chart.js (v3 o v4, build UMD) local que se incluye dentro de cada archivo (los servidores de
+# reportes no tienen acceso a la CDN). El repositorio no lo trae: se descarga una vez, por ejemplo
+# de https://cdn.jsdelivr.net/npm/chart.js@4/dist/chart.umd.min.js, junto a test.py o en la ruta
+# de --chartjs / CHARTJS_PATH. Se lee una sola vez; sin archivo los reportes muestran las
+# puntuaciones en texto.
+@lru_cache(maxsize=None)
+def leer_Chartjs(pathChartjs):
+    if not pathChartjs or not os.path.exists(pathChartjs):
+        return None
+    with open(pathChartjs, 'r', encoding='utf-8') as archivo:
+        # Un "</script>" dentro del código cerraría el bloque antes de tiempo
+        return Markup(archivo.read().replace('</script', '<\\/script'))
+
+# Solo las puntuaciones de un modo (o None si la auditoría falló)
+def puntuaciones_Modo(resultados):
+    if not resultados:
+        return None
+    return {categoria: resultados.get(categoria) for _, categoria in CATEGORIAS}
+
+# Función para generar un informe HTML con los resultados de Lighthouse
+def generarReporte(url, resultados_MOBILE, resultados_DESKTOP, total_test):
     # Renderizar el contenido del informe HTML utilizando la plantilla y los datos proporcionados
-    template = Template(html_template)
-    contenido_HTML = template.render(url=url, mobile=resultados_MOBILE, desktop=resultados_DESKTOP, total_test=total_test)
+    contenido_HTML = plantilla(PLANTILLA_REPORTE).render(
+        url=url, total_test=total_test, categorias=CATEGORIAS, estilos=Markup(ESTILOS), graficos=Markup(GRAFICOS),
+        chartjs=leer_Chartjs(args.chartjs),
+        resultados={'mobile': puntuaciones_Modo(resultados_MOBILE), 'desktop': puntuaciones_Modo(resultados_DESKTOP)}
+    )
 
     # Nombre del reporte = nombre de la URL
     reporte_URL = f'{url.replace("https://", "").replace("/", "_")}.html'
@@ -249,20 +495,85 @@ def generarReporte(url, resultados_MOBILE, resultados_DESKTOP, total_test):
 
     print(f"Reporte Lighthouse: {reporte_URL}")
 
+# Función para generar un solo dashboard paginado con los resultados de todas las URLs de la ejecución
+def generarDashboard(resultados, pathDashboard, por_pagina=50):
+    datos = [
+        {
+            'url': resultado['url'],
+            'total_test': resultado['total_test'],
+            'mobile': puntuaciones_Modo(resultado['resultados_MOBILE']),
+            'desktop': puntuaciones_Modo(resultado['resultados_DESKTOP'])
+        }
+        for resultado in resultados
+    ]
+    contenido_HTML = plantilla(PLANTILLA_DASHBOARD).render(
+        resultados=datos, total=len(datos), por_pagina=por_pagina, fecha=datetime.now().strftime('%Y-%m-%d %H:%M'),
+        categorias=CATEGORIAS, estilos=Markup(ESTILOS), graficos=Markup(GRAFICOS), chartjs=leer_Chartjs(args.chartjs)
+    )
+    with open(pathDashboard, 'w', encoding='utf-8') as f:
+        f.write(contenido_HTML)
+
+    print(f"Dashboard Lighthouse: {pathDashboard} ({len(datos)} URLs)")
+
+parser = argparse.ArgumentParser(description='Auditorías Lighthouse con reportes HTML para las URLs de urls.txt')
+parser.add_argument('--reporte', choices=['url', 'dashboard', 'ambos'], default='url', help='url: un HTML por URL; dashboard: un solo HTML paginado para toda la ejecución')
+parser.add_argument('--dashboard', default='dashboard.html', help='Archivo del dashboard')
+parser.add_argument('--por-pagina', type=int, default=50, help='URLs por página del dashboard')
+parser.add_argument('--chartjs', default=os.environ.get('CHARTJS_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chart.umd.min.js')),
+                    help='Copia local de Chart.js que se incluye en los reportes (CHARTJS_PATH)')
+parser.add_argument('--sin-calentar', action='store_true', help='No visitar las URLs con Chrome antes de auditarlas')
+parser.add_argument('--pestanas', type=int, default=8, help='URLs que se calientan a la vez (pestañas del Chrome compartido)')
+parser.add_argument('--espera-calentar', type=float, default=30, help='Segundos máximos de carga de una URL durante el calentamiento')
+parser.add_argument('--trabajadores', type=int, default=2, help='Auditorías Lighthouse concurrentes')
+parser.add_argument('--plazo', type=float, help='Segundos máximos por auditoría; al vencer se termina Lighthouse con su Chrome')
+args = parser.parse_args()
+
+# Se avisa al inicio y no al generar el primer reporte, así se puede cancelar antes de auditar
+if not leer_Chartjs(args.chartjs):
+    print(f"AVISO: no se encontró Chart.js en {args.chartjs}. Los reportes y el dashboard mostrarán las "
+          "puntuaciones como texto, sin gráficos. Descargue chart.umd.min.js (Chart.js v4, "
+          "https://cdn.jsdelivr.net/npm/chart.js@4/dist/chart.umd.min.js) junto a test.py o indique "
+          "su ruta con --chartjs o CHARTJS_PATH.")
+
 # Leer las URLs desde un archivo de texto
 with open('urls.txt', 'r') as archivo:
     urls = archivo.read().splitlines()
 
-# Ejecutar las pruebas en paralelo
-with ThreadPoolExecutor(max_workers=2) as ejec:
+# Calentar todas las URLs de una vez antes de las auditorías
+if not args.sin_calentar:
+    calentador = CalentadorCache(args.pestanas, args.espera_calentar)
+    try:
+        calentador.calentar(list(dict.fromkeys(urls)))
+    except Exception as e:
+        print(f"Error en el calentamiento, se audita sin él: {e}")
+    finally:
+        calentador.cerrar()
 
-    future_to_url = {ejec.submit(urls_Lighthouse, url): url for url in urls}
-    
-    for future in as_completed(future_to_url):
-        url = future_to_url[future]
+# Ejecutar las pruebas en paralelo: cada URL es una tarea y los reportes se generan a medida que terminan
+async def ejecutar_Pruebas(urls):
+    auditorias = asyncio.Semaphore(args.trabajadores)
+
+    async def probar(url):
         try:
-            result = future.result()
-            # Generar el informe HTML para la URL procesada
-            generarReporte(result['url'], result['resultados_MOBILE'], result['resultados_DESKTOP'], result['total_test'])
+            return url, await urls_Lighthouse(url, auditorias), None
         except Exception as e:
-            print(f"Error de procesamiento en {url}: {e}")
+            return url, None, e
+
+    resultados = []
+    for tarea in asyncio.as_completed([probar(url) for url in urls]):
+        url, result, error = await tarea
+        if error:
+            print(f"Error de procesamiento en {url}: {error}")
+            continue
+        resultados.append(result)
+        # Generar el informe HTML para la URL procesada
+        if args.reporte != 'dashboard':
+            generarReporte(result['url'], result['resultados_MOBILE'], result['resultados_DESKTOP'], result['total_test'])
+    return resultados
+
+resultados = asyncio.run(ejecutar_Pruebas(urls))
+
+# El dashboard se genera en un solo paso con todos los resultados, en el orden de urls.txt
+if args.reporte != 'url':
+    orden = {url: i for i, url in enumerate(urls)}
+    generarDashboard(sorted(resultados, key=lambda resultado: orden.get(resultado['url'], len(orden))), args.dashboard, args.por_pagina)
@@ -0,0 +1,108 @@
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import descubrimiento
+from descubrimiento import Descubridor, descubrir_Urls, normalizar_Url
+
+# Sitio local para las pruebas: {ruta: (código, Content-Type, cuerpo)}. La raíz del servidor se
+# reemplaza en "{origen}" al iniciar el fixture.
+SITIO = {
+    '/sitemap.xml': (200, 'application/xml', '''<?xml version="1.0" encoding="UTF-8"?>
+        <sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+            <sitemap><loc>{origen}/sitemap-paginas.xml</loc></sitemap>
+            <sitemap><loc>{origen}/sitemap-planes.xml.gz</loc></sitemap>
+            <sitemap><loc>{origen}/sitemap-paginas.xml</loc></sitemap>
+        </sitemapindex>'''),
+    '/sitemap-paginas.xml': (200, 'application/xml', '''<?xml version="1.0" encoding="UTF-8"?>
+        <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+            <url><loc>{origen}/a</loc></url>
+            <url><loc>{origen}/a#arriba</loc></url>
+            <url><loc>{origen}/b</loc></url>
+            <url><loc>{origen}/no-existe</loc></url>
+            <url><loc>{origen}/error</loc></url>
+            <url><loc>{origen}/logo.png</loc></url>
+            <url><loc>http://otro.example/a</loc></url>
+        </urlset>'''),
+    '/sitemap-planes.xml.gz': (200, 'application/gzip', '''<?xml version="1.0" encoding="UTF-8"?>
+        <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+            <url><loc>{origen}/planes</loc></url>
+        </urlset>'''),
+    '/': (200, 'text/html; charset=utf-8', '''<html><head><title>Inicio | Entel</title></head><body>
+        <a href="/a">A</a> <a href="a#arriba">A otra vez</a> <a href="/c">C</a> <a href="/c?plan=1">C con plan</a>
+        <a href="http://otro.example/">Otro sitio</a> <a href="mailto:hola@entel.cl">Correo</a>
+        <a href="/error">Error</a> <a href="/no-existe">404</a> <a href="/folleto.pdf">PDF</a>
+        </body></html>'''),
+    '/a': (200, 'text/html; charset=utf-8', '<html><head><title>A | Entel</title></head><body><a href="/">Inicio</a></body></html>'),
+    '/b': (200, 'text/html; charset=utf-8', '<html><head><title>B | Entel</title></head><body></body></html>'),
+    '/c': (200, 'text/html; charset=utf-8', '<html><head><title>C | Entel</title></head><body><a href="/d">D</a></body></html>'),
+    '/d': (200, 'text/html', '<html><head><title>Teléfonos | Entel</title></head><body></body></html>'),
+    '/planes': (200, 'text/html; charset=utf-8', '<html><head><title>Planes | Entel</title></head><body></body></html>'),
+    '/error': (200, 'text/html; charset=utf-8', '<html><head><title>Página de Error | Entel</title></head><body></body></html>'),
+}
+
+class _Sitio(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        ruta = self.path.split('?')[0]
+        codigo, tipo, cuerpo = self.server.paginas.get(ruta, (404, 'text/html', '<html><head><title>No encontrada</title></head></html>'))
+        cuerpo = cuerpo.format(origen=self.server.origen).encode('utf-8')
+        if ruta.endswith('.gz'):
+            cuerpo = gzip.compress(cuerpo)
+        self.send_response(codigo)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def sitio():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Sitio)
+    servidor.daemon_threads = True
+    servidor.paginas = SITIO
+    servidor.origen = f'http://127.0.0.1:{servidor.server_port}'
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    yield servidor.origen
+    servidor.shutdown()
+    servidor.server_close()
+
+def test_normalizar_url():
+    assert normalizar_Url('HTTPS://WWW.Entel.CL:443/planes#arriba') == 'https://www.entel.cl/planes'
+    assert normalizar_Url('http://entel.cl:80') == 'http://entel.cl/'
+    assert normalizar_Url(' http://entel.cl:8080/a?b=1 ') == 'http://entel.cl:8080/a?b=1'
+
+def test_indice_de_sitemaps_sin_verificar(sitio):
+    # El índice se recorre recursivamente (también el .gz) y cada sitemap se lee una sola vez
+    urls = descubrir_Urls(sitio, verificar=False, pausa=0)
+    assert urls == sorted([f'{sitio}/a', f'{sitio}/b', f'{sitio}/no-existe', f'{sitio}/error', f'{sitio}/planes'])
+
+def test_sitemap_verificado_descarta_404_y_pagina_de_error(sitio):
+    descubridor = Descubridor(sitio, pausa=0)
+    urls = descubrimiento.asyncio.run(descubridor.descubrir())
+    assert urls == sorted([f'{sitio}/a', f'{sitio}/b', f'{sitio}/planes'])
+    assert descubridor.descartadas == {f'{sitio}/no-existe': 404, f'{sitio}/error': "Página de Error Detectada"}
+
+def test_rastreo_del_mismo_origen(sitio):
+    urls = descubrir_Urls(sitio, sitemaps=[f'{sitio}/sin-sitemap.xml'], rastrear=True, pausa=0)
+    # Sin fragmentos ni duplicados, sin otros orígenes, mailto ni PDF, y sin el 404 ni la página de error
+    assert urls == sorted([f'{sitio}/', f'{sitio}/a', f'{sitio}/c', f'{sitio}/c?plan=1', f'{sitio}/d'])
+
+def test_max_paginas(sitio):
+    urls = descubrir_Urls(sitio, sitemaps=[f'{sitio}/sin-sitemap.xml'], rastrear=True, maxPaginas=2, pausa=0)
+    assert len(urls) == 2
+
+def test_sesion_por_hilo_de_trabajo(sitio, monkeypatch):
+    # Cada solicitud usa la Session de su hilo de trabajo, nunca la del hilo del bucle de eventos
+    hilos = []
+    original = descubrimiento.sesion
+    def sesion():
+        hilos.append(threading.current_thread())
+        return original()
+    monkeypatch.setattr(descubrimiento, 'sesion', sesion)
+    descubrir_Urls(sitio, rastrear=True, pausa=0)
+    assert hilos and threading.main_thread() not in hilos
@@ -0,0 +1,152 @@
+import hashlib
+import html
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from requests.adapters import HTTPAdapter
+
+# Bytes máximos que se leen buscando </title> antes de rendirse
+LIMITE_TITULO = 256 * 1024
+# Después del título se consume el resto del cuerpo hasta este tamaño para devolver la conexión
+# keep-alive a la sesión; con cuerpos más grandes se cierra la conexión
+LIMITE_DRENADO = 512 * 1024
+# Segundos para conectar y entre bytes recibidos: un host colgado no retiene al hilo para siempre
+TIMEOUT_VALIDACION = (10, 30)
+
+PATRON_TITULO = re.compile(rb'<title[^>]*>(.*?)</title\s*>', re.IGNORECASE | re.DOTALL)
+PATRON_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+PATRON_CHARSET_CABECERA = re.compile(r'charset=["\']?([\w-]+)', re.IGNORECASE)
+
+# Una Session por hilo: reutiliza conexiones keep-alive sin compartir estado entre hilos
+_local = threading.local()
+
+def sesion():
+    if not hasattr(_local, 'sesion'):
+        _local.sesion = requests.Session()
+        _local.sesion.mount('http://', HTTPAdapter(pool_maxsize=4))
+        _local.sesion.mount('https://', HTTPAdapter(pool_maxsize=4))
+    return _local.sesion
+
+# Lee el cuerpo por bloques solo hasta encontrar </title> y devuelve el título sin parsear el DOM.
+# Con un hash, todo lo leído se agrega al hash y el resto del cuerpo también se consume; sin hash,
+# el resto se descarta si es chico (LIMITE_DRENADO) para poder reutilizar la conexión.
+def leer_Titulo(response, hashCuerpo=None):
+    contenido = b''
+    bloques = response.iter_content(chunk_size=8192)
+    for bloque in bloques:
+        contenido += bloque
+        if PATRON_TITULO.search(contenido) or len(contenido) >= LIMITE_TITULO:
+            break
+
+    if hashCuerpo is not None:
+        hashCuerpo.update(contenido)
+        for bloque in bloques:
+            hashCuerpo.update(bloque)
+    else:
+        drenado = 0
+        for bloque in bloques:
+            drenado += len(bloque)
+            if drenado > LIMITE_DRENADO:
+                break
+
+    return titulo_Html(contenido, response.headers.get('Content-Type', ''))
+
+# Descripción de un código HTTP ("Not Found"); los códigos que requests no conoce (520 de
+# Cloudflare, por ejemplo) quedan como "Desconocido"
+def descripcion_Codigo(codigo):
+    return requests.status_codes._codes.get(codigo, ('desconocido',))[0].replace('_', ' ').title()
+
+# Título de una página a partir de los primeros bytes del cuerpo
+def titulo_Html(contenido, contentType=''):
+    coincidencia = PATRON_TITULO.search(contenido)
+    if not coincidencia:
+        return ""
+
+    # El charset declarado en la cabecera manda; si no, el <meta charset> o UTF-8
+    codificacion = None
+    cabecera = PATRON_CHARSET_CABECERA.search(contentType)
+    if cabecera:
+        codificacion = cabecera.group(1)
+    else:
+        meta = PATRON_CHARSET.search(contenido)
+        if meta:
+            codificacion = meta.group(1).decode('ascii')
+    try:
+        titulo = coincidencia.group(1).decode(codificacion or 'utf-8', errors='replace')
+    except LookupError:
+        titulo = coincidencia.group(1).decode('utf-8', errors='replace')
+    return html.unescape(titulo).strip()
+
+# Detecta la página de error de Entel por su título
+def es_Pagina_Error(titulo):
+    return "Error" in titulo or "Página de Error | Entel" in titulo
+
+# (codigo, descripcion) de una respuesta 200 según su título: la página de error de Entel cuenta como 404
+def verificar_Titulo(url, titulo):
+    if es_Pagina_Error(titulo):
+        codigo, descripcion = 404, "Redireccion - Página de Error Detectada"
+        print(f"Error al verificar la URL {url}: {codigo} {descripcion}")
+        return codigo, descripcion
+    return 200, "OK"
+
+# Función para verificar si una URL responde con un código de estado 200 y saltar pagina 404 de Entel.
+# Devuelve (codigo, descripcion, firma, urlFinal): urlFinal es la URL después de las redirecciones
+# (None si no hubo respuesta) y la firma de la página (ETag, Last-Modified y hash del cuerpo) para el cache de
+# auditorías; el cuerpo completo solo se descarga para el hash si se pide firmar y el servidor
+# no entrega ni ETag ni Last-Modified.
+def validar_Url(url, firmar=False):
+    firma = {'etag': None, 'lastModified': None, 'hash': None}
+    try:
+        # Un solo GET en streaming: el código sale de la respuesta final y del cuerpo solo se lee el <title>
+        with sesion().get(url, allow_redirects=True, stream=True, timeout=TIMEOUT_VALIDACION) as response:
+            codigo = response.status_code
+            if codigo == 200:
+                firma['etag'] = response.headers.get('ETag')
+                firma['lastModified'] = response.headers.get('Last-Modified')
+                hashCuerpo = None
+                if firmar and not firma['etag'] and not firma['lastModified']:
+                    hashCuerpo = hashlib.sha256()
+                titulo = leer_Titulo(response, hashCuerpo)
+                if hashCuerpo is not None:
+                    firma['hash'] = hashCuerpo.hexdigest()
+                codigo, descripcion = verificar_Titulo(url, titulo)
+            else:
+                descripcion = descripcion_Codigo(codigo)
+
+        return codigo, descripcion, firma, response.url
+    except requests.RequestException as e:
+        print(f"Error al verificar la URL {url}: {e}")
+        return None, str(e), firma, None
+
+# Valida una URL dentro de un tramo de la instrumentación
+def _validar_Medido(url, firmar, tiempos):
+    with tiempos.tramo('validacion', url=url) as tramo:
+        resultado = validar_Url(url, firmar)
+        tramo.datos['codigo'] = resultado[0]
+    return resultado
+
+# Valida todas las URLs de forma concurrente (pre-paso antes de las auditorías)
+# y devuelve {url: (codigo, descripcion, firma, urlFinal)} en el orden de entrada.
+# Con una Instrumentacion se registra la duración de cada validación.
+def validar_Urls(urls, concurrencia=16, firmar=False, tiempos=None):
+    resultados = {}
+    with ThreadPoolExecutor(max_workers=concurrencia, thread_name_prefix='validacion') as ejec:
+        if tiempos:
+            future_to_url = {ejec.submit(_validar_Medido, url, firmar, tiempos): url for url in dict.fromkeys(urls)}
+        else:
+            future_to_url = {ejec.submit(validar_Url, url, firmar): url for url in dict.fromkeys(urls)}
+        try:
+            for future in as_completed(future_to_url):
+                url = future_to_url[future]
+                # Un error inesperado en una URL no detiene la validación de las demás
+                try:
+                    resultados[url] = future.result()
+                except Exception as e:
+                    print(f"Error al verificar la URL {url}: {e}")
+                    resultados[url] = (None, str(e) or type(e).__name__, {'etag': None, 'lastModified': None, 'hash': None}, None)
+        except KeyboardInterrupt:
+            # Con Ctrl+C no se esperan las validaciones que faltan, solo las que están en curso
+            ejec.shutdown(wait=False, cancel_futures=True)
+            raise
+    return {url: resultados[url] for url in dict.fromkeys(urls)}